@@ -0,0 +1,344 @@
+"""
+Offline multi-core batch scoring.
+
+Scores a CSV or structured .npy file with one of the fuzzy engines
+without the HTTP layer:
+
+    python -m app.batch readiness checkins.csv scores.npy --workers 16
+
+Input and output are memory-mapped structured arrays; worker processes
+receive only file paths and row ranges, never the rows themselves.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.fuzzy_engine.body_comp import ACTIVITY_LEVELS, BMI_MF, BUILD_TYPES, estimate_body_composition_batch
+from app.fuzzy_engine.nutrition import (
+    ACTIVITY_LEVELS as NUTRITION_ACTIVITY_LEVELS,
+    GOALS,
+    METABOLISM_TYPES,
+    calculate_nutrition_batch,
+)
+from app.fuzzy_engine.readiness import calculate_readiness_batch
+from app.fuzzy_engine.strength import FORM_QUALITIES, estimate_one_rep_max_batch
+from app.fuzzy_engine.utils import encode_categories
+
+
+NUTRITION_OUTPUTS = [
+    (f"{macro}_{level}", "f8")
+    for macro in ("calories", "protein", "carbs", "fat")
+    for level in ("low", "mid", "high")
+]
+
+# Longest BMI interpretation: every category at "100% <category>", joined by ", "
+BMI_INTERPRETATION_LENGTH = sum(len(f"100% {name}") for name in BMI_MF) + 2 * (len(BMI_MF) - 1)
+
+# Engine name -> (batch function, input fields, output fields,
+# constraints); fields are (name, dtype) pairs of the structured arrays,
+# constraints are numeric bounds or a tuple of allowed categories
+ENGINE_SPECS = {
+    "readiness": (
+        calculate_readiness_batch,
+        [("sleep", "f8"), ("energy", "f8"), ("soreness", "f8"), ("stress", "f8")],
+        [("intensity", "f8"), ("label", "U8"), ("confidence", "f8")],
+        {name: {"ge": 0, "le": 10} for name in ("sleep", "energy", "soreness", "stress")},
+    ),
+    "body_composition": (
+        estimate_body_composition_batch,
+        [("weight", "f8"), ("height", "f8"), ("waist", "f8"), ("activity_level", "U16"), ("build_type", "U16")],
+        [
+            ("body_fat_low", "f8"), ("body_fat_mid", "f8"), ("body_fat_high", "f8"),
+            ("muscle_mass_category", "U16"), ("bmi", "f8"), ("bmi_interpretation", f"U{BMI_INTERPRETATION_LENGTH}"),
+        ],
+        {
+            "weight": {"gt": 0},
+            "height": {"gt": 0},
+            "waist": {"gt": 0},
+            "activity_level": ACTIVITY_LEVELS,
+            "build_type": BUILD_TYPES,
+        },
+    ),
+    "strength": (
+        estimate_one_rep_max_batch,
+        [("weight_lifted", "f8"), ("reps", "U32"), ("rpe", "f8"), ("form_quality", "U16")],
+        [("one_rm_low", "f8"), ("one_rm_mid", "f8"), ("one_rm_high", "f8"), ("confidence", "f8")],
+        {"weight_lifted": {"gt": 0}, "rpe": {"ge": 1, "le": 10}, "form_quality": FORM_QUALITIES},
+    ),
+    "nutrition": (
+        calculate_nutrition_batch,
+        [("weight", "f8"), ("goal", "U16"), ("activity_level", "U16"), ("metabolism", "U16"), ("adherence", "f8")],
+        NUTRITION_OUTPUTS,
+        {
+            "weight": {"gt": 0},
+            "adherence": {"ge": 0, "le": 1},
+            "goal": GOALS,
+            "activity_level": NUTRITION_ACTIVITY_LEVELS,
+            "metabolism": METABOLISM_TYPES,
+        },
+    ),
+}
+
+# Rows per engine call inside a worker; bounds per-call temporaries
+DEFAULT_SHARD_ROWS = 50_000
+
+CHECKS = {
+    "ge": np.greater_equal,
+    "gt": np.greater,
+    "le": np.less_equal,
+    "lt": np.less,
+}
+
+
+def _convert_column(csv_path: str, start: int, name: str, dtype: str, values: tuple) -> np.ndarray:
+    """Convert one block of a CSV column, naming the first bad row on failure."""
+    if np.dtype(dtype).kind == "U":
+        # Fixed-width strings would silently truncate longer values
+        width = np.dtype(dtype).itemsize // 4
+        lengths = np.array([len(value) for value in values])
+        if (lengths > width).any():
+            row = start + int(np.argmax(lengths > width))
+            raise ValueError(f"{csv_path}: row {row}: {name} is longer than {width} characters")
+    try:
+        return np.array(values, dtype=dtype)
+    except (ValueError, OverflowError):
+        pass
+    for offset, value in enumerate(values):
+        try:
+            np.array([value], dtype=dtype)
+        except (ValueError, OverflowError):
+            raise ValueError(f"{csv_path}: row {start + offset}: {name} is not a valid number: {value!r}") from None
+    raise ValueError(f"{csv_path}: rows {start}-{start + len(values) - 1}: {name} could not be converted")
+
+
+def csv_to_npy(csv_path: str, npy_path: str, fields: list, block_rows: int = 100_000) -> int:
+    """
+    Convert a CSV file with a header row to a structured .npy file.
+    
+    Rows are counted first and then written block by block into a
+    memory-mapped output, so the whole CSV is never held in memory.
+    
+    Args:
+        csv_path: Input CSV path
+        npy_path: Output .npy path
+        fields: (name, dtype) pairs; extra CSV columns are ignored
+        block_rows: Rows parsed per block
+    
+    Returns:
+        Number of data rows
+    
+    Raises:
+        ValueError: If the header lacks a field, a row is malformed, a
+            numeric value does not parse or a text value is longer than
+            its field's fixed width (the partial npy_path is removed)
+    """
+    with open(csv_path, newline="") as f:
+        header = [name.strip() for name in next(csv.reader(f))]
+        rows = sum(1 for line in f if line.strip())
+    missing = [name for name, _ in fields if name not in header]
+    if missing:
+        raise ValueError(f"{csv_path}: header is missing columns {missing}")
+    positions = [header.index(name) for name, _ in fields]
+    
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.dtype(fields), shape=(rows,))
+    try:
+        with open(csv_path, newline="") as f:
+            reader = csv.reader(line for line in f if line.strip())
+            next(reader)
+            start = 0
+            while start < rows:
+                block = []
+                for fields_in_row in reader:
+                    if len(fields_in_row) != len(header):
+                        raise ValueError(f"{csv_path}: row {start + len(block)} has {len(fields_in_row)} fields")
+                    block.append(tuple(fields_in_row[p] for p in positions))
+                    if len(block) == block_rows:
+                        break
+                if not block:
+                    raise ValueError(f"{csv_path}: expected {rows} rows, found {start}")
+                columns = list(zip(*block))
+                for (name, dtype), values in zip(fields, columns):
+                    out[name][start:start + len(block)] = _convert_column(csv_path, start, name, dtype, values)
+                start += len(block)
+        out.flush()
+    except BaseException:
+        # Leave no partial output behind for a later run to pick up
+        del out
+        os.remove(npy_path)
+        raise
+    del out
+    return rows
+
+
+def load_input(path: str, fields: list) -> np.ndarray:
+    """Memory-map a structured .npy input and check it has every field."""
+    data = np.load(path, mmap_mode="r")
+    names = data.dtype.names or ()
+    missing = [name for name, _ in fields if name not in names]
+    if missing:
+        raise ValueError(f"{path}: input is missing fields {missing}")
+    return data
+
+
+def validate(data: np.ndarray, constraints: dict, offset: int = 0) -> None:
+    """Raise ValueError naming the first row that violates a constraint."""
+    for name, bounds in constraints.items():
+        if isinstance(bounds, tuple):
+            # Unknown categories would otherwise fall back to engine defaults
+            unknown = encode_categories(data[name], bounds) == len(bounds)
+            if unknown.any():
+                row = int(np.argmax(unknown))
+                raise ValueError(f"{name}[{offset + row}] = {data[name][row]!r} must be one of {bounds}")
+            continue
+        column = np.asarray(data[name], dtype=float)
+        valid = np.isfinite(column)
+        for op, bound in bounds.items():
+            valid &= CHECKS[op](column, bound)
+        if not valid.all():
+            row = int(np.argmin(valid))
+            raise ValueError(f"{name}[{offset + row}] = {column[row]} must satisfy {bounds}")
+
+
+def score_range(engine: str, input_path: str, output_path: str, start: int, stop: int, shard_rows: int) -> int:
+    """
+    Score rows [start, stop) of the input into the same rows of the output.
+    
+    Runs in a worker process; both files are opened as memory maps.
+    
+    Returns:
+        Number of rows scored
+    """
+    function, fields, outputs, constraints = ENGINE_SPECS[engine]
+    data = np.load(input_path, mmap_mode="r")
+    out = np.load(output_path, mmap_mode="r+")
+    for shard_start in range(start, stop, shard_rows):
+        shard_stop = min(shard_start + shard_rows, stop)
+        shard = data[shard_start:shard_stop]
+        validate(shard, constraints, offset=shard_start)
+        result = function(**{name: shard[name] for name, _ in fields})
+        for name, _ in outputs:
+            values = np.asarray(result[name])
+            if values.dtype.kind == "U" and values.dtype.itemsize > out[name].dtype.itemsize:
+                width = out[name].dtype.itemsize // 4
+                too_long = np.char.str_len(values) > width
+                if too_long.any():
+                    row = shard_start + int(np.argmax(too_long))
+                    raise ValueError(f"{name}[{row}] is longer than the {width}-character output field")
+            out[name][shard_start:shard_stop] = values
+    out.flush()
+    return stop - start
+
+
+def write_csv(npy_path: str, csv_path: str, block_rows: int = 100_000) -> None:
+    """Write a structured .npy file as CSV, block by block."""
+    data = np.load(npy_path, mmap_mode="r")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(data.dtype.names)
+        for start in range(0, len(data), block_rows):
+            writer.writerows(data[start:start + block_rows].tolist())
+
+
+def run(
+    engine: str,
+    input_path: str,
+    output_path: str,
+    workers: int | None = None,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+) -> dict:
+    """
+    Score a whole file across a process pool.
+    
+    Args:
+        engine: Key of ENGINE_SPECS
+        input_path: CSV (with header) or structured .npy file
+        output_path: .npy or .csv output path
+        workers: Worker processes; None uses the CPU count
+        shard_rows: Rows per engine call inside a worker
+    
+    Returns:
+        Dictionary with rows, seconds and rows_per_second
+    """
+    _, fields, outputs, _ = ENGINE_SPECS[engine]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    
+    with tempfile.TemporaryDirectory(prefix="fuzzy-batch-") as scratch:
+        if input_path.endswith(".csv"):
+            npy_input = os.path.join(scratch, "input.npy")
+            csv_to_npy(input_path, npy_input, fields)
+        else:
+            npy_input = input_path
+        rows = len(load_input(npy_input, fields))
+        
+        write_csv_output = output_path.endswith(".csv")
+        npy_output = os.path.join(scratch, "output.npy") if write_csv_output else output_path
+        out = np.lib.format.open_memmap(npy_output, mode="w+", dtype=np.dtype(outputs), shape=(rows,))
+        del out
+        
+        # One contiguous range per worker, each scored in shard_rows pieces
+        bounds = np.linspace(0, rows, min(workers, max(rows, 1)) + 1).astype(int)
+        ranges = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        if len(ranges) <= 1:
+            for start, stop in ranges:
+                score_range(engine, npy_input, npy_output, start, stop, shard_rows)
+        else:
+            with ProcessPoolExecutor(len(ranges)) as pool:
+                futures = [
+                    pool.submit(score_range, engine, npy_input, npy_output, start, stop, shard_rows)
+                    for start, stop in ranges
+                ]
+                for future in futures:
+                    future.result()
+        
+        if write_csv_output:
+            write_csv(npy_output, output_path)
+    
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds > 0 else None,
+        "workers": len(ranges),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch",
+        description="Score a CSV or structured .npy file with a fuzzy engine.",
+    )
+    parser.add_argument("engine", choices=sorted(ENGINE_SPECS))
+    parser.add_argument("input", help="CSV file with a header row, or structured .npy file")
+    parser.add_argument("output", help="Output .npy (structured, memory-mappable) or .csv file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--shard-rows",
+        type=int,
+        default=DEFAULT_SHARD_ROWS,
+        help=f"Rows per engine call inside a worker (default: {DEFAULT_SHARD_ROWS})",
+    )
+    args = parser.parse_args(argv)
+    
+    try:
+        stats = run(args.engine, args.input, args.output, args.workers, args.shard_rows)
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    print(
+        f"{args.engine}: scored {stats['rows']} rows in {stats['seconds']}s "
+        f"({stats['rows_per_second']} rows/sec, {stats['workers']} workers)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
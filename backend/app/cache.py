@@ -0,0 +1,116 @@
+"""Bounded LRU memoization for the pure engine pipelines."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class EngineCache:
+    """
+    Thread-safe LRU cache keyed on canonicalized engine inputs.
+    
+    Inputs are given as a {field: value} dict. Fields listed in quantize
+    are snapped to a multiple of their step before both the key is built
+    and the result is computed, so every input in the same bucket gets the
+    same answer regardless of which one arrived first.
+    
+    Args:
+        maxsize: Maximum number of cached results; the least recently used
+            entry is evicted beyond this
+        ttl: Seconds a result stays valid, or None to never expire
+        quantize: Optional {field: step} for float fields
+        clock: Monotonic time source (seconds)
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: Optional[float] = None,
+        quantize: Optional[dict] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quantize = dict(quantize or {})
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def canonicalize(self, inputs: dict) -> dict:
+        """Apply per-field quantization to an input dict."""
+        canonical = dict(inputs)
+        for field, step in self.quantize.items():
+            value = canonical.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                canonical[field] = round(round(value / step) * step, 10)
+        return canonical
+    
+    @staticmethod
+    def key(inputs: dict) -> tuple:
+        """Hashable key independent of field order."""
+        return tuple(sorted(inputs.items()))
+    
+    def get_or_compute(self, inputs: dict, compute: Callable[[dict], Any]) -> Any:
+        """
+        Return the cached result for inputs, computing it on a miss.
+        
+        Args:
+            inputs: {field: value} engine inputs
+            compute: Called with the canonicalized inputs on a miss
+        
+        Returns:
+            The cached or freshly computed result; treat it as read-only
+        """
+        canonical = self.canonicalize(inputs)
+        key = self.key(canonical)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        
+        # Compute outside the lock; concurrent misses on one key may both
+        # compute, which is harmless for pure functions
+        value = compute(canonical)
+        expires_at = None if self.ttl is None else now + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+    
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
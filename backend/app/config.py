@@ -0,0 +1,175 @@
+"""Runtime settings read from environment variables."""
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Engine pipelines that can be cached, named as in the dashboard payload
+ENGINES = ("readiness", "body_composition", "strength", "nutrition")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag such as "1", "true" or "yes"."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return default if value is None else float(value)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return default if value is None else int(value)
+
+
+def _env_optional_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return float(value) if value.strip() else None
+
+
+def _env_list(name: str, default: tuple) -> tuple:
+    """Read a comma separated list; "none" or an empty value gives ()."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    items = tuple(item.strip() for item in value.split(",") if item.strip())
+    return () if items == ("none",) else items
+
+
+def _env_quantize(name: str) -> dict:
+    """Read "engine.field=step" pairs, e.g. "readiness.sleep=0.5,nutrition.weight=1"."""
+    quantize = {}
+    for item in os.environ.get(name, "").split(","):
+        if not item.strip():
+            continue
+        target, step = item.split("=")
+        engine, field_name = target.strip().split(".")
+        quantize.setdefault(engine, {})[field_name] = float(step)
+    return quantize
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Application settings.
+    
+    Attributes:
+        readiness_defuzzification: "grid" or "analytic" centroid of the
+            readiness output; also used to build the lookup table
+        readiness_lut: Answer readiness requests from a precomputed table
+        readiness_lut_step: Grid spacing of the table on each 0-10 input
+        readiness_lut_dir: Directory for cached tables; None disables caching
+        readiness_lut_error_samples: Random off-grid points used to measure
+            the interpolation error
+        cache_engines: Engine pipelines whose results are memoized
+        cache_maxsize: Maximum cached results per engine
+        cache_ttl: Seconds a cached result stays valid; None never expires
+        cache_quantize: {engine: {field: step}} float quantization of keys
+        executor_small_backend: "inline", "thread" or "process" for calls
+            below executor_threshold rows
+        executor_large_backend: Backend for calls from the threshold up
+        executor_threshold: Rows from which the large backend is used
+        executor_max_workers: Pool size; None uses the CPU count
+        executor_max_pending: Calls a pool accepts before rejecting (503)
+        http_etag: Add ETags and answer If-None-Match on engine routes
+        http_cache_control: Cache-Control sent with those responses
+        stream_chunk_rows: Rows per engine call on the streaming endpoint
+        metrics: Record request metrics and serve them at /metrics
+        profiling_token: Admin token that enables X-Profile requests
+        profiling_sample_rate: Fraction of requests profiled at random
+        profiling_mode: "cprofile" (.pstats) or "sampling" (.collapsed)
+        profiling_interval: Seconds between stack samples
+        profiling_dir: Directory for profile artifacts
+        profiles_db: SQLite file for user profiles; None disables them
+        profiles_batch_size: Buffered profile rows that trigger a write
+        profiles_flush_interval: Seconds a profile row may wait to be written
+        profiles_max_pending: Buffered rows beyond which new ones are dropped
+        history_dir: Check-in history store directory; None disables history
+        history_segment_days: Days per history segment
+        history_batch_size: Buffered check-ins that trigger an append
+        history_flush_interval: Seconds a check-in may wait to be appended
+    """
+    readiness_defuzzification: str = "grid"
+    readiness_lut: bool = False
+    readiness_lut_step: float = 0.5
+    readiness_lut_dir: str | None = None
+    readiness_lut_error_samples: int = 20_000
+    cache_engines: tuple = ENGINES
+    cache_maxsize: int = 4096
+    cache_ttl: Optional[float] = None
+    cache_quantize: dict = field(default_factory=dict)
+    executor_small_backend: str = "inline"
+    executor_large_backend: str = "thread"
+    executor_threshold: int = 1000
+    executor_max_workers: Optional[int] = None
+    executor_max_pending: int = 32
+    http_etag: bool = True
+    http_cache_control: str = "private, no-cache"
+    stream_chunk_rows: int = 10_000
+    metrics: bool = True
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_mode: str = "cprofile"
+    profiling_interval: float = 0.001
+    profiling_dir: str = "profiles"
+    profiles_db: Optional[str] = "profiles.db"
+    profiles_batch_size: int = 256
+    profiles_flush_interval: float = 0.05
+    profiles_max_pending: int = 100_000
+    history_dir: Optional[str] = "history"
+    history_segment_days: int = 32
+    history_batch_size: int = 1024
+    history_flush_interval: float = 1.0
+    
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from FUZZY_* environment variables."""
+        return cls(
+            readiness_defuzzification=os.environ.get(
+                "FUZZY_READINESS_DEFUZZIFICATION", cls.readiness_defuzzification
+            ),
+            readiness_lut=_env_bool("FUZZY_READINESS_LUT", cls.readiness_lut),
+            readiness_lut_step=_env_float("FUZZY_READINESS_LUT_STEP", cls.readiness_lut_step),
+            readiness_lut_dir=os.environ.get("FUZZY_READINESS_LUT_DIR") or None,
+            readiness_lut_error_samples=_env_int(
+                "FUZZY_READINESS_LUT_ERROR_SAMPLES", cls.readiness_lut_error_samples
+            ),
+            cache_engines=_env_list("FUZZY_CACHE_ENGINES", cls.cache_engines),
+            cache_maxsize=_env_int("FUZZY_CACHE_MAXSIZE", cls.cache_maxsize),
+            cache_ttl=_env_optional_float("FUZZY_CACHE_TTL", cls.cache_ttl),
+            cache_quantize=_env_quantize("FUZZY_CACHE_QUANTIZE"),
+            executor_small_backend=os.environ.get(
+                "FUZZY_EXECUTOR_SMALL_BACKEND", cls.executor_small_backend
+            ),
+            executor_large_backend=os.environ.get(
+                "FUZZY_EXECUTOR_LARGE_BACKEND", cls.executor_large_backend
+            ),
+            executor_threshold=_env_int("FUZZY_EXECUTOR_THRESHOLD", cls.executor_threshold),
+            executor_max_workers=_env_int("FUZZY_EXECUTOR_MAX_WORKERS", 0) or None,
+            executor_max_pending=_env_int("FUZZY_EXECUTOR_MAX_PENDING", cls.executor_max_pending),
+            http_etag=_env_bool("FUZZY_HTTP_ETAG", cls.http_etag),
+            http_cache_control=os.environ.get("FUZZY_HTTP_CACHE_CONTROL", cls.http_cache_control),
+            stream_chunk_rows=_env_int("FUZZY_STREAM_CHUNK_ROWS", cls.stream_chunk_rows),
+            metrics=_env_bool("FUZZY_METRICS", cls.metrics),
+            profiling_token=os.environ.get("FUZZY_PROFILING_TOKEN") or None,
+            profiling_sample_rate=_env_float("FUZZY_PROFILING_SAMPLE_RATE", cls.profiling_sample_rate),
+            profiling_mode=os.environ.get("FUZZY_PROFILING_MODE", cls.profiling_mode),
+            profiling_interval=_env_float("FUZZY_PROFILING_INTERVAL", cls.profiling_interval),
+            profiling_dir=os.environ.get("FUZZY_PROFILING_DIR", cls.profiling_dir),
+            profiles_db=os.environ.get("FUZZY_PROFILES_DB", cls.profiles_db) or None,
+            profiles_batch_size=_env_int("FUZZY_PROFILES_BATCH_SIZE", cls.profiles_batch_size),
+            profiles_flush_interval=_env_float("FUZZY_PROFILES_FLUSH_INTERVAL", cls.profiles_flush_interval),
+            profiles_max_pending=_env_int("FUZZY_PROFILES_MAX_PENDING", cls.profiles_max_pending),
+            history_dir=os.environ.get("FUZZY_HISTORY_DIR", cls.history_dir) or None,
+            history_segment_days=_env_int("FUZZY_HISTORY_SEGMENT_DAYS", cls.history_segment_days),
+            history_batch_size=_env_int("FUZZY_HISTORY_BATCH_SIZE", cls.history_batch_size),
+            history_flush_interval=_env_float("FUZZY_HISTORY_FLUSH_INTERVAL", cls.history_flush_interval),
+        )
+
+
+settings = Settings.from_env()
@@ -0,0 +1,163 @@
+"""Execution backends that keep engine work off the asyncio event loop."""
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from app.metrics import stage
+from app.profiling import profiling
+
+
+BACKENDS = ("inline", "thread", "process")
+
+# Recent call latencies kept per backend for percentiles
+LATENCY_WINDOW = 1024
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a pooled backend already has max_pending calls queued."""
+
+
+class EngineExecutor:
+    """
+    Route engine calls to an inline, thread pool or process pool backend.
+    
+    Calls whose size (rows) is below threshold go to small_backend, the
+    rest to large_backend. Inline calls run directly on the event loop,
+    which is cheapest for single check-ins; pooled calls are awaited so the
+    loop keeps serving other requests. Each pool accepts at most
+    max_pending outstanding calls and rejects further ones with
+    ExecutorBusyError instead of queueing without bound.
+    
+    Functions sent to the process backend and their arguments must be
+    picklable (module-level functions, plain data or pydantic models).
+    
+    Args:
+        small_backend: Backend for calls below threshold
+        large_backend: Backend for calls at or above threshold
+        threshold: Size (rows) from which large_backend is used
+        max_workers: Pool size; None uses the CPU count
+        max_pending: Maximum queued plus running calls per pool
+    """
+    
+    def __init__(
+        self,
+        small_backend: str = "inline",
+        large_backend: str = "thread",
+        threshold: int = 1000,
+        max_workers: Optional[int] = None,
+        max_pending: int = 32,
+    ):
+        for backend in (small_backend, large_backend):
+            if backend not in BACKENDS:
+                raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        self.small_backend = small_backend
+        self.large_backend = large_backend
+        self.threshold = threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._pools: dict[str, Executor] = {}
+        self._pending = {backend: 0 for backend in BACKENDS}
+        self._calls = {backend: 0 for backend in BACKENDS}
+        self._rejected = {backend: 0 for backend in BACKENDS}
+        self._latencies = {backend: deque(maxlen=LATENCY_WINDOW) for backend in BACKENDS}
+    
+    def backend_for(self, size: int) -> str:
+        """Backend a call of the given size is routed to."""
+        return self.small_backend if size < self.threshold else self.large_backend
+    
+    def _pool(self, backend: str) -> Executor:
+        """Create pools lazily so unused backends cost nothing."""
+        pool = self._pools.get(backend)
+        if pool is None:
+            if backend == "thread":
+                pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="engine")
+            else:
+                pool = ProcessPoolExecutor(self.max_workers)
+            self._pools[backend] = pool
+        return pool
+    
+    async def run(self, fn: Callable, *args, size: int = 1, backend: Optional[str] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the backend chosen for size.
+        
+        Requests being profiled always run inline, on the profiled thread.
+        
+        Args:
+            fn: Engine or pipeline function
+            size: Number of rows the call processes
+            backend: Force a backend instead of choosing by size
+        
+        Returns:
+            The function's return value
+        
+        Raises:
+            ExecutorBusyError: The chosen pool already has max_pending calls
+        """
+        backend = "inline" if profiling.get() else backend or self.backend_for(size)
+        start = time.perf_counter()
+        if backend == "inline":
+            result = fn(*args, **kwargs)
+        else:
+            if self._pending[backend] >= self.max_pending:
+                self._rejected[backend] += 1
+                raise ExecutorBusyError(f"{backend} backend has {self.max_pending} pending calls")
+            self._pending[backend] += 1
+            try:
+                loop = asyncio.get_running_loop()
+                call = partial(fn, *args, **kwargs)
+                if backend == "thread":
+                    # Run in a copy of the request's context so stage timings land
+                    call = partial(contextvars.copy_context().run, call)
+                    result = await loop.run_in_executor(self._pool(backend), call)
+                else:
+                    # Worker processes cannot report stages; time the whole call
+                    with stage("engine"):
+                        result = await loop.run_in_executor(self._pool(backend), call)
+            finally:
+                self._pending[backend] -= 1
+        self._calls[backend] += 1
+        self._latencies[backend].append(time.perf_counter() - start)
+        return result
+    
+    def stats(self) -> dict:
+        """Per-backend call counts, queue depth and latency percentiles (ms)."""
+        stats = {
+            "small_backend": self.small_backend,
+            "large_backend": self.large_backend,
+            "threshold": self.threshold,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "backends": {},
+        }
+        for backend in BACKENDS:
+            latencies = np.array(self._latencies[backend]) * 1000
+            if len(latencies):
+                p50, p99 = np.percentile(latencies, [50, 99])
+                latency = {
+                    "mean_ms": round(float(latencies.mean()), 3),
+                    "p50_ms": round(float(p50), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(float(latencies.max()), 3),
+                }
+            else:
+                latency = {"mean_ms": None, "p50_ms": None, "p99_ms": None, "max_ms": None}
+            stats["backends"][backend] = {
+                "calls": self._calls[backend],
+                "rejected": self._rejected[backend],
+                "pending": self._pending[backend],
+                **latency,
+            }
+        return stats
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down any pools that were started."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
@@ -1,7 +1,68 @@
 """Fuzzy logic body composition estimator."""
 import numpy as np
 
-from app.fuzzy_engine.utils import trimf
+from app.fuzzy_engine.utils import encode_categories, round_decimals, trimf_matrix
+
+
+# BMI membership functions
+BMI_MF = {
+    "underweight": [10, 10, 18.5],
+    "normal": [17, 22, 27],
+    "overweight": [25, 28, 32],
+    "obese": [30, 40, 50],
+}
+_BMI_PARAMS = np.array(list(BMI_MF.values()), dtype=float)
+_BMI_CATEGORIES = np.array(list(BMI_MF))
+
+# Activity level multiplier
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 0.0,
+    "light": 0.25,
+    "moderate": 0.5,
+    "active": 0.75,
+    "very_active": 1.0,
+}
+ACTIVITY_LEVELS = tuple(ACTIVITY_MULTIPLIERS)
+
+# Build type adjustments
+BUILD_ADJUSTMENTS = {
+    "ectomorph": {"bf_adj": -3, "muscle": "lean"},
+    "mesomorph": {"bf_adj": 0, "muscle": "athletic"},
+    "endomorph": {"bf_adj": 3, "muscle": "powerful"},
+}
+DEFAULT_BUILD_ADJUSTMENT = {"bf_adj": 0, "muscle": "average"}
+BUILD_TYPES = tuple(BUILD_ADJUSTMENTS)
+
+# Muscle score contribution of each build type
+BUILD_MUSCLE_SCORES = {
+    "ectomorph": 0.2,
+    "mesomorph": 0.4,
+    "endomorph": 0.3,
+}
+
+MUSCLE_MASS_CATEGORIES = ("Below Average", "Average", "Above Average", "Athletic")
+MUSCLE_SCORE_THRESHOLDS = (0.3, 0.5, 0.7)
+
+# Lookup arrays indexed by encode_categories codes; the last entry is the
+# default used for unknown values
+_ACTIVITY_FACTORS = np.array([*ACTIVITY_MULTIPLIERS.values(), 0.5])
+_BUILD_BF_ADJ = np.array([*(adj["bf_adj"] for adj in BUILD_ADJUSTMENTS.values()), DEFAULT_BUILD_ADJUSTMENT["bf_adj"]])
+_BUILD_MUSCLE_SCORES = np.array([*(BUILD_MUSCLE_SCORES[build] for build in BUILD_TYPES), 0.3])
+
+
+def _interpret_bmi(memberships: dict) -> str:
+    """Create the fuzzy BMI interpretation string from BMI memberships."""
+    max_membership = max(memberships, key=memberships.get)
+    
+    significant_memberships = [(k, v) for k, v in memberships.items() if v > 0.1]
+    if len(significant_memberships) > 1:
+        sorted_memberships = sorted(significant_memberships, key=lambda x: x[1], reverse=True)
+        bmi_interpretation = f"{int(sorted_memberships[0][1] * 100)}% {sorted_memberships[0][0]}"
+        for k, v in sorted_memberships[1:]:
+            bmi_interpretation += f", {int(v * 100)}% {k}"
+    else:
+        bmi_interpretation = max_membership
+    return bmi_interpretation
 
 
 def estimate_body_composition(
@@ -32,56 +93,17 @@ def estimate_body_composition(
     waist_height_ratio = waist / height
     
     # Activity level multiplier
-    activity_multipliers = {
-        "sedentary": 0.0,
-        "light": 0.25,
-        "moderate": 0.5,
-        "active": 0.75,
-        "very_active": 1.0,
-    }
-    activity_factor = activity_multipliers.get(activity_level, 0.5)
+    activity_factor = ACTIVITY_MULTIPLIERS.get(activity_level, 0.5)
     
     # Build type adjustments
-    build_adjustments = {
-        "ectomorph": {"bf_adj": -3, "muscle": "lean"},
-        "mesomorph": {"bf_adj": 0, "muscle": "athletic"},
-        "endomorph": {"bf_adj": 3, "muscle": "powerful"},
-    }
-    build_adj = build_adjustments.get(build_type, {"bf_adj": 0, "muscle": "average"})
-    
-    # BMI membership functions
-    underweight_params = [10, 10, 18.5]
-    normal_params = [17, 22, 27]
-    overweight_params = [25, 28, 32]
-    obese_params = [30, 40, 50]
+    build_adj = BUILD_ADJUSTMENTS.get(build_type, DEFAULT_BUILD_ADJUSTMENT)
     
     # Clamp BMI for membership calculation
     clamped_bmi = min(max(bmi, 10), 49.9)
     
-    # Calculate memberships
-    underweight_deg = float(trimf(clamped_bmi, underweight_params))
-    normal_deg = float(trimf(clamped_bmi, normal_params))
-    overweight_deg = float(trimf(clamped_bmi, overweight_params))
-    obese_deg = float(trimf(clamped_bmi, obese_params))
-    
-    # Fuzzy BMI interpretation
-    memberships = {
-        "underweight": underweight_deg,
-        "normal": normal_deg,
-        "overweight": overweight_deg,
-        "obese": obese_deg,
-    }
-    max_membership = max(memberships, key=memberships.get)
-    
-    # Create fuzzy interpretation string
-    significant_memberships = [(k, v) for k, v in memberships.items() if v > 0.1]
-    if len(significant_memberships) > 1:
-        sorted_memberships = sorted(significant_memberships, key=lambda x: x[1], reverse=True)
-        bmi_interpretation = f"{int(sorted_memberships[0][1] * 100)}% {sorted_memberships[0][0]}"
-        for k, v in sorted_memberships[1:]:
-            bmi_interpretation += f", {int(v * 100)}% {k}"
-    else:
-        bmi_interpretation = max_membership
+    # Calculate memberships for the fuzzy BMI interpretation
+    memberships = dict(zip(BMI_MF, trimf_matrix(clamped_bmi, _BMI_PARAMS).tolist()))
+    bmi_interpretation = _interpret_bmi(memberships)
     
     # Estimate body fat using Navy method approximation with fuzzy adjustments
     # Base body fat estimate using waist-to-height ratio
@@ -104,11 +126,7 @@ def estimate_body_composition(
     bf_high = min(50, bf_mid + uncertainty)
     
     # Muscle mass category based on build type and activity
-    muscle_score = activity_factor * 0.6 + {
-        "ectomorph": 0.2,
-        "mesomorph": 0.4,
-        "endomorph": 0.3,
-    }.get(build_type, 0.3)
+    muscle_score = activity_factor * 0.6 + BUILD_MUSCLE_SCORES.get(build_type, 0.3)
     
     if muscle_score < 0.3:
         muscle_mass_category = "Below Average"
@@ -127,3 +145,77 @@ def estimate_body_composition(
         "bmi": round(bmi, 1),
         "bmi_interpretation": bmi_interpretation,
     }
+
+
+def estimate_body_composition_batch(
+    weight,
+    height,
+    waist,
+    activity_level,
+    build_type,
+) -> dict:
+    """
+    Estimate body composition for many people at once.
+    
+    Vectorized counterpart of estimate_body_composition. Interpretation
+    strings are only formatted for rows with more than one significant
+    BMI membership; the rest reuse the category name.
+    
+    Args:
+        weight: Weights in kg, shape (N,)
+        height: Heights in cm, shape (N,)
+        waist: Waist circumferences in cm, shape (N,)
+        activity_level: Activity level strings, shape (N,)
+        build_type: Build type strings, shape (N,)
+    
+    Returns:
+        Dictionary of per-row arrays with the same keys as
+        estimate_body_composition
+    """
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    waist = np.asarray(waist, dtype=float)
+    activity_factor = _ACTIVITY_FACTORS[encode_categories(activity_level, ACTIVITY_LEVELS)]
+    build = encode_categories(build_type, BUILD_TYPES)
+    
+    # BMI and waist-to-height ratio
+    height_m = height / 100
+    bmi = weight / (height_m ** 2)
+    waist_height_ratio = waist / height
+    
+    # BMI memberships and interpretation
+    memberships = trimf_matrix(np.clip(bmi, 10, 49.9), _BMI_PARAMS)
+    bmi_interpretation = _BMI_CATEGORIES[memberships.argmax(axis=1)].astype(object)
+    mixed = np.flatnonzero((memberships > 0.1).sum(axis=1) > 1)
+    for row, values in zip(mixed.tolist(), memberships[mixed].tolist()):
+        bmi_interpretation[row] = _interpret_bmi(dict(zip(BMI_MF, values)))
+    
+    # Piecewise body fat curve from waist-to-height ratio
+    base_bf = np.select(
+        [waist_height_ratio < 0.4, waist_height_ratio < 0.5, waist_height_ratio < 0.6],
+        [
+            8 + waist_height_ratio * 30,
+            12 + (waist_height_ratio - 0.4) * 80,
+            20 + (waist_height_ratio - 0.5) * 100,
+        ],
+        30 + (waist_height_ratio - 0.6) * 50,
+    )
+    
+    # Apply adjustments and create fuzzy range
+    bf_mid = np.clip(base_bf + _BUILD_BF_ADJ[build] - (activity_factor * 5), 5, 50)
+    uncertainty = 3 + (1 - activity_factor) * 2
+    bf_low = np.maximum(5, bf_mid - uncertainty)
+    bf_high = np.minimum(50, bf_mid + uncertainty)
+    
+    # Muscle mass category based on build type and activity
+    muscle_score = activity_factor * 0.6 + _BUILD_MUSCLE_SCORES[build]
+    muscle_mass_category = np.array(MUSCLE_MASS_CATEGORIES)[np.digitize(muscle_score, MUSCLE_SCORE_THRESHOLDS)]
+    
+    return {
+        "body_fat_low": round_decimals(bf_low, 1),
+        "body_fat_mid": round_decimals(bf_mid, 1),
+        "body_fat_high": round_decimals(bf_high, 1),
+        "muscle_mass_category": muscle_mass_category,
+        "bmi": round_decimals(bmi, 1),
+        "bmi_interpretation": bmi_interpretation,
+    }
@@ -0,0 +1,153 @@
+"""Multi-day readiness forecasts from recent check-in series."""
+from typing import Optional
+
+import numpy as np
+
+from app.fuzzy_engine.lut import INPUT_RANGE
+from app.fuzzy_engine.readiness import INTENSITY_LABELS, LABEL_THRESHOLDS, evaluate_readiness
+from app.fuzzy_engine.utils import round_decimals
+
+
+READINESS_INPUTS = ("sleep", "energy", "soreness", "stress")
+
+# Rows per readiness evaluation; bounds the defuzzification grid's memory
+FORECAST_CHUNK_ROWS = 100_000
+
+
+def pad_series(series: list, window: int) -> np.ndarray:
+    """
+    Right-align the last window check-ins of every athlete.
+    
+    Args:
+        series: Per athlete, a (sleep, energy, soreness, stress) tuple of
+            equal-length sequences, oldest first
+        window: Number of most recent days kept
+    
+    Returns:
+        Array of shape (A, window, 4); days before an athlete's first
+        kept check-in are NaN
+    """
+    history = np.full((len(series), window, len(READINESS_INPUTS)), np.nan)
+    for row, columns in enumerate(series):
+        recent = np.column_stack(columns)[-window:]
+        history[row, window - len(recent):] = recent
+    return history
+
+
+def fit_input_trends(history: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Least-squares line through each athlete's series of each input.
+    
+    Args:
+        history: Shape (A, W, 4), NaN where there is no check-in; every
+            athlete needs at least one check-in
+    
+    Returns:
+        Tuple of (level, slope, sigma), each of shape (A, 4): the fitted
+        value on the last day, the change per day, and the residual
+        standard deviation (0 with fewer than three check-ins)
+    """
+    observed = ~np.isnan(history)
+    y = np.where(observed, history, 0.0)
+    t = np.arange(history.shape[1], dtype=float)[np.newaxis, :, np.newaxis]
+    n = observed.sum(axis=1)
+    t_mean = (observed * t).sum(axis=1) / n
+    y_mean = y.sum(axis=1) / n
+    dt = np.where(observed, t - t_mean[:, np.newaxis], 0.0)
+    sxx = (dt * dt).sum(axis=1)
+    sxy = (dt * (y - y_mean[:, np.newaxis])).sum(axis=1)
+    slope = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+    level = y_mean + slope * (history.shape[1] - 1 - t_mean)
+    residuals = np.where(observed, y - y_mean[:, np.newaxis] - slope[:, np.newaxis] * dt, 0.0)
+    sigma = np.sqrt((residuals * residuals).sum(axis=1) / np.maximum(n - 2, 1)) * (n > 2)
+    return level, slope, sigma
+
+
+def _evaluate(inputs: np.ndarray, defuzzification: str = "grid", lut=None) -> tuple[np.ndarray, np.ndarray]:
+    """Unrounded intensity and confidence of (M, 4) inputs, in chunks."""
+    intensity = np.empty(len(inputs))
+    confidence = np.empty(len(inputs))
+    for start in range(0, len(inputs), FORECAST_CHUNK_ROWS):
+        chunk = slice(start, start + FORECAST_CHUNK_ROWS)
+        if lut is None:
+            evaluation = evaluate_readiness(inputs[chunk], defuzzification=defuzzification)
+            intensity[chunk], confidence[chunk] = evaluation["intensity"], evaluation["confidence"]
+        else:
+            intensity[chunk], confidence[chunk] = lut.lookup(inputs[chunk])
+    return intensity, confidence
+
+
+def forecast_readiness(
+    history: np.ndarray,
+    days: int = 7,
+    scenarios: int = 0,
+    damping: float = 1.0,
+    seed: Optional[int] = None,
+    defuzzification: str = "grid",
+    lut=None,
+) -> dict:
+    """
+    Project every athlete's readiness over the next days.
+    
+    Each input's fitted trend is extrapolated (the day-h step is damped
+    by damping ** h) and clipped to 0-10. With scenarios, every athlete
+    also gets that many random paths around the projection, whose inputs
+    drift by the fit's residual noise each day. All projected and
+    scenario days of all athletes go through the readiness system
+    together.
+    
+    Args:
+        history: Recent check-ins, shape (A, W, 4) as built by pad_series
+        days: Forecast horizon in days
+        scenarios: Random paths per athlete; 0 for the projection only
+        damping: Trend damping factor in (0, 1]; 1 extrapolates linearly
+        seed: Seed of the scenario paths
+        defuzzification: "grid" or "analytic" centroid computation
+        lut: Optional ReadinessLUT used instead of full inference
+    
+    Returns:
+        Dictionary with "day" (1..days) and per-athlete, per-day arrays of
+        shape (A, days): the projected inputs, intensity, label and
+        confidence; with scenarios, also "scenarios" with intensity
+        percentiles p10/p50/p90 and per-label probabilities
+    """
+    n_athletes = len(history)
+    level, slope, sigma = fit_input_trends(history)
+    steps = np.cumsum(damping ** np.arange(1, days + 1))
+    projected = np.clip(
+        level[:, np.newaxis] + slope[:, np.newaxis] * steps[np.newaxis, :, np.newaxis],
+        *INPUT_RANGE,
+    )
+    
+    inputs = projected.reshape(-1, len(READINESS_INPUTS))
+    if scenarios:
+        rng = np.random.default_rng(seed)
+        drift = rng.standard_normal((n_athletes, scenarios, days, len(READINESS_INPUTS)))
+        drift *= sigma[:, np.newaxis, np.newaxis]
+        paths = np.clip(projected[:, np.newaxis] + np.cumsum(drift, axis=2), *INPUT_RANGE)
+        inputs = np.concatenate([inputs, paths.reshape(-1, len(READINESS_INPUTS))])
+    intensity, confidence = _evaluate(inputs, defuzzification, lut)
+    
+    size = n_athletes * days
+    labels = np.array(INTENSITY_LABELS)
+    result = {
+        "day": np.arange(1, days + 1),
+        **{name: round_decimals(projected[..., k], 2) for k, name in enumerate(READINESS_INPUTS)},
+        "intensity": round_decimals(intensity[:size], 1).reshape(n_athletes, days),
+        "label": labels[np.digitize(intensity[:size], LABEL_THRESHOLDS)].reshape(n_athletes, days),
+        "confidence": round_decimals(confidence[:size], 2).reshape(n_athletes, days),
+    }
+    if scenarios:
+        scenario_intensity = intensity[size:].reshape(n_athletes, scenarios, days)
+        p10, p50, p90 = np.percentile(scenario_intensity, [10, 50, 90], axis=1)
+        codes = np.digitize(scenario_intensity, LABEL_THRESHOLDS)
+        result["scenarios"] = {
+            "intensity_p10": round_decimals(p10, 1),
+            "intensity_p50": round_decimals(p50, 1),
+            "intensity_p90": round_decimals(p90, 1),
+            "label_probability": {
+                label: round_decimals((codes == code).mean(axis=1), 3)
+                for code, label in enumerate(labels.tolist())
+            },
+        }
+    return result
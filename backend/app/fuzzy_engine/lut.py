@@ -0,0 +1,164 @@
+"""Precomputed readiness lookup table with multilinear interpolation."""
+import hashlib
+import os
+
+import numpy as np
+
+from app.fuzzy_engine.readiness import (
+    INPUT_MF,
+    INTENSITY_MF,
+    READINESS_RULES,
+    evaluate_readiness,
+)
+from app.fuzzy_engine.system import DEFAULT_RESOLUTION
+
+
+# Every readiness input is rated on the same 0-10 scale
+INPUT_RANGE = (0.0, 10.0)
+
+# Grid points evaluated per engine call while building the table
+BUILD_CHUNK_ROWS = 50_000
+
+
+def _fingerprint(step: float, resolution: int, defuzzification: str) -> str:
+    """Short hash of everything a cached table depends on."""
+    source = repr((INPUT_MF, INTENSITY_MF, READINESS_RULES, step, resolution, defuzzification))
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+
+class ReadinessLUT:
+    """
+    Readiness intensity and confidence precomputed on a regular 4-D grid.
+    
+    Inputs that fall on the grid are answered by a direct index; anything
+    else is interpolated multilinearly from the 16 surrounding grid points.
+    The largest interpolation error against the exact engine, measured on
+    random off-grid points, is kept in max_error.
+    
+    Args:
+        step: Grid spacing on each input; must divide the 0-10 range
+        resolution: Output universe resolution used by the exact engine
+        defuzzification: "grid" or "analytic" centroid computation
+        cache_dir: Directory to load the table from or save it to
+        error_samples: Number of random points used to measure max_error
+    """
+    
+    def __init__(
+        self,
+        step: float = 0.5,
+        resolution: int = DEFAULT_RESOLUTION,
+        defuzzification: str = "grid",
+        cache_dir: str | None = None,
+        error_samples: int = 20_000,
+    ):
+        low, high = INPUT_RANGE
+        intervals = round((high - low) / step)
+        if step <= 0 or abs(intervals * step - (high - low)) > 1e-9:
+            raise ValueError(f"step must evenly divide {low:g}-{high:g}, got {step!r}")
+        self.step = step
+        self.resolution = resolution
+        self.defuzzification = defuzzification
+        self.points = intervals + 1
+        self.axis = np.linspace(low, high, self.points)
+        dims = len(INPUT_MF)
+        self._strides = self.points ** np.arange(dims - 1, -1, -1)
+        # Corner offsets of a grid cell, one row per corner, one column per input
+        self._corners = (np.arange(2 ** dims)[:, np.newaxis] >> np.arange(dims - 1, -1, -1)) & 1
+        
+        self.cache_path = None
+        if cache_dir is not None:
+            name = f"readiness_lut_{_fingerprint(step, resolution, defuzzification)}.npy"
+            self.cache_path = os.path.join(cache_dir, name)
+        self.table = self._load() if self.cache_path and os.path.exists(self.cache_path) else None
+        if self.table is None:
+            self.table = self._build()
+            if self.cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                # Saved under a temporary name so other workers never load a partial file
+                tmp_path = f"{self.cache_path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, self.table)
+                os.replace(tmp_path, self.cache_path)
+        self.table.flags.writeable = False
+        self.max_error = self._measure_error(error_samples)
+    
+    def _load(self) -> np.ndarray | None:
+        """Load a cached table, ignoring unreadable files and files of the wrong shape."""
+        try:
+            table = np.load(self.cache_path)
+        except (OSError, ValueError):
+            return None
+        if table.shape != (self.points ** len(INPUT_MF), 2):
+            return None
+        return table
+    
+    def _build(self) -> np.ndarray:
+        """Evaluate the exact engine on every grid point, in chunks."""
+        dims = len(INPUT_MF)
+        total = self.points ** dims
+        table = np.empty((total, 2))
+        for start in range(0, total, BUILD_CHUNK_ROWS):
+            flat = np.arange(start, min(start + BUILD_CHUNK_ROWS, total))
+            indices = (flat[:, np.newaxis] // self._strides) % self.points
+            evaluation = evaluate_readiness(self.axis[indices], self.resolution, self.defuzzification)
+            table[flat, 0] = evaluation["intensity"]
+            table[flat, 1] = evaluation["confidence"]
+        return table
+    
+    def _measure_error(self, samples: int) -> dict:
+        """Largest absolute interpolation error on seeded random inputs."""
+        if samples <= 0:
+            return {"intensity": 0.0, "confidence": 0.0}
+        rng = np.random.default_rng(0)
+        inputs = rng.uniform(*INPUT_RANGE, size=(samples, len(INPUT_MF)))
+        exact = evaluate_readiness(inputs, self.resolution, self.defuzzification)
+        intensity, confidence = self.lookup(inputs)
+        return {
+            "intensity": float(np.abs(intensity - exact["intensity"]).max()),
+            "confidence": float(np.abs(confidence - exact["confidence"]).max()),
+        }
+    
+    def lookup(self, inputs) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Look up unrounded intensity and confidence.
+        
+        Args:
+            inputs: Shape (N, 4) array of sleep, energy, soreness and stress;
+                values outside 0-10 are clamped
+        
+        Returns:
+            Tuple of (intensity, confidence) arrays of shape (N,)
+        """
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=float))
+        position = (np.clip(inputs, *INPUT_RANGE) - INPUT_RANGE[0]) / self.step
+        nearest = np.rint(position)
+        on_grid = (position == nearest).all(axis=1)
+        
+        values = np.empty((len(inputs), 2))
+        values[on_grid] = self.table[nearest[on_grid].astype(np.intp) @ self._strides]
+        
+        off_grid = ~on_grid
+        if off_grid.any():
+            position = position[off_grid]
+            base = np.minimum(np.floor(position), self.points - 2).astype(np.intp)
+            fraction = position - base
+            # Weight of each cell corner is the product over inputs of
+            # fraction (upper neighbour) or 1 - fraction (lower neighbour)
+            weights = np.where(
+                self._corners[np.newaxis],
+                fraction[:, np.newaxis],
+                1 - fraction[:, np.newaxis],
+            ).prod(axis=2)
+            flat = (base[:, np.newaxis] + self._corners[np.newaxis]) @ self._strides
+            values[off_grid] = np.einsum("nc,nck->nk", weights, self.table[flat])
+        return values[:, 0], values[:, 1]
+    
+    def info(self) -> dict:
+        """Describe the table and its measured interpolation error."""
+        return {
+            "step": self.step,
+            "points_per_input": self.points,
+            "grid_points": len(self.table),
+            "resolution": self.resolution,
+            "defuzzification": self.defuzzification,
+            "max_error": self.max_error,
+        }
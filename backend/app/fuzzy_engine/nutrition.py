@@ -1,7 +1,65 @@
 """Fuzzy logic macro calculator."""
 import numpy as np
 
-from app.fuzzy_engine.utils import trimf
+from app.fuzzy_engine.utils import encode_categories, trimf_matrix
+
+
+# Metabolism membership functions (slow, normal, fast)
+_METABOLISM_PARAMS = np.array([
+    [0, 0, 4],
+    [2, 5, 8],
+    [6, 10, 10],
+], dtype=float)
+
+# Activity level multipliers for TDEE calculation
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9,
+}
+ACTIVITY_LEVELS = tuple(ACTIVITY_MULTIPLIERS)
+
+# Goal adjustments
+GOAL_ADJUSTMENTS = {
+    "cut": {"cal_mult": 0.8, "protein_mult": 1.2, "fat_mult": 0.8},
+    "maintain": {"cal_mult": 1.0, "protein_mult": 1.0, "fat_mult": 1.0},
+    "bulk": {"cal_mult": 1.15, "protein_mult": 1.1, "fat_mult": 1.1},
+}
+GOALS = tuple(GOAL_ADJUSTMENTS)
+
+# Position of each metabolism type on the slow-normal-fast universe
+METABOLISM_VALUES = {"slow": 2, "normal": 5, "fast": 8}
+METABOLISM_TYPES = tuple(METABOLISM_VALUES)
+
+
+def _metabolism_multiplier(metabolism_value: float) -> float:
+    """Defuzzify the slow/normal/fast memberships into a TDEE multiplier."""
+    slow_deg, normal_deg, fast_deg = trimf_matrix(metabolism_value, _METABOLISM_PARAMS).tolist()
+    
+    # Apply fuzzy metabolism adjustment
+    metabolism_mult = 0.9 * slow_deg + 1.0 * normal_deg + 1.1 * fast_deg
+    # Use epsilon for floating-point comparison to avoid precision issues
+    if abs(metabolism_mult) < 1e-9:
+        metabolism_mult = 1.0
+    return metabolism_mult
+
+
+# Metabolism inputs are categorical, so the fuzzy multipliers are fixed
+METABOLISM_MULTIPLIERS = {
+    metabolism: _metabolism_multiplier(value) for metabolism, value in METABOLISM_VALUES.items()
+}
+DEFAULT_METABOLISM_MULTIPLIER = _metabolism_multiplier(5)
+
+# Lookup arrays indexed by encode_categories codes; the last entry is the
+# default used for unknown values
+_ACTIVITY_MULTS = np.array([*ACTIVITY_MULTIPLIERS.values(), 1.55])
+_METABOLISM_MULTS = np.array([*METABOLISM_MULTIPLIERS.values(), DEFAULT_METABOLISM_MULTIPLIER])
+_GOAL_MULTS = np.array([
+    [adj["cal_mult"], adj["protein_mult"], adj["fat_mult"]]
+    for adj in [*GOAL_ADJUSTMENTS.values(), GOAL_ADJUSTMENTS["maintain"]]
+])
 
 
 def calculate_nutrition(
@@ -25,46 +83,20 @@ def calculate_nutrition(
         Dictionary with calorie and macro ranges
     """
     # Activity level multipliers for TDEE calculation
-    activity_multipliers = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very_active": 1.9,
-    }
-    activity_mult = activity_multipliers.get(activity_level, 1.55)
+    activity_mult = ACTIVITY_MULTIPLIERS.get(activity_level, 1.55)
     
     # Base metabolic rate estimate (simplified Mifflin-St Jeor)
     # Assuming average height and age for simplicity
     base_bmr = weight * 22  # Simplified approximation
     
     # Metabolism adjustment using fuzzy logic
-    slow_params = [0, 0, 4]
-    normal_params = [2, 5, 8]
-    fast_params = [6, 10, 10]
-    
-    metabolism_value = {"slow": 2, "normal": 5, "fast": 8}.get(metabolism, 5)
-    
-    slow_deg = float(trimf(metabolism_value, slow_params))
-    normal_deg = float(trimf(metabolism_value, normal_params))
-    fast_deg = float(trimf(metabolism_value, fast_params))
-    
-    # Apply fuzzy metabolism adjustment
-    metabolism_mult = 0.9 * slow_deg + 1.0 * normal_deg + 1.1 * fast_deg
-    # Use epsilon for floating-point comparison to avoid precision issues
-    if abs(metabolism_mult) < 1e-9:
-        metabolism_mult = 1.0
+    metabolism_mult = METABOLISM_MULTIPLIERS.get(metabolism, DEFAULT_METABOLISM_MULTIPLIER)
     
     # Calculate TDEE
     tdee = base_bmr * activity_mult * metabolism_mult
     
     # Goal adjustments
-    goal_adjustments = {
-        "cut": {"cal_mult": 0.8, "protein_mult": 1.2, "fat_mult": 0.8},
-        "maintain": {"cal_mult": 1.0, "protein_mult": 1.0, "fat_mult": 1.0},
-        "bulk": {"cal_mult": 1.15, "protein_mult": 1.1, "fat_mult": 1.1},
-    }
-    goal_adj = goal_adjustments.get(goal, goal_adjustments["maintain"])
+    goal_adj = GOAL_ADJUSTMENTS.get(goal, GOAL_ADJUSTMENTS["maintain"])
     
     # Calculate target calories
     target_calories = tdee * goal_adj["cal_mult"]
@@ -116,3 +148,81 @@ def calculate_nutrition(
         "fat_mid": round(base_fat),
         "fat_high": round(fat_high),
     }
+
+
+def calculate_nutrition_batch(
+    weight,
+    goal,
+    activity_level,
+    metabolism,
+    adherence,
+) -> dict:
+    """
+    Calculate macro targets for many users at once.
+    
+    Vectorized counterpart of calculate_nutrition: categorical inputs are
+    encoded as integer codes into precomputed multiplier tables and all
+    twelve bounds are computed with array arithmetic, in the same order of
+    operations so the results match the scalar function exactly.
+    
+    Args:
+        weight: Weights in kg, shape (N,)
+        goal: Goal strings (cut, maintain, bulk), shape (N,)
+        activity_level: Activity level strings, shape (N,)
+        metabolism: Metabolism strings (slow, normal, fast), shape (N,)
+        adherence: Diet adherence values (0-1), shape (N,)
+    
+    Returns:
+        Dictionary of per-row integer arrays with the same keys as
+        calculate_nutrition
+    """
+    weight = np.asarray(weight, dtype=float)
+    adherence = np.asarray(adherence, dtype=float)
+    activity_mult = _ACTIVITY_MULTS[encode_categories(activity_level, ACTIVITY_LEVELS)]
+    metabolism_mult = _METABOLISM_MULTS[encode_categories(metabolism, METABOLISM_TYPES)]
+    cal_mult, protein_mult, fat_mult = _GOAL_MULTS[encode_categories(goal, GOALS)].T
+    
+    # Calculate TDEE and target calories
+    base_bmr = weight * 22
+    tdee = base_bmr * activity_mult * metabolism_mult
+    target_calories = tdee * cal_mult
+    
+    # Adherence affects the range width - lower adherence = wider range
+    range_factor = 0.05 + (1 - adherence) * 0.1
+    
+    calories_low = target_calories * (1 - range_factor)
+    calories_high = target_calories * (1 + range_factor)
+    
+    base_protein = weight * 2.0 * protein_mult
+    protein_range = base_protein * range_factor * 0.5
+    protein_low = base_protein - protein_range
+    protein_high = base_protein + protein_range
+    
+    base_fat = weight * 0.85 * fat_mult
+    fat_range = base_fat * range_factor
+    fat_low = base_fat - fat_range
+    fat_high = base_fat + fat_range
+    
+    # Carbs fill remaining calories
+    remaining_calories = target_calories - base_fat * 9 - base_protein * 4
+    base_carbs = remaining_calories / 4
+    carbs_range = base_carbs * range_factor
+    carbs_low = np.maximum(50, base_carbs - carbs_range)  # Minimum 50g carbs
+    carbs_high = base_carbs + carbs_range
+    
+    values = {
+        "calories_low": calories_low,
+        "calories_mid": target_calories,
+        "calories_high": calories_high,
+        "protein_low": protein_low,
+        "protein_mid": base_protein,
+        "protein_high": protein_high,
+        "carbs_low": carbs_low,
+        "carbs_mid": base_carbs,
+        "carbs_high": carbs_high,
+        "fat_low": fat_low,
+        "fat_mid": base_fat,
+        "fat_high": fat_high,
+    }
+    # np.rint rounds half to even like the built-in round()
+    return {key: np.rint(value).astype(np.int64) for key, value in values.items()}
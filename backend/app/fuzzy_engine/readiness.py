@@ -1,169 +1,221 @@
 """Fuzzy logic workout readiness calculator."""
 import numpy as np
 
-from app.fuzzy_engine.utils import trimf
+from app.fuzzy_engine.system import DEFAULT_RESOLUTION, FuzzySystem
+from app.fuzzy_engine.utils import round_decimals
 
 
-def calculate_readiness(sleep: float, energy: float, soreness: float, stress: float) -> dict:
-    """
-    Calculate workout readiness using fuzzy logic.
-    
-    Args:
-        sleep: Sleep quality (0-10)
-        energy: Energy level (0-10)
-        soreness: Muscle soreness (0-10, higher = more sore)
-        stress: Stress level (0-10, higher = more stressed)
-    
-    Returns:
-        Dictionary with intensity recommendation and memberships
-    """
-    # Define membership function parameters
+# Input membership functions
+INPUT_MF = {
     # Sleep membership (higher = better)
-    sleep_mf = {
+    "sleep": {
         "poor": [0, 0, 4],
         "fair": [2, 5, 8],
         "good": [6, 10, 10],
-    }
-    
+    },
     # Energy membership (higher = better)
-    energy_mf = {
+    "energy": {
         "low": [0, 0, 4],
         "medium": [2, 5, 8],
         "high": [6, 10, 10],
-    }
-    
+    },
     # Soreness membership (higher = worse)
-    soreness_mf = {
+    "soreness": {
         "low": [0, 0, 4],
         "medium": [2, 5, 8],
         "high": [6, 10, 10],
-    }
-    
+    },
     # Stress membership (higher = worse)
-    stress_mf = {
+    "stress": {
         "low": [0, 0, 4],
         "medium": [2, 5, 8],
         "high": [6, 10, 10],
-    }
-    
-    # Output intensity membership functions
-    intensity_mf = {
-        "rest": [0, 0, 25],
-        "light": [10, 30, 50],
-        "moderate": [35, 50, 65],
-        "hard": [50, 70, 90],
-        "beast": [75, 100, 100],
-    }
-    
-    # Calculate memberships for each input
-    sleep_mem = {k: trimf(sleep, v) for k, v in sleep_mf.items()}
-    energy_mem = {k: trimf(energy, v) for k, v in energy_mf.items()}
-    soreness_mem = {k: trimf(soreness, v) for k, v in soreness_mf.items()}
-    stress_mem = {k: trimf(stress, v) for k, v in stress_mf.items()}
-    
-    # Fuzzy rules using min (AND) operator
-    # Each rule maps to an output category with a firing strength
-    rules = []
-    
+    },
+}
+
+# Output intensity membership functions
+INTENSITY_MF = {
+    "rest": [0, 0, 25],
+    "light": [10, 30, 50],
+    "moderate": [35, 50, 65],
+    "hard": [50, 70, 90],
+    "beast": [75, 100, 100],
+}
+INTENSITY_CATEGORIES = tuple(INTENSITY_MF)
+
+INTENSITY_LABELS = ("Rest", "Light", "Moderate", "Hard", "Beast")
+LABEL_THRESHOLDS = (20, 40, 60, 80)
+
+# Fuzzy rules: ({input: term}, output category), combined with min (AND).
+# Inputs missing from a rule are ignored for that rule.
+READINESS_RULES = [
     # Beast mode rules
-    rules.append((min(sleep_mem["good"], energy_mem["high"], 
-                     soreness_mem["low"], stress_mem["low"]), "beast"))
+    ({"sleep": "good", "energy": "high", "soreness": "low", "stress": "low"}, "beast"),
     
     # Hard workout rules
-    rules.append((min(sleep_mem["good"], energy_mem["high"], 
-                     soreness_mem["low"], stress_mem["medium"]), "hard"))
-    rules.append((min(sleep_mem["good"], energy_mem["high"], 
-                     soreness_mem["medium"], stress_mem["low"]), "hard"))
-    rules.append((min(sleep_mem["good"], energy_mem["medium"], 
-                     soreness_mem["low"], stress_mem["low"]), "hard"))
-    rules.append((min(energy_mem["high"], soreness_mem["low"]), "hard"))
+    ({"sleep": "good", "energy": "high", "soreness": "low", "stress": "medium"}, "hard"),
+    ({"sleep": "good", "energy": "high", "soreness": "medium", "stress": "low"}, "hard"),
+    ({"sleep": "good", "energy": "medium", "soreness": "low", "stress": "low"}, "hard"),
+    ({"energy": "high", "soreness": "low"}, "hard"),
     
     # Moderate workout rules
-    rules.append((min(sleep_mem["fair"], energy_mem["medium"], 
-                     soreness_mem["medium"], stress_mem["medium"]), "moderate"))
-    rules.append((min(sleep_mem["good"], energy_mem["medium"], 
-                     soreness_mem["medium"], stress_mem["medium"]), "moderate"))
-    rules.append((min(sleep_mem["fair"], energy_mem["high"], 
-                     soreness_mem["medium"], stress_mem["medium"]), "moderate"))
-    rules.append((min(sleep_mem["good"], energy_mem["medium"], 
-                     soreness_mem["low"]), "moderate"))
+    ({"sleep": "fair", "energy": "medium", "soreness": "medium", "stress": "medium"}, "moderate"),
+    ({"sleep": "good", "energy": "medium", "soreness": "medium", "stress": "medium"}, "moderate"),
+    ({"sleep": "fair", "energy": "high", "soreness": "medium", "stress": "medium"}, "moderate"),
+    ({"sleep": "good", "energy": "medium", "soreness": "low"}, "moderate"),
     
     # Light workout rules
-    rules.append((min(sleep_mem["fair"], energy_mem["low"], 
-                     soreness_mem["medium"], stress_mem["medium"]), "light"))
-    rules.append((min(sleep_mem["poor"], energy_mem["medium"], 
-                     soreness_mem["medium"], stress_mem["medium"]), "light"))
-    rules.append((min(sleep_mem["fair"], energy_mem["medium"], 
-                     soreness_mem["high"], stress_mem["medium"]), "light"))
-    rules.append((min(sleep_mem["good"], energy_mem["low"]), "light"))
-    rules.append((min(sleep_mem["fair"], soreness_mem["high"]), "light"))
+    ({"sleep": "fair", "energy": "low", "soreness": "medium", "stress": "medium"}, "light"),
+    ({"sleep": "poor", "energy": "medium", "soreness": "medium", "stress": "medium"}, "light"),
+    ({"sleep": "fair", "energy": "medium", "soreness": "high", "stress": "medium"}, "light"),
+    ({"sleep": "good", "energy": "low"}, "light"),
+    ({"sleep": "fair", "soreness": "high"}, "light"),
     
     # Rest rules
-    rules.append((min(sleep_mem["poor"], energy_mem["low"], 
-                     soreness_mem["high"], stress_mem["high"]), "rest"))
-    rules.append((min(sleep_mem["poor"], energy_mem["low"], 
-                     soreness_mem["medium"], stress_mem["high"]), "rest"))
-    rules.append((min(sleep_mem["poor"], energy_mem["low"], 
-                     soreness_mem["high"], stress_mem["medium"]), "rest"))
-    rules.append((min(sleep_mem["poor"], stress_mem["high"]), "rest"))
-    rules.append((min(soreness_mem["high"], stress_mem["high"]), "rest"))
-    
-    # Aggregate output using max for each category
-    output_strengths = {"rest": 0, "light": 0, "moderate": 0, "hard": 0, "beast": 0}
-    for strength, category in rules:
-        output_strengths[category] = max(output_strengths[category], strength)
-    
-    # Defuzzification using centroid method (simplified)
-    # Calculate centroid of combined output
-    intensity_range = np.arange(0, 101, 1)
-    aggregated = np.zeros_like(intensity_range, dtype=float)
-    
-    for category, strength in output_strengths.items():
-        if strength > 0:
-            params = intensity_mf[category]
-            for i, x in enumerate(intensity_range):
-                membership = trimf(x, params)
-                # Apply rule strength (min operation)
-                aggregated[i] = max(aggregated[i], min(membership, strength))
-    
-    # Centroid defuzzification
-    if np.sum(aggregated) > 0:
-        intensity = np.sum(intensity_range * aggregated) / np.sum(aggregated)
-    else:
-        # Fallback calculation if no rules fired
-        positive_factors = (sleep + energy) / 20
-        negative_factors = (soreness + stress) / 20
-        intensity = max(0, min(100, 50 + (positive_factors - negative_factors) * 50))
+    ({"sleep": "poor", "energy": "low", "soreness": "high", "stress": "high"}, "rest"),
+    ({"sleep": "poor", "energy": "low", "soreness": "medium", "stress": "high"}, "rest"),
+    ({"sleep": "poor", "energy": "low", "soreness": "high", "stress": "medium"}, "rest"),
+    ({"sleep": "poor", "stress": "high"}, "rest"),
+    ({"soreness": "high", "stress": "high"}, "rest"),
+]
+
+
+READINESS_SYSTEM = FuzzySystem(INPUT_MF, INTENSITY_MF, READINESS_RULES, output_range=(0, 100))
+
+# Build the default output universe once at import
+READINESS_SYSTEM.output_universe(DEFAULT_RESOLUTION)
+
+
+def calculate_readiness(
+    sleep: float,
+    energy: float,
+    soreness: float,
+    stress: float,
+    resolution: int = DEFAULT_RESOLUTION,
+    defuzzification: str = "grid",
+    lut=None,
+) -> dict:
+    """
+    Calculate workout readiness using fuzzy logic.
     
-    # Determine label based on intensity
-    if intensity < 20:
-        label = "Rest"
-    elif intensity < 40:
-        label = "Light"
-    elif intensity < 60:
-        label = "Moderate"
-    elif intensity < 80:
-        label = "Hard"
-    else:
-        label = "Beast"
-    
-    # Calculate input memberships for visualization
-    input_memberships = {
-        "sleep": {k: float(v) for k, v in sleep_mem.items()},
-        "energy": {k: float(v) for k, v in energy_mem.items()},
-        "soreness": {k: float(v) for k, v in soreness_mem.items()},
-        "stress": {k: float(v) for k, v in stress_mem.items()},
+    Args:
+        sleep: Sleep quality (0-10)
+        energy: Energy level (0-10)
+        soreness: Muscle soreness (0-10, higher = more sore)
+        stress: Stress level (0-10, higher = more stressed)
+        resolution: Number of points used to sample the intensity universe
+            (grid defuzzification only)
+        defuzzification: "grid" or "analytic" centroid computation
+        lut: Optional ReadinessLUT answering intensity and confidence from
+            a precomputed table instead of running inference
+    
+    Returns:
+        Dictionary with intensity recommendation and memberships
+    """
+    result = calculate_readiness_batch(
+        [sleep], [energy], [soreness], [stress],
+        resolution=resolution,
+        defuzzification=defuzzification,
+        lut=lut,
+    )
+    return {
+        "intensity": float(result["intensity"][0]),
+        "label": str(result["label"][0]),
+        "confidence": float(result["confidence"][0]),
+        "input_memberships": {
+            var: {term: float(values[0]) for term, values in terms.items()}
+            for var, terms in result["input_memberships"].items()
+        },
     }
+
+
+def evaluate_readiness(
+    inputs: np.ndarray,
+    resolution: int = DEFAULT_RESOLUTION,
+    defuzzification: str = "grid",
+) -> dict:
+    """
+    Run readiness inference without rounding.
+    
+    Args:
+        inputs: Shape (N, 4) array of sleep, energy, soreness and stress
+        resolution: Number of points used to sample the intensity universe
+            (grid defuzzification only)
+        defuzzification: "grid" or "analytic" centroid computation
+    
+    Returns:
+        Dictionary with unrounded intensity (N,) and confidence (N,) and
+        memberships (N, 4, 3)
+    """
+    evaluation = READINESS_SYSTEM.evaluate(inputs, defuzzification, resolution)
+    memberships = evaluation["memberships"]
+    
+    # Fallback calculation for rows where no rules fired
+    positive_factors = (inputs[:, 0] + inputs[:, 1]) / 20
+    negative_factors = (inputs[:, 2] + inputs[:, 3]) / 20
+    fallback = np.clip(50 + (positive_factors - negative_factors) * 50, 0, 100)
+    intensity = np.where(np.isnan(evaluation["output"]), fallback, evaluation["output"])
     
     # Calculate confidence based on how well inputs match the rules
-    total_membership = sum(
-        max(input_memberships[key].values()) for key in input_memberships
-    )
-    confidence = min(1.0, total_membership / 4)
+    confidence = np.minimum(1.0, memberships.max(axis=2).sum(axis=1) / len(INPUT_MF))
+    
+    return {
+        "intensity": intensity,
+        "confidence": confidence,
+        "memberships": memberships,
+    }
+
+
+def calculate_readiness_batch(
+    sleep,
+    energy,
+    soreness,
+    stress,
+    resolution: int = DEFAULT_RESOLUTION,
+    defuzzification: str = "grid",
+    lut=None,
+) -> dict:
+    """
+    Calculate workout readiness for many check-ins at once.
+    
+    Scalar calls go through the same path with a batch of one; every rule
+    firing strength is evaluated with one min/max reduction over the batch.
+    
+    Args:
+        sleep: Sleep quality values (0-10), shape (N,)
+        energy: Energy level values (0-10), shape (N,)
+        soreness: Muscle soreness values (0-10), shape (N,)
+        stress: Stress level values (0-10), shape (N,)
+        resolution: Number of points used to sample the intensity universe
+            (grid defuzzification only)
+        defuzzification: "grid" or "analytic" centroid computation
+        lut: Optional ReadinessLUT answering intensity and confidence from
+            a precomputed table; resolution and defuzzification are then
+            those the table was built with
+    
+    Returns:
+        Dictionary of per-row arrays: intensity, label, confidence and
+        input_memberships ({input: {term: values}})
+    """
+    inputs = np.column_stack([sleep, energy, soreness, stress]).astype(float)
+    if lut is None:
+        evaluation = evaluate_readiness(inputs, resolution, defuzzification)
+        intensity = evaluation["intensity"]
+        confidence = evaluation["confidence"]
+        memberships = evaluation["memberships"]
+    else:
+        intensity, confidence = lut.lookup(inputs)
+        memberships = READINESS_SYSTEM.memberships(inputs)
+    
+    # Determine label based on intensity
+    labels = np.array(INTENSITY_LABELS)[np.digitize(intensity, LABEL_THRESHOLDS)]
     
     return {
-        "intensity": round(float(intensity), 1),
-        "label": label,
-        "confidence": round(confidence, 2),
-        "input_memberships": input_memberships,
+        "intensity": round_decimals(intensity, 1),
+        "label": labels,
+        "confidence": round_decimals(confidence, 2),
+        "input_memberships": {
+            var: dict(zip(terms, memberships[:, v, :len(terms)].T))
+            for v, (var, terms) in enumerate(INPUT_MF.items())
+        },
     }
@@ -1,37 +1,98 @@
 """Fuzzy logic 1RM estimator."""
 import re
+from functools import lru_cache
+
 import numpy as np
 
-from app.fuzzy_engine.utils import trimf
+from app.fuzzy_engine.utils import encode_categories, round_decimals, trimf_matrix
+
+
+# RPE membership functions (low, medium, high)
+_RPE_PARAMS = np.array([
+    [1, 1, 5],
+    [3, 6, 8],
+    [7, 10, 10],
+], dtype=float)
+
+# Form quality adjustments
+FORM_ADJUSTMENTS = {
+    "poor": {"multiplier": 0.85, "confidence_penalty": 0.3},
+    "fair": {"multiplier": 0.92, "confidence_penalty": 0.15},
+    "good": {"multiplier": 1.0, "confidence_penalty": 0.05},
+    "excellent": {"multiplier": 1.05, "confidence_penalty": 0.0},
+}
+DEFAULT_FORM_ADJUSTMENT = {"multiplier": 1.0, "confidence_penalty": 0.1}
+FORM_QUALITIES = tuple(FORM_ADJUSTMENTS)
+
+# Lookup arrays indexed by encode_categories codes; the last entry is the
+# default used for unknown values
+_FORM_MULTIPLIERS = np.array([
+    adj["multiplier"] for adj in [*FORM_ADJUSTMENTS.values(), DEFAULT_FORM_ADJUSTMENT]
+])
+_FORM_PENALTIES = np.array([
+    adj["confidence_penalty"] for adj in [*FORM_ADJUSTMENTS.values(), DEFAULT_FORM_ADJUSTMENT]
+])
+
+# RTS RPE chart: fraction of 1RM by total reps to failure (reps + reps in
+# reserve) from 1 to 15.5 in half-rep steps
+_PERCENT_BY_REPS_TO_FAILURE = np.array([
+    100.0, 97.8, 95.5, 93.9, 92.2, 90.7, 89.2, 87.8, 86.3, 85.0,
+    83.7, 82.4, 81.1, 79.9, 78.6, 77.4, 76.2, 75.1, 73.9, 72.3,
+    70.7, 69.4, 68.0, 66.7, 65.3, 64.0, 62.6, 61.3, 59.9, 58.6,
+]) / 100
+
+# RPE x reps table (rows RPE 6.5-10 in half steps, columns 1-12 reps); RPE
+# r leaves 10 - r reps in reserve
+RPE_TABLE_RPE = np.arange(6.5, 10.25, 0.5)
+RPE_TABLE_REPS = np.arange(1, 13, dtype=float)
+RPE_TABLE = _PERCENT_BY_REPS_TO_FAILURE[
+    (2 * (RPE_TABLE_REPS[np.newaxis, :] - 1 + 10 - RPE_TABLE_RPE[:, np.newaxis])).astype(int)
+]
+
+# Session fusion: weight of a set by RPE membership (low, medium, high),
+# since near-maximal sets predict the 1RM best, and the relative spread
+# of its estimate from misjudged RPE
+_SESSION_RPE_WEIGHTS = np.array([0.25, 0.6, 1.0])
+_SESSION_RPE_SPREADS = np.array([0.06, 0.03, 0.015])
+
+# Extra spread and confidence penalty per rep or RPE point outside the table
+SESSION_EXTRAPOLATION_SPREAD = 0.01
+SESSION_EXTRAPOLATION_PENALTY = 0.05
 
+# Fuzzy rep parsing
+FUZZY_REP_TERMS = ("around", "about", "approximately", "roughly", "~", "maybe")
+_RANGE_PATTERN = re.compile(r"(\d+)\s*[-to]+\s*(\d+)")
+_NUMBER_PATTERN = re.compile(r"(\d+\.?\d*)")
 
+
+@lru_cache(maxsize=4096)
 def parse_fuzzy_reps(reps_str: str) -> tuple[float, float]:
     """
     Parse fuzzy rep input like "around 6" or "5-7" or "about 8".
     
+    Rep strings repeat heavily, so results are memoized per raw string.
+    
     Returns:
         Tuple of (estimated_reps, uncertainty)
     """
     reps_str = reps_str.lower().strip()
     
     # Check for range like "5-7" or "5 to 7"
-    range_match = re.match(r"(\d+)\s*[-to]+\s*(\d+)", reps_str)
+    range_match = _RANGE_PATTERN.match(reps_str)
     if range_match:
         low = int(range_match.group(1))
         high = int(range_match.group(2))
         return ((low + high) / 2, (high - low) / 2)
     
     # Check for fuzzy terms
-    fuzzy_terms = ["around", "about", "approximately", "roughly", "~", "maybe"]
-    for term in fuzzy_terms:
-        if term in reps_str:
-            # Extract number
-            num_match = re.search(r"(\d+\.?\d*)", reps_str)
-            if num_match:
-                return (float(num_match.group(1)), 1.0)
+    if any(term in reps_str for term in FUZZY_REP_TERMS):
+        # Extract number
+        num_match = _NUMBER_PATTERN.search(reps_str)
+        if num_match:
+            return (float(num_match.group(1)), 1.0)
     
     # Check for exact number
-    num_match = re.search(r"(\d+\.?\d*)", reps_str)
+    num_match = _NUMBER_PATTERN.search(reps_str)
     if num_match:
         return (float(num_match.group(1)), 0.5)
     
@@ -39,6 +100,38 @@ def parse_fuzzy_reps(reps_str: str) -> tuple[float, float]:
     return (5.0, 1.5)
 
 
+def _parse_reps_column(reps) -> tuple[np.ndarray, np.ndarray]:
+    """Estimated reps and uncertainty per row, parsing each distinct string once."""
+    unique_reps, inverse = np.unique(np.asarray(reps, dtype=str), return_inverse=True)
+    parsed = np.array([parse_fuzzy_reps(r) for r in unique_reps.tolist()], dtype=float).reshape(-1, 2)
+    return tuple(parsed[inverse.reshape(-1)].T)
+
+
+def rpe_percentage(reps, rpe) -> np.ndarray:
+    """
+    Fraction of 1RM lifted for reps at an RPE, from the RTS table.
+    
+    Interpolates bilinearly between the table's reps and RPE steps;
+    inputs outside the table are clamped to its edges.
+    
+    Args:
+        reps: Reps performed, shape (N,)
+        rpe: Rate of Perceived Exertion values, shape (N,)
+    
+    Returns:
+        Fractions of 1RM, shape (N,)
+    """
+    x = np.clip(np.asarray(reps, dtype=float), RPE_TABLE_REPS[0], RPE_TABLE_REPS[-1]) - RPE_TABLE_REPS[0]
+    y = (np.clip(np.asarray(rpe, dtype=float), RPE_TABLE_RPE[0], RPE_TABLE_RPE[-1]) - RPE_TABLE_RPE[0]) / 0.5
+    col = np.minimum(x.astype(int), len(RPE_TABLE_REPS) - 2)
+    row = np.minimum(y.astype(int), len(RPE_TABLE_RPE) - 2)
+    fx = x - col
+    fy = y - row
+    lower = (1 - fx) * RPE_TABLE[row, col] + fx * RPE_TABLE[row, col + 1]
+    upper = (1 - fx) * RPE_TABLE[row + 1, col] + fx * RPE_TABLE[row + 1, col + 1]
+    return (1 - fy) * lower + fy * upper
+
+
 def estimate_one_rep_max(
     weight_lifted: float,
     reps: str,
@@ -61,13 +154,7 @@ def estimate_one_rep_max(
     estimated_reps, rep_uncertainty = parse_fuzzy_reps(reps)
     
     # Form quality adjustments
-    form_adjustments = {
-        "poor": {"multiplier": 0.85, "confidence_penalty": 0.3},
-        "fair": {"multiplier": 0.92, "confidence_penalty": 0.15},
-        "good": {"multiplier": 1.0, "confidence_penalty": 0.05},
-        "excellent": {"multiplier": 1.05, "confidence_penalty": 0.0},
-    }
-    form_adj = form_adjustments.get(form_quality, {"multiplier": 1.0, "confidence_penalty": 0.1})
+    form_adj = FORM_ADJUSTMENTS.get(form_quality, DEFAULT_FORM_ADJUSTMENT)
     
     # RPE adjustment - higher RPE means set was harder, closer to true max
     # RPE 10 = couldn't do more, RPE 5 = could do 5 more
@@ -95,13 +182,7 @@ def estimate_one_rep_max(
     
     # Calculate uncertainty range using fuzzy logic
     # RPE affects confidence - higher RPE = more confident estimate
-    low_rpe_params = [1, 1, 5]
-    med_rpe_params = [3, 6, 8]
-    high_rpe_params = [7, 10, 10]
-    
-    low_rpe_deg = float(trimf(rpe, low_rpe_params))
-    med_rpe_deg = float(trimf(rpe, med_rpe_params))
-    high_rpe_deg = float(trimf(rpe, high_rpe_params))
+    low_rpe_deg, med_rpe_deg, high_rpe_deg = trimf_matrix(rpe, _RPE_PARAMS).tolist()
     
     # Base uncertainty from rep count and fuzziness
     rep_uncertainty_factor = 1 + (rep_uncertainty * 0.02)
@@ -124,3 +205,150 @@ def estimate_one_rep_max(
         "one_rm_high": round(one_rm_high, 1),
         "confidence": round(confidence, 2),
     }
+
+
+def estimate_one_rep_max_batch(
+    weight_lifted,
+    reps,
+    rpe,
+    form_quality,
+) -> dict:
+    """
+    Estimate 1RM for many sets at once.
+    
+    Vectorized counterpart of estimate_one_rep_max: each distinct rep
+    string is parsed once, then the formula blend, form adjustment and
+    RPE-membership uncertainty are evaluated as arrays.
+    
+    Args:
+        weight_lifted: Weights lifted in kg, shape (N,)
+        reps: Rep strings (can be fuzzy like "around 6"), shape (N,)
+        rpe: Rate of Perceived Exertion values (1-10), shape (N,)
+        form_quality: Form quality strings, shape (N,)
+    
+    Returns:
+        Dictionary of per-row arrays with the same keys as
+        estimate_one_rep_max
+    """
+    weight_lifted = np.asarray(weight_lifted, dtype=float)
+    rpe = np.asarray(rpe, dtype=float)
+    form = encode_categories(form_quality, FORM_QUALITIES)
+    
+    estimated_reps, rep_uncertainty = _parse_reps_column(reps)
+    
+    # RPE adjustment - higher RPE means set was harder, closer to true max
+    effective_reps = estimated_reps + (10 - rpe)
+    effective_reps = np.where(effective_reps >= 36, 35, effective_reps)  # Cap to avoid division issues
+    
+    # Average of Brzycki, Epley and Lombardi formulas with form adjustment
+    brzycki_1rm = weight_lifted * (36 / (37 - effective_reps))
+    epley_1rm = weight_lifted * (1 + effective_reps / 30)
+    lombardi_1rm = weight_lifted * (effective_reps ** 0.1)
+    base_1rm = (brzycki_1rm + epley_1rm + lombardi_1rm) / 3
+    adjusted_1rm = base_1rm * _FORM_MULTIPLIERS[form]
+    
+    # Uncertainty range from rep fuzziness and RPE memberships
+    low_rpe_deg, med_rpe_deg, high_rpe_deg = trimf_matrix(rpe, _RPE_PARAMS).T
+    rep_uncertainty_factor = 1 + (rep_uncertainty * 0.02)
+    rpe_uncertainty_factor = 1 + (low_rpe_deg * 0.1) + (med_rpe_deg * 0.05)
+    total_uncertainty = 0.05 * rep_uncertainty_factor * rpe_uncertainty_factor
+    one_rm_low = adjusted_1rm * (1 - total_uncertainty)
+    one_rm_high = adjusted_1rm * (1 + total_uncertainty)
+    
+    # Calculate confidence
+    confidence = 0.7 + (high_rpe_deg * 0.2) - _FORM_PENALTIES[form]
+    confidence = np.clip(confidence, 0.3, 1.0)
+    
+    return {
+        "one_rm_low": round_decimals(one_rm_low, 1),
+        "one_rm_mid": round_decimals(adjusted_1rm, 1),
+        "one_rm_high": round_decimals(one_rm_high, 1),
+        "confidence": round_decimals(confidence, 2),
+    }
+
+
+def estimate_session_one_rep_max(
+    weight_lifted,
+    reps,
+    rpe,
+    form_quality,
+) -> dict:
+    """
+    Fuse all sets of a session into one fuzzy 1RM range.
+    
+    Each set's 1RM is its load over the RTS table percentage for its reps
+    and RPE, adjusted for form. The set becomes a triangular fuzzy number
+    whose low and high ends use the lower and upper ends of the fuzzy
+    reps, widened by the RPE-membership spread. Sets are then averaged with
+    weights from their confidence and RPE memberships. The fused range is
+    widened further by how much the sets disagree. Every step works on
+    whole-session arrays.
+    
+    Args:
+        weight_lifted: Weights lifted in kg, shape (N,)
+        reps: Rep strings (can be fuzzy like "around 6"), shape (N,)
+        rpe: Rate of Perceived Exertion values (1-10), shape (N,)
+        form_quality: Form quality strings, shape (N,)
+    
+    Returns:
+        Dictionary with the session's one_rm_low/mid/high and confidence,
+        "effective_sets" (Kish effective number of sets), "top_set"
+        (index of the most heavily weighted set), and per-set arrays
+        "set_one_rm" and "set_weight" (normalized weights)
+    """
+    weight_lifted = np.asarray(weight_lifted, dtype=float)
+    rpe = np.asarray(rpe, dtype=float)
+    form = encode_categories(form_quality, FORM_QUALITIES)
+    estimated_reps, rep_uncertainty = _parse_reps_column(reps)
+    
+    # Per-set triangular 1RM; more reps at the same load means a higher 1RM
+    load = weight_lifted * _FORM_MULTIPLIERS[form]
+    set_mid = load / rpe_percentage(estimated_reps, rpe)
+    set_low = load / rpe_percentage(estimated_reps - rep_uncertainty, rpe)
+    set_high = load / rpe_percentage(estimated_reps + rep_uncertainty, rpe)
+    
+    memberships = trimf_matrix(rpe, _RPE_PARAMS)
+    # trimf is 0 at a shoulder's outer edge; RPE 1 and 10 are fully low/high
+    memberships[rpe <= _RPE_PARAMS[0, 0], 0] = 1.0
+    memberships[rpe >= _RPE_PARAMS[2, 2], 2] = 1.0
+    total_membership = memberships.sum(axis=1)
+    outside = (
+        np.maximum(estimated_reps + rep_uncertainty - RPE_TABLE_REPS[-1], 0)
+        + np.maximum(RPE_TABLE_RPE[0] - rpe, 0)
+    )
+    spread = memberships @ _SESSION_RPE_SPREADS / total_membership + SESSION_EXTRAPOLATION_SPREAD * outside
+    set_low = set_low * (1 - spread)
+    set_high = set_high * (1 + spread)
+    
+    # Set confidence as in estimate_one_rep_max, less for extrapolated sets
+    set_confidence = np.clip(
+        0.7 + memberships[:, 2] * 0.2 - _FORM_PENALTIES[form] - SESSION_EXTRAPOLATION_PENALTY * outside,
+        0.3,
+        1.0,
+    )
+    weights = set_confidence * (memberships @ _SESSION_RPE_WEIGHTS) / total_membership
+    weights = weights / weights.sum()
+    
+    # Weighted average of the triangles, widened by the sets' disagreement
+    one_rm_low, one_rm_mid, one_rm_high = np.stack([set_low, set_mid, set_high]) @ weights
+    dispersion = np.sqrt(weights @ (set_mid - one_rm_mid) ** 2)
+    effective_sets = 1 / (weights @ weights)
+    
+    # More agreeing sets raise confidence; disagreement lowers it
+    confidence = (
+        weights @ set_confidence
+        + 0.1 * (1 - 1 / effective_sets)
+        - dispersion / one_rm_mid
+    )
+    confidence = min(1.0, max(0.3, confidence))
+    
+    return {
+        "one_rm_low": round(one_rm_low - dispersion, 1),
+        "one_rm_mid": round(one_rm_mid, 1),
+        "one_rm_high": round(one_rm_high + dispersion, 1),
+        "confidence": round(confidence, 2),
+        "effective_sets": round(effective_sets, 1),
+        "top_set": int(np.argmax(weights)),
+        "set_one_rm": round_decimals(set_mid, 1),
+        "set_weight": round_decimals(weights, 3),
+    }
@@ -0,0 +1,187 @@
+"""Declarative Mamdani fuzzy inference compiled to NumPy index arrays."""
+import numpy as np
+
+from app.fuzzy_engine.utils import trimf_centroid_batch, trimf_matrix
+
+
+# Number of evenly spaced points sampled on the output universe
+DEFAULT_RESOLUTION = 101
+
+# Rows integrated together by analytic defuzzification; bounds its
+# (rows x breakpoints x terms) working arrays
+ANALYTIC_CHUNK_ROWS = 2048
+
+# "grid" samples the output universe, "analytic" integrates it exactly
+DEFUZZIFICATION_METHODS = ("grid", "analytic")
+
+
+class FuzzySystem:
+    """
+    Mamdani fuzzy system with triangular terms, min (AND) rules and max
+    aggregation.
+    
+    Variables, terms and rules are given as data and compiled once into
+    arrays: an antecedent term index per (rule, input) and a "don't care"
+    mask for inputs a rule ignores. Evaluation is then a gather plus one
+    min and one max reduction, whether it is given one row or a batch.
+    
+    Args:
+        inputs: {input: {term: [a, b, c]}}, in input column order
+        output: {term: [a, b, c]} for the output variable
+        rules: List of ({input: term}, output term); inputs missing from
+            a rule are ignored for that rule
+        output_range: (low, high) limits of the output universe
+    """
+    
+    def __init__(self, inputs: dict, output: dict, rules: list, output_range: tuple = (0, 100)):
+        self.input_names = tuple(inputs)
+        self.input_terms = {name: tuple(terms) for name, terms in inputs.items()}
+        self.output_terms = tuple(output)
+        self.output_range = output_range
+        self.rules = list(rules)
+        
+        # Input terms padded to a common count; padding terms never fire
+        max_terms = max(len(terms) for terms in inputs.values())
+        self._input_params = np.full((len(inputs), max_terms, 3), np.inf)
+        for v, terms in enumerate(inputs.values()):
+            self._input_params[v, :len(terms)] = list(terms.values())
+        self._output_params = np.array(list(output.values()), dtype=float)
+        
+        # Antecedent term index per (rule, input), "don't care" where unused
+        self.antecedents = np.zeros((len(rules), len(inputs)), dtype=np.intp)
+        self.dont_care = np.ones((len(rules), len(inputs)), dtype=bool)
+        consequents = np.empty(len(rules), dtype=np.intp)
+        for r, (antecedent, consequent) in enumerate(rules):
+            for name, term in antecedent.items():
+                v = self.input_names.index(name)
+                self.antecedents[r, v] = self.input_terms[name].index(term)
+                self.dont_care[r, v] = False
+            consequents[r] = self.output_terms.index(consequent)
+        
+        # Rules sorted by consequent so max aggregation is one reduceat
+        missing = set(range(len(output))) - set(consequents.tolist())
+        if missing:
+            names = sorted(self.output_terms[k] for k in missing)
+            raise ValueError(f"output terms without rules: {names}")
+        order = np.argsort(consequents, kind="stable")
+        self.antecedents = self.antecedents[order]
+        self.dont_care = self.dont_care[order]
+        self.consequents = consequents[order]
+        self._consequent_starts = np.searchsorted(self.consequents, np.arange(len(output)))
+        self._input_index = np.arange(len(inputs))
+        self._universes = {}
+    
+    def memberships(self, inputs) -> np.ndarray:
+        """
+        Evaluate input memberships.
+        
+        Args:
+            inputs: Shape (N, V) batch or (V,) single row, columns in
+                input order
+        
+        Returns:
+            Memberships of shape (N, V, T); padding terms are 0
+        """
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=float))
+        return trimf_matrix(inputs, self._input_params)
+    
+    def firing_strengths(self, memberships: np.ndarray) -> np.ndarray:
+        """Rule firing strengths of shape (N, R), in compiled rule order."""
+        gathered = memberships[:, self._input_index, self.antecedents]
+        return np.where(self.dont_care, 1.0, gathered).min(axis=2)
+    
+    def aggregate(self, firing: np.ndarray) -> np.ndarray:
+        """Max-aggregate firing strengths into output term strengths (N, K)."""
+        return np.maximum.reduceat(firing, self._consequent_starts, axis=1)
+    
+    def output_universe(self, resolution: int = DEFAULT_RESOLUTION) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sample the output universe and its membership functions.
+        
+        Samples are cached per system and resolution.
+        
+        Args:
+            resolution: Number of points on the output universe
+        
+        Returns:
+            Tuple of (universe, membership matrix) where the matrix has one
+            row per output term and one column per universe point
+        """
+        cached = self._universes.get(resolution)
+        if cached is not None:
+            return cached
+        if resolution < 2:
+            raise ValueError("resolution must be at least 2")
+        universe = np.linspace(*self.output_range, resolution)
+        matrix = trimf_matrix(universe, self._output_params).T
+        universe.flags.writeable = False
+        matrix.flags.writeable = False
+        self._universes[resolution] = universe, matrix
+        return universe, matrix
+    
+    def defuzzify(
+        self,
+        strengths: np.ndarray,
+        defuzzification: str = "grid",
+        resolution: int = DEFAULT_RESOLUTION,
+    ) -> np.ndarray:
+        """
+        Centroid defuzzification of clipped, max-combined output terms.
+        
+        Args:
+            strengths: Output term strengths, shape (N, K)
+            defuzzification: "grid" or "analytic" centroid computation
+            resolution: Number of universe points (grid only)
+        
+        Returns:
+            Centroids of shape (N,); NaN where no rule fired
+        """
+        if defuzzification == "analytic":
+            # Exact area and moment of the clipped triangles, no sampling
+            area = np.empty(len(strengths))
+            moment = np.empty(len(strengths))
+            for start in range(0, len(strengths), ANALYTIC_CHUNK_ROWS):
+                chunk = slice(start, start + ANALYTIC_CHUNK_ROWS)
+                area[chunk], moment[chunk] = trimf_centroid_batch(
+                    self._output_params, strengths[chunk], self.output_range
+                )
+        elif defuzzification == "grid":
+            # Clip each output set at its strength and combine with max
+            universe, matrix = self.output_universe(resolution)
+            aggregated = np.zeros((len(strengths), len(universe)))
+            for k in range(len(self.output_terms)):
+                np.maximum(aggregated, np.minimum(matrix[k], strengths[:, k, np.newaxis]), out=aggregated)
+            area = aggregated.sum(axis=1)
+            moment = aggregated @ universe
+        else:
+            raise ValueError(
+                f"defuzzification must be one of {DEFUZZIFICATION_METHODS}, got {defuzzification!r}"
+            )
+        fired = area > 0
+        return np.where(fired, moment / np.where(fired, area, 1), np.nan)
+    
+    def evaluate(
+        self,
+        inputs,
+        defuzzification: str = "grid",
+        resolution: int = DEFAULT_RESOLUTION,
+    ) -> dict:
+        """
+        Run full inference for one row or a batch.
+        
+        Args:
+            inputs: Shape (N, V) batch or (V,) single row
+            defuzzification: "grid" or "analytic" centroid computation
+            resolution: Number of universe points (grid only)
+        
+        Returns:
+            Dictionary with memberships (N, V, T), strengths (N, K) and
+            output (N,) centroids, NaN where no rule fired
+        """
+        memberships = self.memberships(inputs)
+        strengths = self.aggregate(self.firing_strengths(memberships))
+        return {
+            "memberships": memberships,
+            "strengths": strengths,
+            "output": self.defuzzify(strengths, defuzzification, resolution),
+        }
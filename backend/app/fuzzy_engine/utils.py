@@ -1,4 +1,5 @@
 """Shared fuzzy logic utilities."""
+import numpy as np
 
 
 def trimf(x: float, params: list) -> float:
@@ -19,3 +20,264 @@ def trimf(x: float, params: list) -> float:
         return (x - a) / (b - a) if b != a else 1.0
     else:  # b < x < c
         return (c - x) / (c - b) if c != b else 1.0
+
+
+def round_decimals(values, decimals: int) -> np.ndarray:
+    """
+    Round an array exactly like the built-in round(value, decimals).
+    
+    np.round scales by 10**decimals first, which can tip values lying
+    within an ulp of a half step the other way; those few values are
+    re-rounded with round() so batch results match the scalar engines.
+    
+    Args:
+        values: Array of floats
+        decimals: Number of decimal places
+    
+    Returns:
+        Rounded float array
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, decimals) for value in values[near_half].tolist()]
+    return rounded
+
+
+def encode_categories(values, categories: tuple) -> np.ndarray:
+    """
+    Encode categorical strings as small integer codes.
+    
+    Args:
+        values: Sequence of category strings, shape (N,)
+        categories: Known categories; category i is encoded as i
+    
+    Returns:
+        Integer codes of shape (N,); unknown values get len(categories)
+    """
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    lookup = {category: i for i, category in enumerate(categories)}
+    unique_codes = np.array([lookup.get(value, len(categories)) for value in unique.tolist()], dtype=np.intp)
+    return unique_codes[inverse.reshape(-1)]
+
+
+def trapmf_matrix(x, params) -> np.ndarray:
+    """
+    Evaluate trapezoidal membership functions over an array of inputs.
+    
+    Edges follow trimf: membership is 0 at or beyond either foot, so a
+    degenerate a == b or c == d edge contributes no rising/falling ramp.
+    Infinite feet give open shoulders.
+    
+    Args:
+        x: Input values, shape (N,) or any shape broadcastable against
+            the leading dimensions of params
+        params: [a, b, c, d] rows, shape (K, 4) or (..., K, 4)
+    
+    Returns:
+        Membership matrix of shape (N, K) (x's shape plus a trailing K axis)
+    """
+    x = np.asarray(x, dtype=float)[..., np.newaxis]
+    a, b, c, d = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rising = (x - a) / (b - a)
+        falling = (d - x) / (d - c)
+    return np.where(
+        (x <= a) | (x >= d),
+        0.0,
+        np.where(x <= b, rising, np.where(x <= c, 1.0, falling)),
+    )
+
+
+def trimf_matrix(x, params) -> np.ndarray:
+    """
+    Evaluate triangular membership functions over an array of inputs.
+    
+    Broadcasting counterpart of trimf, equivalent to
+    trapmf_matrix(x, [a, b, b, c]): trimf_matrix(xs, P)[i, k] equals
+    trimf(xs[i], P[k]).
+    
+    Args:
+        x: Input values, shape (N,) or any shape broadcastable against
+            the leading dimensions of params
+        params: [a, b, c] rows, shape (K, 3) or (..., K, 3)
+    
+    Returns:
+        Membership matrix of shape (N, K) (x's shape plus a trailing K axis)
+    """
+    x = np.asarray(x, dtype=float)[..., np.newaxis]
+    params = np.asarray(params, dtype=float)
+    a, b, c = params[..., 0], params[..., 1], params[..., 2]
+    # A degenerate edge divides by zero, but the resulting +/-inf always
+    # loses the min to the other edge or is masked out below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        membership = np.minimum((x - a) / (b - a), (c - x) / (c - b))
+    membership[(x <= a) | (x >= c)] = 0.0
+    return membership
+
+
+def left_shoulder_matrix(x, params) -> np.ndarray:
+    """
+    Evaluate left shoulders: 1 up to b, falling to 0 at c.
+    
+    Args:
+        x: Input values, shape (N,)
+        params: [b, c] rows, shape (K, 2)
+    
+    Returns:
+        Membership matrix of shape (N, K)
+    """
+    b, c = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    return trapmf_matrix(x, np.stack([np.full_like(b, -np.inf), np.full_like(b, -np.inf), b, c], axis=-1))
+
+
+def right_shoulder_matrix(x, params) -> np.ndarray:
+    """
+    Evaluate right shoulders: 0 up to a, rising to 1 at b and staying there.
+    
+    Args:
+        x: Input values, shape (N,)
+        params: [a, b] rows, shape (K, 2)
+    
+    Returns:
+        Membership matrix of shape (N, K)
+    """
+    a, b = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    return trapmf_matrix(x, np.stack([a, b, np.full_like(b, np.inf), np.full_like(b, np.inf)], axis=-1))
+
+
+def trimf_centroid(params, strengths, bounds: tuple[float, float]) -> tuple[float, float]:
+    """
+    Exact area and first moment of clipped triangular output sets.
+    
+    The aggregated Mamdani output max_k(min(trimf(x, params[k]), strengths[k]))
+    is piecewise linear, so it is integrated analytically between its
+    breakpoints instead of being sampled on a grid.
+    
+    Args:
+        params: Sequence of [a, b, c] triangles, one per output category
+        strengths: Rule strength (clip level) for each category
+        bounds: (low, high) limits of the output universe
+    
+    Returns:
+        Tuple of (area, first_moment); centroid is first_moment / area
+    """
+    params = np.asarray(params, dtype=float)
+    strengths = np.asarray(strengths, dtype=float)
+    fired = strengths > 0
+    if not fired.any():
+        return 0.0, 0.0
+    params = params[fired]
+    strengths = strengths[fired]
+    a, b, c = params.T
+    low, high = bounds
+    
+    # Every line the aggregated output can follow: both triangle edges
+    # (ignoring degenerate vertical ones) and each clip level
+    rising = b > a
+    falling = c > b
+    slopes = np.concatenate([
+        1 / (b[rising] - a[rising]),
+        -1 / (c[falling] - b[falling]),
+        np.zeros(len(strengths)),
+    ])
+    intercepts = np.concatenate([
+        -a[rising] / (b[rising] - a[rising]),
+        c[falling] / (c[falling] - b[falling]),
+        strengths,
+    ])
+    
+    # Kinks can only occur at vertices or where two of the lines cross
+    i, j = np.triu_indices(len(slopes), k=1)
+    crossing = slopes[i] != slopes[j]
+    crossings = (intercepts[j][crossing] - intercepts[i][crossing]) / (
+        slopes[i][crossing] - slopes[j][crossing]
+    )
+    breakpoints = np.concatenate([[low, high], params.ravel(), crossings])
+    breakpoints = np.unique(np.clip(breakpoints, low, high))
+    
+    # Evaluate strictly inside each piece so that degenerate shoulders,
+    # which are 0 exactly at their vertical edge, do not skew the result
+    x0 = breakpoints[:-1]
+    width = np.diff(breakpoints)
+    x1 = x0 + width / 4
+    x3 = x0 + 3 * width / 4
+    
+    def aggregate(x):
+        return np.minimum(trimf_matrix(x, params), strengths).max(axis=1)
+    
+    v1 = aggregate(x1)
+    v3 = aggregate(x3)
+    mid_value = (v1 + v3) / 2
+    slope = (v3 - v1) / (width / 2)
+    mid_x = x0 + width / 2
+    
+    area = np.sum(width * mid_value)
+    moment = np.sum(width * mid_x * mid_value + slope * width ** 3 / 12)
+    return float(area), float(moment)
+
+
+def trimf_centroid_batch(params, strengths, bounds: tuple[float, float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise trimf_centroid for a batch of clip levels.
+    
+    Every row uses the same candidate breakpoints as trimf_centroid
+    (bounds, vertices, and crossings of all edge and clip lines), so rows
+    are integrated together. Unfired terms are clipped at 0 and only add
+    pieces on which they are dominated, and repeated breakpoints give
+    zero-width pieces, so the result matches trimf_centroid up to float
+    rounding. Memory is O(rows x terms^3); callers chunk large batches.
+    
+    Args:
+        params: [a, b, c] triangles, shape (K, 3)
+        strengths: Clip level per row and category, shape (N, K)
+        bounds: (low, high) limits of the output universe
+    
+    Returns:
+        Tuple of (area, first_moment) arrays of shape (N,)
+    """
+    params = np.asarray(params, dtype=float)
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=float))
+    n = len(strengths)
+    a, b, c = params.T
+    low, high = bounds
+    
+    # Edge lines are shared by all rows; clip lines are per row
+    rising = b > a
+    falling = c > b
+    edge_slopes = np.concatenate([1 / (b[rising] - a[rising]), -1 / (c[falling] - b[falling])])
+    edge_intercepts = np.concatenate([
+        -a[rising] / (b[rising] - a[rising]),
+        c[falling] / (c[falling] - b[falling]),
+    ])
+    slopes = np.concatenate([edge_slopes, np.zeros(len(params))])
+    intercepts = np.concatenate([np.broadcast_to(edge_intercepts, (n, len(edge_intercepts))), strengths], axis=1)
+    
+    i, j = np.triu_indices(len(slopes), k=1)
+    crossing = slopes[i] != slopes[j]
+    i, j = i[crossing], j[crossing]
+    crossings = (intercepts[:, j] - intercepts[:, i]) / (slopes[i] - slopes[j])
+    fixed = np.concatenate([[low, high], params.ravel()])
+    breakpoints = np.concatenate([np.broadcast_to(fixed, (n, len(fixed))), crossings], axis=1)
+    breakpoints = np.sort(np.clip(breakpoints, low, high), axis=1)
+    
+    x0 = breakpoints[:, :-1]
+    width = np.diff(breakpoints, axis=1)
+    x1 = x0 + width / 4
+    x3 = x0 + 3 * width / 4
+    
+    def aggregate(x):
+        return np.minimum(trimf_matrix(x, params), strengths[:, np.newaxis, :]).max(axis=2)
+    
+    v1 = aggregate(x1)
+    v3 = aggregate(x3)
+    mid_value = (v1 + v3) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(width > 0, (v3 - v1) / (width / 2), 0.0)
+    mid_x = x0 + width / 2
+    
+    area = np.sum(width * mid_value, axis=1)
+    moment = np.sum(width * mid_x * mid_value + slope * width ** 3 / 12, axis=1)
+    return area, moment
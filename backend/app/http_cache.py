@@ -0,0 +1,130 @@
+"""ETag and conditional response middleware for deterministic endpoints."""
+import hashlib
+import json
+from typing import Iterable, Optional
+
+
+def canonical_json(body: bytes) -> Optional[bytes]:
+    """
+    Canonical form of a JSON body: sorted keys, no whitespace and every
+    number as a float, so {"sleep": 7} and {"sleep":7.0} hash the same.
+    
+    Returns:
+        Canonical bytes, or None if the body is not valid JSON
+    """
+    try:
+        data = json.loads(body, parse_int=float)
+    except ValueError:
+        return None
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+    
+    "*" never matches: on a POST it would turn any new body into a 304.
+    """
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    Pure ASGI middleware adding strong ETags to deterministic POST routes.
+    
+    The ETag is a hash of the path, the canonicalized request body, the
+    Accept header (which selects the representation) and an engine
+    version, so it is known before the route runs. A request whose
+    If-None-Match matches is answered with 304 without reaching the app,
+    unless it carries one of the passthrough headers (whose handling has
+    side effects, such as recording a check-in); otherwise successful
+    responses get ETag and Cache-Control headers.
+    
+    Args:
+        app: Wrapped ASGI application
+        paths: Exact request paths to handle
+        version: Engine/rules version folded into every ETag
+        cache_control: Cache-Control value for 200 and 304 responses
+        passthrough_headers: Request headers that always reach the app
+    """
+    
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str],
+        version: str,
+        cache_control: str = "private, no-cache",
+        passthrough_headers: Iterable[str] = (),
+    ):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.passthrough_headers = tuple(name.lower().encode() for name in passthrough_headers)
+        self.version = version
+        self.cache_control = cache_control.encode()
+    
+    def etag(self, path: str, body: bytes, accept: bytes = b"") -> Optional[str]:
+        """Strong ETag for a request, or None if the body is not JSON."""
+        canonical = canonical_json(body)
+        if canonical is None:
+            return None
+        digest = hashlib.sha256(b"\0".join([self.version.encode(), path.encode(), accept, canonical]))
+        return f'"{digest.hexdigest()[:32]}"'
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        # Buffer the body; these endpoints take small JSON payloads
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        
+        headers = dict(scope["headers"])
+        etag = self.etag(scope["path"], body, headers.get(b"accept", b""))
+        if_none_match = headers.get(b"if-none-match")
+        conditional = if_none_match is not None and not any(name in headers for name in self.passthrough_headers)
+        if etag is not None and conditional and _etag_matches(if_none_match.decode("latin-1"), etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", self.cache_control),
+                    (b"vary", b"Accept"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        body_sent = False
+        
+        async def replay():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200 and etag is not None:
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"etag", etag.encode()),
+                        (b"cache-control", self.cache_control),
+                    ],
+                }
+            await send(message)
+        
+        await self.app(scope, replay, send_with_etag)
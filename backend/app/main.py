@@ -1,30 +1,131 @@
 """FastAPI application for Fuzzy Fitness Dashboard."""
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from typing import Literal, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.models.schemas import (
     ReadinessInput, ReadinessOutput,
+    ReadinessBatchInput, ReadinessBatchOutput,
+    ReadinessForecastInput, ReadinessForecastOutput,
     BodyCompInput, BodyCompOutput,
+    BodyCompBatchInput, BodyCompBatchOutput,
     StrengthInput, StrengthOutput,
+    StrengthBatchInput, StrengthBatchOutput,
+    StrengthSessionInput, StrengthSessionOutput,
     NutritionInput, NutritionOutput,
+    NutritionBatchInput, NutritionBatchOutput,
+    DashboardInput, DashboardOutput,
 )
-from app.fuzzy_engine.readiness import calculate_readiness
-from app.fuzzy_engine.body_comp import estimate_body_composition
-from app.fuzzy_engine.strength import estimate_one_rep_max
-from app.fuzzy_engine.nutrition import calculate_nutrition
-from app.recommendations.generator import (
-    generate_readiness_recommendation,
-    generate_body_comp_recommendation,
-    generate_strength_recommendation,
-    generate_nutrition_recommendation,
+from app.fuzzy_engine.forecast import pad_series
+from app.fuzzy_engine.body_comp import estimate_body_composition_batch
+from app.fuzzy_engine.strength import estimate_one_rep_max_batch
+from app.fuzzy_engine.nutrition import calculate_nutrition_batch
+from app.services import (
+    DASHBOARD_SECTIONS,
+    compute_readiness,
+    compute_body_composition,
+    compute_strength,
+    compute_strength_session,
+    compute_nutrition,
+    readiness_lut,
+    readiness_batch,
+    readiness_forecast,
+    readiness_batch_recommendations,
+    body_comp_batch_recommendations,
+    strength_batch_recommendations,
+    nutrition_batch_recommendations,
+    run_batch,
+    cache_stats,
+    engine_version,
+    executor,
+    register_metrics,
+    profile_store,
+    history_writer,
+    trend_tracker,
+    record_checkin,
 )
+from app.config import settings
+from app.executor import ExecutorBusyError
+from app.http_cache import ETagMiddleware
+from app.metrics import PROMETHEUS_TEXT, MetricsMiddleware, registry as metrics_registry
+from app.profiles import MAX_USER_ID_LENGTH, valid_user_id
+from app.profiling import ProfilingMiddleware
+from app.serialization import render
+from app.streaming import (
+    NDJSON,
+    STREAM_FORMATS,
+    DuplexStreamingResponse,
+    StreamScorer,
+    iter_line_blocks,
+    read_csv_header,
+    score_stream,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Precompute (or load) the readiness lookup table when LUT mode is on,
+    open the profile and history stores and rebuild readiness trends from
+    history; on exit, flush profiles and history and shut down the engine
+    worker pools.
+    """
+    readiness_lut()
+    if profile_store is not None:
+        await profile_store.start()
+    if history_writer is not None:
+        await history_writer.start()
+        await asyncio.to_thread(trend_tracker.rebuild_from_history, history_writer.store)
+    yield
+    if profile_store is not None:
+        await profile_store.close()
+    if history_writer is not None:
+        await history_writer.close()
+    executor.shutdown()
+
 
 app = FastAPI(
     title="Fuzzy Fitness Dashboard API",
     description="A fuzzy logic-based fitness calculation API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+
+@app.exception_handler(ExecutorBusyError)
+async def executor_busy_handler(request: Request, exc: ExecutorBusyError):
+    """Reject work instead of queueing it when a worker pool is saturated."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+# Deterministic routes get ETags and 304s; added before CORS so that
+# conditional responses still carry CORS headers
+if settings.http_etag:
+    app.add_middleware(
+        ETagMiddleware,
+        paths=[
+            "/api/readiness",
+            "/api/body-composition",
+            "/api/one-rep-max",
+            "/api/nutrition",
+            "/api/dashboard",
+        ],
+        version=engine_version(),
+        cache_control=settings.http_cache_control,
+        # Check-ins are recorded by the handler, so they must reach it
+        passthrough_headers=["X-User-Id"],
+    )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +133,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Id"],
 )
 
+# Only installed when configured, so unprofiled deployments pay nothing
+if settings.profiling_token or settings.profiling_sample_rate > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.profiling_dir,
+        token=settings.profiling_token,
+        sample_rate=settings.profiling_sample_rate,
+        mode=settings.profiling_mode,
+        interval=settings.profiling_interval,
+    )
+
+# Outermost, so request latency covers every other middleware
+if settings.metrics:
+    register_metrics(metrics_registry)
+    if profile_store is not None:
+        profile_store.register_metrics(metrics_registry)
+    if history_writer is not None:
+        history_writer.register_metrics(metrics_registry)
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 
 @app.get("/")
 async def root():
@@ -43,9 +165,23 @@ async def root():
         "docs": "/docs",
         "endpoints": [
             "/api/readiness",
+            "/api/readiness/batch",
+            "/api/readiness/lut",
+            "/api/readiness/trend/{user_id}",
+            "/api/readiness/forecast",
             "/api/body-composition",
+            "/api/body-composition/batch",
             "/api/one-rep-max",
+            "/api/one-rep-max/batch",
+            "/api/one-rep-max/session",
             "/api/nutrition",
+            "/api/nutrition/batch",
+            "/api/dashboard",
+            "/api/stream/{engine}",
+            "/api/cache/stats",
+            "/api/executor/stats",
+            "/api/profile/{user_id}",
+            "/metrics",
         ],
     }
 
@@ -56,144 +192,382 @@ async def health_check():
     return {"status": "healthy"}
 
 
+def caller_id(request: Request) -> Optional[str]:
+    """
+    The caller's X-User-Id, or None if not sent.
+    
+    A route dependency, so an invalid id is rejected with 400 before any
+    engine work.
+    """
+    user_id = request.headers.get("x-user-id")
+    if user_id is not None and not valid_user_id(user_id):
+        raise HTTPException(
+            status_code=400,
+            detail=f"X-User-Id must be 1-{MAX_USER_ID_LENGTH} printable characters",
+        )
+    return user_id
+
+
+def remember(user_id: Optional[str], section: str, data, content: dict) -> None:
+    """
+    Record a section for the caller, if X-User-Id is sent: in their profile,
+    as today's check-in in their history, and in their readiness trend.
+    """
+    if user_id is None:
+        return
+    inputs = data.model_dump()
+    if profile_store is not None:
+        profile_store.record(user_id, section, inputs, content)
+    record_checkin(user_id, section, inputs, content)
+
+
 @app.post("/api/readiness", response_model=ReadinessOutput)
-async def workout_readiness(data: ReadinessInput):
+async def workout_readiness(data: ReadinessInput, request: Request, user_id: Optional[str] = Depends(caller_id)):
     """
     Calculate workout readiness using fuzzy logic.
     
     Takes sleep quality, energy level, soreness, and stress as inputs
     and returns an intensity recommendation.
     """
-    result = calculate_readiness(
+    result = await executor.run(compute_readiness, data)
+    content = result.model_dump()
+    remember(user_id, "readiness", data, content)
+    return render(request, content)
+
+
+@app.post("/api/readiness/batch", response_model=ReadinessBatchOutput)
+async def workout_readiness_batch(data: ReadinessBatchInput, request: Request, recommendations: bool = False):
+    """
+    Calculate workout readiness for a whole batch of check-ins.
+    
+    Takes equal-length arrays of sleep, energy, soreness, and stress and
+    returns column-wise intensity, label, confidence, and memberships with
+    one entry per row. With `?recommendations=true`, a recommendation
+    column is rendered as well.
+    """
+    result = await executor.run(
+        run_batch,
+        readiness_batch,
+        readiness_batch_recommendations if recommendations else None,
         sleep=data.sleep,
         energy=data.energy,
         soreness=data.soreness,
         stress=data.stress,
+        size=len(data.sleep),
     )
     
-    recommendation = generate_readiness_recommendation(
-        intensity=result["intensity"],
-        label=result["label"],
-        inputs={
-            "sleep": data.sleep,
-            "energy": data.energy,
-            "soreness": data.soreness,
-            "stress": data.stress,
-        },
-    )
+    return render(request, result, columnar=True)
+
+
+@app.post("/api/readiness/forecast", response_model=ReadinessForecastOutput)
+async def workout_readiness_forecast(data: ReadinessForecastInput, request: Request):
+    """
+    Forecast the next days of readiness for one athlete or a roster.
     
-    return ReadinessOutput(
-        intensity=result["intensity"],
-        label=result["label"],
-        confidence=result["confidence"],
-        recommendation=recommendation,
-        input_memberships=result["input_memberships"],
+    Fits a linear trend to each input over the last `window` check-ins,
+    extrapolates it `days` ahead (optionally damped) and runs every
+    projected day of every athlete through the readiness system in one
+    call. With `scenarios`, random paths drifting by each fit's residual
+    noise add intensity percentiles and label probabilities per day.
+    """
+    history = pad_series(
+        [(athlete.sleep, athlete.energy, athlete.soreness, athlete.stress) for athlete in data.athletes],
+        data.window,
+    )
+    result = await executor.run(
+        readiness_forecast,
+        history,
+        data.days,
+        data.scenarios,
+        data.damping,
+        data.seed,
+        size=len(data.athletes) * (1 + data.scenarios) * data.days,
     )
+    return render(request, {**result, "user_ids": data.user_ids}, columnar=True)
+
+
+@app.get("/api/readiness/trend/{user_id}")
+async def workout_readiness_trend(user_id: str, request: Request):
+    """
+    A user's acute:chronic readiness trend.
+    
+    Exponentially weighted 7-day (acute) and 28-day (chronic) averages of
+    intensity, soreness and stress, and their acute:chronic ratios, as of
+    the user's last check-in. Check-ins are readiness (or dashboard)
+    requests sent with X-User-Id.
+    """
+    trend = trend_tracker.get(user_id)
+    if trend is None:
+        raise HTTPException(status_code=404, detail="No readiness check-ins for this user")
+    return render(request, trend)
+
+
+@app.get("/api/readiness/lut")
+async def workout_readiness_lut():
+    """
+    Describe the readiness lookup table.
+    
+    Reports whether LUT mode is enabled and, if so, the grid and the
+    largest interpolation error measured against the exact engine.
+    """
+    lut = readiness_lut()
+    if lut is None:
+        return {"enabled": False}
+    return {"enabled": True, **lut.info()}
 
 
 @app.post("/api/body-composition", response_model=BodyCompOutput)
-async def body_composition(data: BodyCompInput):
+async def body_composition(data: BodyCompInput, request: Request, user_id: Optional[str] = Depends(caller_id)):
     """
     Estimate body composition using fuzzy logic.
     
     Takes weight, height, waist, activity level, and build type as inputs
     and returns body fat estimates and BMI interpretation.
     """
-    result = estimate_body_composition(
+    result = await executor.run(compute_body_composition, data)
+    content = result.model_dump()
+    remember(user_id, "body_composition", data, content)
+    return render(request, content)
+
+
+@app.post("/api/body-composition/batch", response_model=BodyCompBatchOutput)
+async def body_composition_batch(data: BodyCompBatchInput, request: Request, recommendations: bool = False):
+    """
+    Estimate body composition for a whole batch of people.
+    
+    Takes equal-length arrays of weight, height, waist, activity level, and
+    build type and returns column-wise estimates with one entry per row.
+    With `?recommendations=true`, a recommendation column is rendered as
+    well.
+    """
+    result = await executor.run(
+        run_batch,
+        estimate_body_composition_batch,
+        body_comp_batch_recommendations if recommendations else None,
         weight=data.weight,
         height=data.height,
         waist=data.waist,
         activity_level=data.activity_level,
         build_type=data.build_type,
+        size=len(data.weight),
     )
     
-    recommendation = generate_body_comp_recommendation(
-        body_fat_mid=result["body_fat_mid"],
-        muscle_mass_category=result["muscle_mass_category"],
-        bmi=result["bmi"],
-        bmi_interpretation=result["bmi_interpretation"],
-    )
-    
-    return BodyCompOutput(
-        body_fat_low=result["body_fat_low"],
-        body_fat_mid=result["body_fat_mid"],
-        body_fat_high=result["body_fat_high"],
-        muscle_mass_category=result["muscle_mass_category"],
-        bmi=result["bmi"],
-        bmi_interpretation=result["bmi_interpretation"],
-        recommendation=recommendation,
-    )
+    return render(request, result, columnar=True)
 
 
 @app.post("/api/one-rep-max", response_model=StrengthOutput)
-async def one_rep_max(data: StrengthInput):
+async def one_rep_max(data: StrengthInput, request: Request, user_id: Optional[str] = Depends(caller_id)):
     """
     Estimate 1RM using fuzzy logic with uncertainty.
     
     Takes weight lifted, reps (can be fuzzy), RPE, and form quality as inputs
     and returns 1RM estimates with confidence.
     """
-    result = estimate_one_rep_max(
+    result = await executor.run(compute_strength, data)
+    content = result.model_dump()
+    remember(user_id, "strength", data, content)
+    return render(request, content)
+
+
+@app.post("/api/one-rep-max/batch", response_model=StrengthBatchOutput)
+async def one_rep_max_batch(data: StrengthBatchInput, request: Request, recommendations: bool = False):
+    """
+    Estimate 1RM for a whole batch of sets.
+    
+    Takes equal-length arrays of weight lifted, reps, RPE, and form quality
+    and returns column-wise 1RM ranges and confidence with one entry per
+    row. With `?recommendations=true`, a recommendation column is rendered
+    as well.
+    """
+    result = await executor.run(
+        run_batch,
+        estimate_one_rep_max_batch,
+        strength_batch_recommendations if recommendations else None,
         weight_lifted=data.weight_lifted,
         reps=data.reps,
         rpe=data.rpe,
         form_quality=data.form_quality,
+        size=len(data.weight_lifted),
     )
     
-    recommendation = generate_strength_recommendation(
-        one_rm_mid=result["one_rm_mid"],
-        confidence=result["confidence"],
-        form_quality=data.form_quality,
-        weight_lifted=data.weight_lifted,
-    )
+    return render(request, result, columnar=True)
+
+
+@app.post("/api/one-rep-max/session", response_model=StrengthSessionOutput)
+async def one_rep_max_session(data: StrengthSessionInput, request: Request):
+    """
+    Estimate 1RM from all sets of a session.
     
-    return StrengthOutput(
-        one_rm_low=result["one_rm_low"],
-        one_rm_mid=result["one_rm_mid"],
-        one_rm_high=result["one_rm_high"],
-        confidence=result["confidence"],
-        recommendation=recommendation,
-    )
+    Takes equal-length arrays of weight lifted, reps (can be fuzzy), RPE,
+    and form quality, one entry per set. Each set is read against the RPE
+    x reps percentage table, and the sets are fused, weighted by confidence
+    and RPE, into a single 1RM range.
+    """
+    result = await executor.run(compute_strength_session, data, size=len(data.weight_lifted))
+    return render(request, result.model_dump())
 
 
 @app.post("/api/nutrition", response_model=NutritionOutput)
-async def nutrition(data: NutritionInput):
+async def nutrition(data: NutritionInput, request: Request, user_id: Optional[str] = Depends(caller_id)):
     """
     Calculate macro targets using fuzzy logic.
     
     Takes weight, goal, activity level, metabolism, and adherence as inputs
     and returns calorie and macro ranges.
     """
-    result = calculate_nutrition(
+    result = await executor.run(compute_nutrition, data)
+    content = result.model_dump()
+    remember(user_id, "nutrition", data, content)
+    return render(request, content)
+
+
+@app.post("/api/nutrition/batch", response_model=NutritionBatchOutput)
+async def nutrition_batch(data: NutritionBatchInput, request: Request, recommendations: bool = False):
+    """
+    Calculate macro targets for a whole batch of users.
+    
+    Takes equal-length arrays of weight, goal, activity level, metabolism,
+    and adherence and returns column-wise calorie and macro ranges with one
+    entry per row. With `?recommendations=true`, a recommendation column is
+    rendered as well.
+    """
+    result = await executor.run(
+        run_batch,
+        calculate_nutrition_batch,
+        nutrition_batch_recommendations if recommendations else None,
         weight=data.weight,
         goal=data.goal,
         activity_level=data.activity_level,
         metabolism=data.metabolism,
         adherence=data.adherence,
+        size=len(data.weight),
     )
     
-    recommendation = generate_nutrition_recommendation(
-        calories_mid=result["calories_mid"],
-        protein_mid=result["protein_mid"],
-        goal=data.goal,
-        adherence=data.adherence,
+    # Targets are whole numbers but documented as floats
+    return render(
+        request,
+        {key: values.astype(float) if values.dtype.kind in "iu" else values for key, values in result.items()},
+        columnar=True,
     )
+
+
+@app.post("/api/dashboard", response_model=DashboardOutput)
+async def dashboard(data: DashboardInput, request: Request, user_id: Optional[str] = Depends(caller_id)):
+    """
+    Calculate every dashboard card in one request.
     
-    return NutritionOutput(
-        calories_low=result["calories_low"],
-        calories_mid=result["calories_mid"],
-        calories_high=result["calories_high"],
-        protein_low=result["protein_low"],
-        protein_mid=result["protein_mid"],
-        protein_high=result["protein_high"],
-        carbs_low=result["carbs_low"],
-        carbs_mid=result["carbs_mid"],
-        carbs_high=result["carbs_high"],
-        fat_low=result["fat_low"],
-        fat_mid=result["fat_mid"],
-        fat_high=result["fat_high"],
-        recommendation=recommendation,
-    )
+    Takes the readiness, body composition, strength, and nutrition input
+    blocks and returns each section's result. A missing or invalid block
+    only produces an entry in `errors` for that section; the other
+    sections are still computed.
+    """
+    results = {}
+    errors = {}
+    for name, (input_model, compute) in DASHBOARD_SECTIONS.items():
+        block = getattr(data, name)
+        if block is None:
+            errors[name] = [{"type": "missing", "loc": [name], "msg": "Section missing"}]
+            continue
+        try:
+            section_input = input_model.model_validate(block)
+        except ValidationError as exc:
+            errors[name] = [
+                {"type": error["type"], "loc": [name, *error["loc"]], "msg": error["msg"]}
+                for error in exc.errors()
+            ]
+            continue
+        result = await executor.run(compute, section_input)
+        results[name] = result.model_dump()
+        remember(user_id, name, section_input, results[name])
+    
+    return render(request, {
+        **{name: results.get(name) for name in DASHBOARD_SECTIONS},
+        "errors": errors,
+    })
+
+
+@app.post("/api/stream/{engine}")
+async def stream_scores(engine: Literal["readiness", "nutrition"], request: Request):
+    """
+    Score a large CSV or NDJSON upload and stream NDJSON results back.
+    
+    The upload (Content-Type text/csv with a header row, or
+    application/x-ndjson) is parsed as it arrives and evaluated in
+    fixed-size vectorized chunks; each chunk's results are sent as soon
+    as it completes, one line per input row in input order. Invalid rows
+    produce {"row": n, "error": ...} lines instead of failing the stream.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = STREAM_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Content-Type must be one of {sorted(STREAM_FORMATS)}",
+        )
+    
+    scorer = StreamScorer(engine, settings.stream_chunk_rows)
+    blocks = iter_line_blocks(request.stream())
+    header = None
+    if fmt == "csv":
+        header, blocks = await read_csv_header(blocks)
+        missing = [column for column in scorer.columns if column not in header]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"CSV header is missing columns: {missing}")
+    
+    return DuplexStreamingResponse(score_stream(scorer, fmt, blocks, header), media_type=NDJSON)
+
+
+@app.get("/api/profile/{user_id}")
+async def user_profile(user_id: str, request: Request):
+    """
+    A user's last inputs and results per dashboard section.
+    
+    Sections are recorded by the single-engine and dashboard routes when
+    the request carries X-User-Id, and returned here as stored, without
+    recomputation.
+    """
+    if profile_store is None:
+        raise HTTPException(status_code=404, detail="Profiles are disabled (FUZZY_PROFILES_DB is empty)")
+    profile = await profile_store.get(user_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return render(request, profile)
+
+
+@app.get("/api/cache/stats")
+async def engine_cache_stats():
+    """
+    Result cache statistics.
+    
+    Returns hit/miss/eviction counters and size for each engine whose
+    results are cached.
+    """
+    return cache_stats()
+
+
+@app.get("/api/executor/stats")
+async def engine_executor_stats():
+    """
+    Engine execution backend statistics.
+    
+    Returns call counts, rejections, queue depth and latency percentiles
+    for the inline, thread and process backends.
+    """
+    return executor.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics in the text exposition format.
+    
+    Request counts and latency histograms per route, per-stage latency
+    histograms (validation, engine, recommendation, serialization),
+    in-flight requests, and cache and executor statistics.
+    """
+    if not settings.metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (FUZZY_METRICS=0)")
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_TEXT)
 
 
 if __name__ == "__main__":
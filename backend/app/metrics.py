@@ -0,0 +1,308 @@
+"""
+Prometheus-style request metrics with per-stage latency histograms.
+
+Every thread records into its own shard of plain dicts, so the hot path
+takes no lock; /metrics sums the shards when it is scraped. Stage timings
+(validation, engine, recommendation, serialization) are collected per
+request through a context variable and observed when the request ends.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+
+# Histogram upper bounds in seconds (plus the implicit +Inf bucket)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _RouteStats:
+    """Counters and histograms of one (method, route) pair in one shard."""
+    
+    __slots__ = ("statuses", "latency", "stages")
+    
+    def __init__(self, size: int):
+        self.statuses = {}
+        # Per-bucket (non-cumulative) counts, +Inf last, then the sum
+        self.latency = [0] * size + [0.0]
+        self.stages = {}
+
+
+class _Shard:
+    """Metrics written by a single thread."""
+    
+    __slots__ = ("routes", "in_flight")
+    
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = 0
+
+
+class MetricsRegistry:
+    """
+    Lock-free per-thread request metrics, aggregated on scrape.
+    
+    Only the owning thread writes to a shard, so recording a request is a
+    few dict and list updates with no lock; registering a new thread's
+    shard is the only locked operation. Scrapes sum all shards, and
+    collectors registered with register_collector() add samples (cache or
+    pool statistics) that are cheaper to read than to track.
+    
+    Args:
+        buckets: Histogram upper bounds in seconds
+    """
+    
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._collectors: list[Callable[[], Iterable[tuple]]] = []
+    
+    def shard(self) -> _Shard:
+        """This thread's shard, created on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+    
+    def record_request(
+        self,
+        shard: _Shard,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stages: dict,
+    ) -> None:
+        """Count a finished request and observe its latency and stage durations."""
+        buckets = self.buckets
+        stats = shard.routes.get((method, route))
+        if stats is None:
+            stats = shard.routes[(method, route)] = _RouteStats(len(buckets) + 1)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        latency = stats.latency
+        latency[bisect_left(buckets, seconds)] += 1
+        latency[-1] += seconds
+        for name, elapsed in stages.items():
+            histogram = stats.stages.get(name)
+            if histogram is None:
+                histogram = stats.stages[name] = [0] * (len(buckets) + 1) + [0.0]
+            histogram[bisect_left(buckets, elapsed)] += 1
+            histogram[-1] += elapsed
+    
+    def describe(self, name: str, kind: str, text: str) -> None:
+        """Set the TYPE (counter, gauge or histogram) and HELP of a metric."""
+        self._help[name] = (kind, text)
+    
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]) -> None:
+        """Add a callback run on scrape that yields (name, labels, value) samples."""
+        self._collectors.append(collector)
+    
+    def collect(self) -> tuple[dict, dict]:
+        """
+        Sum every shard.
+        
+        Returns:
+            Tuple of ({(name, labels): value} samples, {(name, labels):
+            histogram}) with labels tuples of (name, value) pairs
+        """
+        samples, histograms = {}, {}
+        
+        def merge(key, histogram):
+            total = histograms.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, value in enumerate(list(histogram)):
+                total[i] += value
+        
+        with self._lock:
+            shards = list(self._shards)
+        in_flight = 0
+        for shard in shards:
+            in_flight += shard.in_flight
+            # Copy first: the owning thread may add keys while we read
+            for (method, route), stats in list(shard.routes.items()):
+                for status, count in list(stats.statuses.items()):
+                    labels = (("method", method), ("route", route), ("status", str(status)))
+                    key = ("fuzzy_http_requests_total", labels)
+                    samples[key] = samples.get(key, 0) + count
+                merge(("fuzzy_http_request_duration_seconds", (("method", method), ("route", route))), stats.latency)
+                for name, histogram in list(stats.stages.items()):
+                    merge(("fuzzy_stage_duration_seconds", (("route", route), ("stage", name))), histogram)
+        samples[("fuzzy_http_requests_in_flight", ())] = in_flight
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                samples[(name, labels)] = value
+        return samples, histograms
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        samples, histograms = self.collect()
+        lines_by_name: dict[str, list[str]] = {}
+        for (name, labels), value in samples.items():
+            lines_by_name.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in histograms.items():
+            lines = lines_by_name.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), histogram[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        
+        out = []
+        for name in sorted(lines_by_name):
+            kind, text = self._help.get(name, ("untyped", ""))
+            if text:
+                out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(sorted(lines_by_name[name]))
+        return "\n".join(out) + "\n"
+
+
+def _number(value) -> str:
+    """Format a sample value or bucket bound."""
+    if isinstance(value, str):
+        return value
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _escape(value) -> str:
+    """Escape a label value per the text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: tuple) -> str:
+    """Render {name="value",...}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class RequestTimer:
+    """Per-request stage durations, shared with worker threads via contextvars."""
+    
+    __slots__ = ("started", "stages")
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+
+_current: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar("request_timer", default=None)
+
+
+class stage:
+    """
+    Time a block as one stage of the current request.
+    
+    Durations of repeated stages add up. The first stage of a request
+    also closes the "validation" stage: everything since the request
+    started (body parsing, pydantic validation, routing). Outside a
+    request this does nothing.
+    
+        with stage("engine"):
+            result = calculate_readiness(...)
+    """
+    
+    __slots__ = ("name", "timer", "start")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self):
+        self.timer = timer = _current.get()
+        self.start = start = time.perf_counter()
+        if timer is not None and not timer.stages:
+            timer.stages["validation"] = start - timer.started
+        return self
+    
+    def __exit__(self, *exc_info):
+        timer = self.timer
+        if timer is not None:
+            stages = timer.stages
+            stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, latency and stages.
+    
+    Routes are labelled with their path template (e.g. /api/stream/{engine})
+    so path parameters do not multiply series; unmatched paths share the
+    "unmatched" label.
+    
+    Args:
+        app: ASGI application
+        registry: MetricsRegistry to record into
+    """
+    
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+        self._route_paths: dict = {}
+        registry.describe("fuzzy_http_requests_total", "counter", "HTTP requests by method, route and status.")
+        registry.describe("fuzzy_http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+        registry.describe("fuzzy_http_requests_in_flight", "gauge", "HTTP requests being served.")
+        registry.describe(
+            "fuzzy_stage_duration_seconds",
+            "histogram",
+            "Time per request stage (validation, engine, recommendation, serialization) by route.",
+        )
+    
+    def _route(self, scope) -> str:
+        """Path template of the endpoint the router matched."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = self._route_paths[endpoint] = route.path
+                    break
+            else:
+                return "unmatched"
+        return path
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timer = RequestTimer()
+        token = _current.set(timer)
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        # The request starts and ends on the event loop thread, so the
+        # in-flight count stays balanced within one shard
+        shard = self.registry.shard()
+        shard.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            shard.in_flight -= 1
+            _current.reset(token)
+            elapsed = time.perf_counter() - timer.started
+            self.registry.record_request(shard, scope["method"], self._route(scope), status, elapsed, timer.stages)
+
+
+# Process-wide registry used by the API
+registry = MetricsRegistry()
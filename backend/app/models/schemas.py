@@ -1,6 +1,41 @@
 """Pydantic models for all fuzzy fitness API inputs and outputs."""
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Optional, Literal
+
+# Upper bound on rows accepted by the batch endpoints
+MAX_BATCH_ROWS = 100_000
+
+
+def check_columns(model: BaseModel, constraints: dict) -> None:
+    """
+    Validate equal-length columns of a batch input model.
+    
+    Args:
+        model: Batch input model whose fields are lists
+        constraints: Numeric field name -> {"ge"/"gt"/"le"/"lt": bound},
+            mirroring the per-field constraints of the single-row models
+    
+    Raises:
+        ValueError: If lengths differ or any value violates a constraint
+    """
+    lengths = {name: len(getattr(model, name)) for name in model.model_fields}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"all columns must have the same length, got {lengths}")
+    checks = {
+        "ge": np.greater_equal,
+        "gt": np.greater,
+        "le": np.less_equal,
+        "lt": np.less,
+    }
+    for name, bounds in constraints.items():
+        column = np.asarray(getattr(model, name), dtype=float)
+        valid = np.isfinite(column)
+        for op, bound in bounds.items():
+            valid &= checks[op](column, bound)
+        if not valid.all():
+            row = int(np.argmin(valid))
+            raise ValueError(f"{name}[{row}] = {column[row]} must satisfy {bounds}")
 
 
 # Readiness Models
@@ -21,6 +56,96 @@ class ReadinessOutput(BaseModel):
     input_memberships: dict = Field(..., description="Membership values for inputs")
 
 
+class ReadinessBatchInput(BaseModel):
+    """Column-wise input for batch workout readiness calculation."""
+    sleep: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Sleep quality per row (0-10)")
+    energy: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Energy level per row (0-10)")
+    soreness: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Muscle soreness per row (0-10)")
+    stress: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Stress level per row (0-10)")
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {name: {"ge": 0, "le": 10} for name in ("sleep", "energy", "soreness", "stress")})
+        return self
+
+
+class ReadinessBatchOutput(BaseModel):
+    """Column-wise output for batch workout readiness calculation (one entry per input row)."""
+    intensity: list[float] = Field(..., description="Recommended intensity per row (0-100)")
+    label: list[str] = Field(..., description="Intensity label per row")
+    confidence: list[float] = Field(..., description="Confidence per row")
+    input_memberships: dict[str, dict[str, list[float]]] = Field(
+        ..., description="Membership values per input and term, one entry per row"
+    )
+    recommendation: Optional[list[str]] = Field(
+        None, description="Natural language recommendation per row (with ?recommendations=true)"
+    )
+
+
+# Readiness forecast limits: days of history per athlete, athletes per
+# request, and evaluated rows (athletes x (1 + scenarios) x days)
+MAX_FORECAST_HISTORY = 90
+MAX_FORECAST_ATHLETES = 10_000
+MAX_FORECAST_ROWS = 1_000_000
+
+
+class ReadinessSeries(BaseModel):
+    """Recent daily check-ins of one athlete, oldest first."""
+    sleep: list[float] = Field(..., min_length=1, max_length=MAX_FORECAST_HISTORY, description="Sleep quality per day (0-10)")
+    energy: list[float] = Field(..., min_length=1, max_length=MAX_FORECAST_HISTORY, description="Energy level per day (0-10)")
+    soreness: list[float] = Field(..., min_length=1, max_length=MAX_FORECAST_HISTORY, description="Muscle soreness per day (0-10)")
+    stress: list[float] = Field(..., min_length=1, max_length=MAX_FORECAST_HISTORY, description="Stress level per day (0-10)")
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {name: {"ge": 0, "le": 10} for name in ("sleep", "energy", "soreness", "stress")})
+        return self
+
+
+class ReadinessForecastInput(BaseModel):
+    """Check-in series of one or more athletes to forecast."""
+    athletes: list[ReadinessSeries] = Field(
+        ..., min_length=1, max_length=MAX_FORECAST_ATHLETES, description="Recent check-ins per athlete"
+    )
+    user_ids: Optional[list[str]] = Field(None, description="Athlete ids, echoed back in order")
+    days: int = Field(7, ge=1, le=28, description="Days to forecast")
+    window: int = Field(14, ge=2, le=MAX_FORECAST_HISTORY, description="Most recent days used to fit each trend")
+    damping: float = Field(1.0, gt=0, le=1, description="Trend damping per day (1 = linear extrapolation)")
+    scenarios: int = Field(0, ge=0, le=1000, description="Random scenario paths per athlete")
+    seed: Optional[int] = Field(None, description="Seed of the scenario paths")
+    
+    @model_validator(mode="after")
+    def validate_size(self):
+        if self.user_ids is not None and len(self.user_ids) != len(self.athletes):
+            raise ValueError(f"user_ids has {len(self.user_ids)} entries for {len(self.athletes)} athletes")
+        rows = len(self.athletes) * (1 + self.scenarios) * self.days
+        if rows > MAX_FORECAST_ROWS:
+            raise ValueError(f"athletes x (1 + scenarios) x days = {rows} exceeds {MAX_FORECAST_ROWS}")
+        return self
+
+
+class ReadinessForecastScenarios(BaseModel):
+    """Scenario path summaries, one row per athlete and one entry per day."""
+    intensity_p10: list[list[float]] = Field(..., description="10th percentile intensity")
+    intensity_p50: list[list[float]] = Field(..., description="Median intensity")
+    intensity_p90: list[list[float]] = Field(..., description="90th percentile intensity")
+    label_probability: dict[str, list[list[float]]] = Field(..., description="Share of paths per label")
+
+
+class ReadinessForecastOutput(BaseModel):
+    """Projected readiness, one row per athlete and one entry per forecast day."""
+    day: list[int] = Field(..., description="Days ahead (1 = tomorrow)")
+    user_ids: Optional[list[str]] = Field(None, description="Athlete ids, as given")
+    sleep: list[list[float]] = Field(..., description="Projected sleep quality")
+    energy: list[list[float]] = Field(..., description="Projected energy level")
+    soreness: list[list[float]] = Field(..., description="Projected muscle soreness")
+    stress: list[list[float]] = Field(..., description="Projected stress level")
+    intensity: list[list[float]] = Field(..., description="Projected intensity (0-100)")
+    label: list[list[str]] = Field(..., description="Projected intensity label")
+    confidence: list[list[float]] = Field(..., description="Confidence of the projected intensity")
+    scenarios: Optional[ReadinessForecastScenarios] = Field(None, description="With scenarios > 0")
+
+
 # Body Composition Models
 class BodyCompInput(BaseModel):
     """Input for body composition estimation."""
@@ -46,6 +171,37 @@ class BodyCompOutput(BaseModel):
     recommendation: str = Field(..., description="Natural language recommendation")
 
 
+class BodyCompBatchInput(BaseModel):
+    """Column-wise input for batch body composition estimation."""
+    weight: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Weight in kg per row")
+    height: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Height in cm per row")
+    waist: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Waist circumference in cm per row")
+    activity_level: list[Literal["sedentary", "light", "moderate", "active", "very_active"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Activity level per row"
+    )
+    build_type: list[Literal["ectomorph", "mesomorph", "endomorph"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Body build type per row"
+    )
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {name: {"gt": 0} for name in ("weight", "height", "waist")})
+        return self
+
+
+class BodyCompBatchOutput(BaseModel):
+    """Column-wise output for batch body composition estimation (one entry per input row)."""
+    body_fat_low: list[float] = Field(..., description="Lower bound body fat % per row")
+    body_fat_mid: list[float] = Field(..., description="Mid estimate body fat % per row")
+    body_fat_high: list[float] = Field(..., description="Upper bound body fat % per row")
+    muscle_mass_category: list[str] = Field(..., description="Muscle mass category per row")
+    bmi: list[float] = Field(..., description="Body Mass Index per row")
+    bmi_interpretation: list[str] = Field(..., description="Fuzzy BMI interpretation per row")
+    recommendation: Optional[list[str]] = Field(
+        None, description="Natural language recommendation per row (with ?recommendations=true)"
+    )
+
+
 # Strength/1RM Models
 class StrengthInput(BaseModel):
     """Input for 1RM estimation."""
@@ -66,6 +222,70 @@ class StrengthOutput(BaseModel):
     recommendation: str = Field(..., description="Natural language recommendation")
 
 
+class StrengthBatchInput(BaseModel):
+    """Column-wise input for batch 1RM estimation."""
+    weight_lifted: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Weight lifted in kg per row")
+    reps: list[str] = Field(..., max_length=MAX_BATCH_ROWS, description="Reps performed per row (can be fuzzy)")
+    rpe: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Rate of Perceived Exertion per row (1-10)")
+    form_quality: list[Literal["poor", "fair", "good", "excellent"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Form quality assessment per row"
+    )
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {"weight_lifted": {"gt": 0}, "rpe": {"ge": 1, "le": 10}})
+        return self
+
+
+# Upper bound on sets in one training session
+MAX_SESSION_SETS = 1000
+
+
+class StrengthSessionInput(BaseModel):
+    """Column-wise sets of one lift in one session, one entry per set."""
+    weight_lifted: list[float] = Field(
+        ..., min_length=1, max_length=MAX_SESSION_SETS, description="Weight lifted in kg per set"
+    )
+    reps: list[str] = Field(
+        ..., min_length=1, max_length=MAX_SESSION_SETS, description="Reps performed per set (can be fuzzy)"
+    )
+    rpe: list[float] = Field(
+        ..., min_length=1, max_length=MAX_SESSION_SETS, description="Rate of Perceived Exertion per set (1-10)"
+    )
+    form_quality: list[Literal["poor", "fair", "good", "excellent"]] = Field(
+        ..., min_length=1, max_length=MAX_SESSION_SETS, description="Form quality assessment per set"
+    )
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {"weight_lifted": {"gt": 0}, "rpe": {"ge": 1, "le": 10}})
+        return self
+
+
+class StrengthSessionOutput(BaseModel):
+    """Session 1RM range fused from all sets."""
+    one_rm_low: float = Field(..., description="Lower bound 1RM estimate")
+    one_rm_mid: float = Field(..., description="Mid 1RM estimate")
+    one_rm_high: float = Field(..., description="Upper bound 1RM estimate")
+    confidence: float = Field(..., ge=0, le=1, description="Confidence in estimate")
+    effective_sets: float = Field(..., description="Effective number of sets behind the estimate")
+    top_set: int = Field(..., description="Index of the most heavily weighted set")
+    set_one_rm: list[float] = Field(..., description="1RM estimate per set")
+    set_weight: list[float] = Field(..., description="Weight of each set in the fused estimate")
+    recommendation: str = Field(..., description="Natural language recommendation")
+
+
+class StrengthBatchOutput(BaseModel):
+    """Column-wise output for batch 1RM estimation (one entry per input row)."""
+    one_rm_low: list[float] = Field(..., description="Lower bound 1RM estimate per row")
+    one_rm_mid: list[float] = Field(..., description="Mid 1RM estimate per row")
+    one_rm_high: list[float] = Field(..., description="Upper bound 1RM estimate per row")
+    confidence: list[float] = Field(..., description="Confidence in estimate per row")
+    recommendation: Optional[list[str]] = Field(
+        None, description="Natural language recommendation per row (with ?recommendations=true)"
+    )
+
+
 # Nutrition Models
 class NutritionInput(BaseModel):
     """Input for macro calculation."""
@@ -93,3 +313,62 @@ class NutritionOutput(BaseModel):
     fat_mid: float = Field(..., description="Mid estimate fat (g)")
     fat_high: float = Field(..., description="Upper bound fat (g)")
     recommendation: str = Field(..., description="Natural language recommendation")
+
+
+class NutritionBatchInput(BaseModel):
+    """Column-wise input for batch macro calculation."""
+    weight: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Weight in kg per row")
+    goal: list[Literal["cut", "maintain", "bulk"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Fitness goal per row"
+    )
+    activity_level: list[Literal["sedentary", "light", "moderate", "active", "very_active"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Activity level per row"
+    )
+    metabolism: list[Literal["slow", "normal", "fast"]] = Field(
+        ..., max_length=MAX_BATCH_ROWS, description="Metabolism type per row"
+    )
+    adherence: list[float] = Field(..., max_length=MAX_BATCH_ROWS, description="Diet adherence ability per row (0-1)")
+    
+    @model_validator(mode="after")
+    def validate_columns(self):
+        check_columns(self, {"weight": {"gt": 0}, "adherence": {"ge": 0, "le": 1}})
+        return self
+
+
+class NutritionBatchOutput(BaseModel):
+    """Column-wise output for batch macro calculation (one entry per input row)."""
+    calories_low: list[float] = Field(..., description="Lower bound daily calories per row")
+    calories_mid: list[float] = Field(..., description="Mid estimate daily calories per row")
+    calories_high: list[float] = Field(..., description="Upper bound daily calories per row")
+    protein_low: list[float] = Field(..., description="Lower bound protein (g) per row")
+    protein_mid: list[float] = Field(..., description="Mid estimate protein (g) per row")
+    protein_high: list[float] = Field(..., description="Upper bound protein (g) per row")
+    carbs_low: list[float] = Field(..., description="Lower bound carbs (g) per row")
+    carbs_mid: list[float] = Field(..., description="Mid estimate carbs (g) per row")
+    carbs_high: list[float] = Field(..., description="Upper bound carbs (g) per row")
+    fat_low: list[float] = Field(..., description="Lower bound fat (g) per row")
+    fat_mid: list[float] = Field(..., description="Mid estimate fat (g) per row")
+    fat_high: list[float] = Field(..., description="Upper bound fat (g) per row")
+    recommendation: Optional[list[str]] = Field(
+        None, description="Natural language recommendation per row (with ?recommendations=true)"
+    )
+
+
+# Dashboard Models
+class DashboardInput(BaseModel):
+    """Input blocks for all dashboard cards, validated per section."""
+    readiness: Optional[dict] = Field(None, description="ReadinessInput fields")
+    body_composition: Optional[dict] = Field(None, description="BodyCompInput fields")
+    strength: Optional[dict] = Field(None, description="StrengthInput fields")
+    nutrition: Optional[dict] = Field(None, description="NutritionInput fields")
+
+
+class DashboardOutput(BaseModel):
+    """Output for all dashboard cards; failed sections are null with an entry in errors."""
+    readiness: Optional[ReadinessOutput] = None
+    body_composition: Optional[BodyCompOutput] = None
+    strength: Optional[StrengthOutput] = None
+    nutrition: Optional[NutritionOutput] = None
+    errors: dict[str, list[dict[str, Any]]] = Field(
+        default_factory=dict, description="Validation errors per failed section"
+    )
@@ -0,0 +1,233 @@
+"""
+Server-side user profiles with write-behind SQLite persistence.
+
+Requests carrying X-User-Id have their inputs and results recorded per
+dashboard section. Recording only buffers the row in memory; a writer
+task flushes buffered rows in batches on a dedicated thread, so
+persistence never adds database latency to the request. Reads see
+buffered rows before they reach the database.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import ENGINES
+from app.metrics import MetricsRegistry
+from app.serialization import dumps_json, loads_json
+
+
+logger = logging.getLogger(__name__)
+
+MAX_USER_ID_LENGTH = 128
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_sections (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    result TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, section)
+) WITHOUT ROWID
+"""
+
+UPSERT = "INSERT OR REPLACE INTO profile_sections VALUES (?, ?, ?, ?, ?)"
+
+SELECT = "SELECT section, inputs, result, updated_at FROM profile_sections WHERE user_id = ?"
+
+
+def valid_user_id(user_id: Optional[str]) -> bool:
+    """Whether a user id is non-empty, printable and at most MAX_USER_ID_LENGTH characters."""
+    return bool(user_id) and len(user_id) <= MAX_USER_ID_LENGTH and user_id.isprintable()
+
+
+class ProfileStore:
+    """
+    Last inputs and results per (user, section) in a WAL-mode SQLite file.
+    
+    Rows are keyed by the (user_id, section) primary key of a WITHOUT
+    ROWID table, so a profile read is a single index range scan. Pending
+    rows are coalesced per key, so a user updating a section many times
+    between flushes costs one write.
+    
+    Args:
+        path: SQLite database file
+        batch_size: Pending rows that trigger an immediate flush
+        flush_interval: Seconds a row may wait for a batch to fill up
+        max_pending: Pending rows beyond which new keys are dropped
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        max_pending: int = 100_000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._writing = {}
+        self._reader = None
+        self._writer = None
+        self._pool = None
+        self._task = None
+        self._ready = None
+        self._full = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+    
+    async def start(self) -> None:
+        """Open the database and start the writer task."""
+        self._writer = self._connect()
+        self._writer.execute(SCHEMA)
+        self._writer.commit()
+        self._reader = self._connect()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        if self._pending:
+            self._ready.set()
+        self._task = asyncio.create_task(self._run())
+    
+    async def close(self) -> None:
+        """Flush pending rows, stop the writer and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await self._flush()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for connection in (self._reader, self._writer):
+            if connection is not None:
+                connection.close()
+        self._reader = self._writer = None
+    
+    def record(self, user_id: str, section: str, inputs: dict, result: dict) -> None:
+        """
+        Buffer a section's latest inputs and result for writing.
+        
+        Called on the event loop; returns without touching the database.
+        """
+        key = (user_id, section)
+        if key not in self._pending and len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending[key] = (inputs, result, time.time())
+        if self._ready is not None:
+            self._ready.set()
+            if len(self._pending) >= self.batch_size:
+                self._full.set()
+    
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+    
+    async def _flush(self) -> None:
+        self._writing, self._pending = self._pending, {}
+        self._ready.clear()
+        self._full.clear()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._pool, self._write, self._writing)
+        except Exception:
+            self.failed += len(self._writing)
+            logger.exception("Failed to write %d profile rows", len(self._writing))
+        finally:
+            self._writing = {}
+    
+    def _write(self, rows: dict) -> None:
+        """Encode and upsert one batch in a single transaction (writer thread)."""
+        params = [
+            (user_id, section, dumps_json(inputs).decode(), dumps_json(result).decode(), updated_at)
+            for (user_id, section), (inputs, result, updated_at) in rows.items()
+        ]
+        with self._writer:
+            self._writer.executemany(UPSERT, params)
+        self.written += len(params)
+        self.batches += 1
+    
+    def _read(self, user_id: str) -> dict:
+        """A user's written sections (writer thread)."""
+        return {
+            section: (loads_json(inputs), loads_json(result), updated_at)
+            for section, inputs, result, updated_at in self._reader.execute(SELECT, (user_id,))
+        }
+    
+    async def get(self, user_id: str) -> Optional[dict]:
+        """
+        A user's stored sections, including rows not yet written.
+        
+        The query runs on the writer thread, so it never blocks the event
+        loop and sees every batch whose write started before it.
+        
+        Returns:
+            {"user_id", "updated_at", "inputs": {section: ...},
+            "results": {section: ...}}, or None if the user has no sections
+        """
+        sections = {}
+        if self._reader is not None:
+            sections = await asyncio.get_running_loop().run_in_executor(self._pool, self._read, user_id)
+        for buffer in (self._writing, self._pending):
+            for section in ENGINES:
+                row = buffer.get((user_id, section))
+                if row is not None:
+                    sections[section] = row
+        if not sections:
+            return None
+        return {
+            "user_id": user_id,
+            "updated_at": max(updated_at for _, _, updated_at in sections.values()),
+            "inputs": {section: row[0] for section, row in sections.items()},
+            "results": {section: row[1] for section, row in sections.items()},
+        }
+    
+    def stats(self) -> dict:
+        """Write-behind queue counters."""
+        return {
+            "pending": len(self._pending) + len(self._writing),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+    
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        """Expose the queue counters on a metrics registry at scrape time."""
+        registry.describe("fuzzy_profile_pending_rows", "gauge", "Profile rows waiting to be written.")
+        registry.describe("fuzzy_profile_written_total", "counter", "Profile rows written to SQLite.")
+        registry.describe("fuzzy_profile_batches_total", "counter", "Profile write batches.")
+        registry.describe("fuzzy_profile_dropped_total", "counter", "Profile rows dropped on a full queue.")
+        registry.describe("fuzzy_profile_failed_total", "counter", "Profile rows lost to write errors.")
+        
+        def samples():
+            stats = self.stats()
+            yield "fuzzy_profile_pending_rows", (), stats["pending"]
+            for counter in ("written", "batches", "dropped", "failed"):
+                yield f"fuzzy_profile_{counter}_total", (), stats[counter]
+        
+        registry.register_collector(samples)
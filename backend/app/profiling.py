@@ -0,0 +1,163 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries X-Profile with the admin token in
+X-Profile-Token, or when it is picked by the sampling rate. Its handler
+runs under cProfile (a .pstats file) or a stack sampler (a .collapsed
+file of folded stacks for flamegraph tools), and the response names the
+artifact in X-Profile-Id. The middleware is only installed when a token
+or a sampling rate is configured.
+"""
+import contextvars
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+
+MODES = ("cprofile", "sampling")
+
+EXTENSIONS = {"cprofile": ".pstats", "sampling": ".collapsed"}
+
+# True while the current request is being profiled; engine calls then
+# run inline and skip the result cache so the profile shows the real work
+profiling = contextvars.ContextVar("profiling", default=False)
+
+
+class StackSampler:
+    """
+    Sample one thread's Python stack at a fixed interval.
+    
+    Stacks are folded root-first as "file:function;file:function" and
+    counted, the input format of flamegraph.pl and speedscope. The
+    enable/disable/dump_stats methods mirror cProfile.Profile.
+    
+    Args:
+        thread_id: threading.get_ident() of the thread to sample
+        interval: Seconds between samples
+    """
+    
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+    
+    def enable(self) -> None:
+        self._thread.start()
+    
+    def disable(self) -> None:
+        self._stop.set()
+        self._thread.join()
+    
+    def dump_stats(self, path: str) -> None:
+        """Write "stack count" lines."""
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling selected requests.
+    
+    One request is profiled at a time (cProfile hooks are per thread and
+    the event loop is shared); a request selected while another is being
+    profiled runs normally. Requests overlapping a profile on the event
+    loop show up in it too.
+    
+    Args:
+        app: ASGI application
+        directory: Where profile artifacts are written
+        token: Admin token enabling X-Profile; None disables the header
+        sample_rate: Fraction of requests profiled without the header
+        mode: Default mode, "cprofile" or "sampling"
+        interval: Sampling interval in seconds (sampling mode)
+    """
+    
+    def __init__(
+        self,
+        app,
+        directory: str,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        mode: str = "cprofile",
+        interval: float = 0.001,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.app = app
+        self.directory = directory
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+        self._busy = False
+    
+    def selected_mode(self, scope) -> Optional[str]:
+        """Profiling mode for a request, or None to run it unprofiled."""
+        headers = dict(scope["headers"])
+        requested = headers.get(b"x-profile")
+        if requested is not None and self.token is not None:
+            if hmac.compare_digest(headers.get(b"x-profile-token", b""), self.token):
+                requested = requested.decode("latin-1").strip().lower()
+                return requested if requested in MODES else self.mode
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.mode
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+        mode = self.selected_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:12]}"
+        # Drop conditional headers so the handler runs instead of a 304
+        scope = {**scope, "headers": [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+        
+        self._busy = True
+        token = profiling.set(True)
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            profiling.reset(token)
+            self._busy = False
+        
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, profile_id + EXTENSIONS[mode]))
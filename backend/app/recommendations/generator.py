@@ -1,62 +1,75 @@
-"""Natural language recommendation generator."""
+"""
+Natural language recommendation generator.
 
+Every recommendation is a fixed sentence sequence chosen by a few
+discrete conditions (label, threshold flags, buckets), plus at most a
+few formatted numbers. All sentence sequences are compiled once into
+tables indexed by a small integer key; the scalar generators look up one
+entry and the batch renderers index the tables with NumPy.
+"""
+import numpy as np
 
-def generate_readiness_recommendation(intensity: float, label: str, inputs: dict) -> str:
-    """
-    Generate natural language recommendation for workout readiness.
-    
-    Args:
-        intensity: Calculated intensity (0-100)
-        label: Intensity label
-        inputs: Original input values (sleep, energy, soreness, stress)
-    
-    Returns:
-        Natural language recommendation string
-    """
-    sleep = inputs.get("sleep", 5)
-    energy = inputs.get("energy", 5)
-    soreness = inputs.get("soreness", 5)
-    stress = inputs.get("stress", 5)
-    
+from app.fuzzy_engine.utils import encode_categories
+
+
+# Readiness labels with their own branch; any other label reads as "Beast"
+READINESS_BRANCHES = ("Rest", "Light", "Moderate", "Hard")
+
+# Readiness threshold flags, one bit each (see _readiness_flags)
+READINESS_FLAG_BITS = 7
+
+# Body fat buckets: below 12, below 18, below 25, the rest
+BODY_FAT_BUCKETS = 4
+MUSCLE_BRANCHES = ("Below Average", "Average", "Athletic")
+
+FORM_BRANCHES = ("poor", "fair", "excellent")
+GOAL_BRANCHES = ("cut", "bulk")
+
+
+def _readiness_sentences(branch: int, flags: int) -> list[str]:
+    """Sentences for a readiness label branch and flag bitmask."""
+    sleep_lt_4, soreness_gt_7, stress_gt_7, soreness_gt_5, energy_lt_5, sleep_lt_6, soreness_lt_3 = (
+        bool(flags >> bit & 1) for bit in range(READINESS_FLAG_BITS)
+    )
     recommendations = []
     
-    if label == "Rest":
+    if branch == 0:  # Rest
         recommendations.append(
             "Your body is signaling it needs recovery. "
             "Consider taking a rest day or doing very light mobility work."
         )
-        if sleep < 4:
+        if sleep_lt_4:
             recommendations.append("Prioritize getting quality sleep tonight.")
-        if soreness > 7:
+        if soreness_gt_7:
             recommendations.append("Focus on foam rolling and stretching to aid muscle recovery.")
-        if stress > 7:
+        if stress_gt_7:
             recommendations.append("Try some meditation or breathing exercises to reduce stress.")
     
-    elif label == "Light":
+    elif branch == 1:  # Light
         recommendations.append(
             "A light workout would be beneficial today. "
             "Focus on technique work, mobility, or low-intensity cardio."
         )
-        if soreness > 5:
+        if soreness_gt_5:
             recommendations.append("Include extra warm-up time due to muscle soreness.")
-        if energy < 5:
+        if energy_lt_5:
             recommendations.append("Consider a shorter session to conserve energy.")
     
-    elif label == "Moderate":
+    elif branch == 2:  # Moderate
         recommendations.append(
             "You're ready for a solid moderate workout. "
             "Aim for your regular training with normal intensity."
         )
-        if sleep < 6:
+        if sleep_lt_6:
             recommendations.append("Be mindful of fatigue as your sleep was suboptimal.")
         recommendations.append("Listen to your body and adjust intensity as needed.")
     
-    elif label == "Hard":
+    elif branch == 3:  # Hard
         recommendations.append(
             "Great conditions for a challenging workout! "
             "Push yourself with higher weights or more volume."
         )
-        if soreness < 3:
+        if soreness_lt_3:
             recommendations.append("Your recovery is excellent - take advantage of it.")
         recommendations.append("This is a good day to attempt new PRs or progressive overload.")
     
@@ -70,35 +83,25 @@ def generate_readiness_recommendation(intensity: float, label: str, inputs: dict
             "Attack your hardest lifts and challenge yourself!"
         )
     
-    return " ".join(recommendations)
+    return recommendations
 
 
-def generate_body_comp_recommendation(
-    body_fat_mid: float,
-    muscle_mass_category: str,
-    bmi: float,
-    bmi_interpretation: str
-) -> str:
-    """
-    Generate natural language recommendation for body composition.
-    
-    Returns:
-        Natural language recommendation string
-    """
+def _body_comp_sentences(body_fat_bucket: int, muscle_branch: int) -> list[str]:
+    """Sentences for a body fat bucket and muscle mass branch."""
     recommendations = []
     
     # Body fat commentary
-    if body_fat_mid < 12:
+    if body_fat_bucket == 0:
         recommendations.append(
             "Your estimated body fat is quite low. "
             "Ensure you're eating enough to support training and hormone health."
         )
-    elif body_fat_mid < 18:
+    elif body_fat_bucket == 1:
         recommendations.append(
             "You have an athletic level of body fat. "
             "This range is optimal for performance and aesthetics."
         )
-    elif body_fat_mid < 25:
+    elif body_fat_bucket == 2:
         recommendations.append(
             "Your body fat is in a healthy range. "
             "Focus on building lean muscle through progressive overload."
@@ -110,11 +113,11 @@ def generate_body_comp_recommendation(
         )
     
     # Muscle mass commentary
-    if muscle_mass_category in ["Below Average", "Average"]:
+    if muscle_branch in (0, 1):  # Below Average, Average
         recommendations.append(
             "Consider increasing resistance training frequency to build more muscle mass."
         )
-    elif muscle_mass_category == "Athletic":
+    elif muscle_branch == 2:  # Athletic
         recommendations.append(
             "Your muscle development is excellent. Focus on maintenance and specific goals."
         )
@@ -125,29 +128,19 @@ def generate_body_comp_recommendation(
         "consider DEXA scanning or hydrostatic weighing."
     )
     
-    return " ".join(recommendations)
+    return recommendations
 
 
-def generate_strength_recommendation(
-    one_rm_mid: float,
-    confidence: float,
-    form_quality: str,
-    weight_lifted: float
-) -> str:
-    """
-    Generate natural language recommendation for 1RM estimation.
-    
-    Returns:
-        Natural language recommendation string
-    """
+def _strength_sentences(confidence_bucket: int, form_branch: int) -> list[str]:
+    """Sentences for a confidence bucket and form branch; numbers follow."""
     recommendations = []
     
     # Confidence commentary
-    if confidence > 0.8:
+    if confidence_bucket == 0:
         recommendations.append(
             "This estimate has high confidence based on your input data."
         )
-    elif confidence > 0.6:
+    elif confidence_bucket == 1:
         recommendations.append(
             "This is a reasonable estimate, but actual max may vary by ±5-10%."
         )
@@ -157,57 +150,44 @@ def generate_strength_recommendation(
         )
     
     # Form quality feedback
-    if form_quality == "poor":
+    if form_branch == 0:  # poor
         recommendations.append(
             "⚠️ Improving your form should be priority before attempting heavier loads. "
             "Poor form increases injury risk and limits strength expression."
         )
-    elif form_quality == "fair":
+    elif form_branch == 1:  # fair
         recommendations.append(
             "Work on refining your technique to safely express more strength."
         )
-    elif form_quality == "excellent":
+    elif form_branch == 2:  # excellent
         recommendations.append(
             "Your excellent form allows for safe, maximal strength expression."
         )
     
-    # Training suggestions based on 1RM
-    recommendations.append(
-        f"For strength training, work with 80-90% ({round(one_rm_mid * 0.8)}-{round(one_rm_mid * 0.9)} kg) "
-        f"for 3-5 reps."
-    )
-    recommendations.append(
-        f"For hypertrophy, use 65-75% ({round(one_rm_mid * 0.65)}-{round(one_rm_mid * 0.75)} kg) "
-        f"for 8-12 reps."
-    )
-    
-    return " ".join(recommendations)
+    return recommendations
 
 
-def generate_nutrition_recommendation(
-    calories_mid: float,
-    protein_mid: float,
-    goal: str,
-    adherence: float
-) -> str:
-    """
-    Generate natural language recommendation for nutrition.
-    
-    Returns:
-        Natural language recommendation string
-    """
+# Training suggestions based on 1RM, formatted with rounded kg values
+STRENGTH_LOADS = (
+    "For strength training, work with 80-90% ({}-{} kg) for 3-5 reps. "
+    "For hypertrophy, use 65-75% ({}-{} kg) for 8-12 reps."
+)
+
+
+def _nutrition_sentences(goal_branch: int, adherence_bucket: int) -> list[str]:
+    """Sentences for a goal branch and adherence bucket; "{protein}" is a placeholder."""
     recommendations = []
     
     # Goal-specific advice
-    if goal == "cut":
+    if goal_branch == 0:  # cut
         recommendations.append(
             "For fat loss, you're in a caloric deficit. "
             "Prioritize protein to preserve muscle mass during the cut."
         )
         recommendations.append(
-            f"Aim for at least {round(protein_mid)}g protein spread across 4-5 meals."
+            "Aim for at least {protein}g protein spread across 4-5 meals."
         )
-    elif goal == "bulk":
+    elif goal_branch == 1:  # bulk
         recommendations.append(
             "For muscle gain, you're in a caloric surplus. "
             "Focus on progressive overload to ensure the extra calories build muscle."
@@ -221,12 +201,12 @@ def generate_nutrition_recommendation(
         )
     
     # Adherence-based advice
-    if adherence < 0.5:
+    if adherence_bucket == 0:
         recommendations.append(
             "Given variable adherence, the ranges provided are wider to accommodate flexibility. "
             "Focus on hitting protein goals as the top priority."
         )
-    elif adherence > 0.8:
+    elif adherence_bucket == 1:
         recommendations.append(
             "Your strong adherence allows for tighter targets. "
             "Track closely for optimal results."
@@ -238,4 +218,238 @@ def generate_nutrition_recommendation(
         "aim for 0.5-1% body weight change per week when cutting/bulking."
     )
     
-    return " ".join(recommendations)
+    return recommendations
+
+
+# Compiled tables: one joined string per discrete case
+READINESS_FLAG_CASES = 1 << READINESS_FLAG_BITS
+READINESS_TEMPLATES = np.array([
+    " ".join(_readiness_sentences(branch, flags))
+    for branch in range(len(READINESS_BRANCHES) + 1)
+    for flags in range(READINESS_FLAG_CASES)
+], dtype=object)
+
+MUSCLE_CASES = len(MUSCLE_BRANCHES) + 1
+BODY_COMP_TEMPLATES = np.array([
+    " ".join(_body_comp_sentences(bucket, branch))
+    for bucket in range(BODY_FAT_BUCKETS)
+    for branch in range(MUSCLE_CASES)
+], dtype=object)
+
+FORM_CASES = len(FORM_BRANCHES) + 1
+STRENGTH_PREFIXES = np.array([
+    " ".join([*_strength_sentences(bucket, branch), ""])
+    for bucket in range(3)
+    for branch in range(FORM_CASES)
+], dtype=object)
+
+ADHERENCE_CASES = 3
+NUTRITION_TEMPLATES = np.array([
+    " ".join(_nutrition_sentences(branch, bucket))
+    for branch in range(len(GOAL_BRANCHES) + 1)
+    for bucket in range(ADHERENCE_CASES)
+], dtype=object)
+# "cut" templates split around the protein placeholder, for batch rendering
+NUTRITION_CUT_PARTS = np.array([
+    (template.split("{protein}") + [""])[:2] for template in NUTRITION_TEMPLATES
+], dtype=object)
+
+
+# The key helpers below use only comparisons and arithmetic, so the same
+# code serves plain Python scalars and NumPy arrays.
+def _readiness_flags(sleep, energy, soreness, stress):
+    """Readiness threshold bitmask, in the bit order _readiness_sentences unpacks."""
+    return (
+        (sleep < 4)
+        | (soreness > 7) << 1
+        | (stress > 7) << 2
+        | (soreness > 5) << 3
+        | (energy < 5) << 4
+        | (sleep < 6) << 5
+        | (soreness < 3) << 6
+    )
+
+
+def _body_fat_bucket(body_fat):
+    """0 below 12, 1 below 18, 2 below 25, else 3."""
+    return 3 - (body_fat < 12) - (body_fat < 18) - (body_fat < 25)
+
+
+def _confidence_bucket(confidence):
+    """0 above 0.8, 1 above 0.6, else 2."""
+    return 2 - (confidence > 0.6) - (confidence > 0.8)
+
+
+def _adherence_bucket(adherence):
+    """0 below 0.5, 1 above 0.8, else 2."""
+    return 2 - 2 * (adherence < 0.5) - (adherence > 0.8)
+
+
+def _distinct(values: np.ndarray, render) -> np.ndarray:
+    """Render each distinct value once and spread the strings over the batch."""
+    unique, inverse = np.unique(values, return_inverse=True)
+    text = np.array([render(value) for value in unique.tolist()], dtype=object)
+    return text[inverse.reshape(-1)]
+
+
+def _strength_loads(one_rm_mid: float) -> str:
+    """Training load sentences for one 1RM value."""
+    return STRENGTH_LOADS.format(
+        round(one_rm_mid * 0.8), round(one_rm_mid * 0.9), round(one_rm_mid * 0.65), round(one_rm_mid * 0.75)
+    )
+
+
+def _branch(value: str, branches: tuple) -> int:
+    """Index of value in branches, or len(branches) for anything else."""
+    return branches.index(value) if value in branches else len(branches)
+
+
+def generate_readiness_recommendation(intensity: float, label: str, inputs: dict) -> str:
+    """
+    Generate natural language recommendation for workout readiness.
+    
+    Args:
+        intensity: Calculated intensity (0-100)
+        label: Intensity label
+        inputs: Original input values (sleep, energy, soreness, stress)
+    
+    Returns:
+        Natural language recommendation string
+    """
+    flags = _readiness_flags(
+        inputs.get("sleep", 5),
+        inputs.get("energy", 5),
+        inputs.get("soreness", 5),
+        inputs.get("stress", 5),
+    )
+    return READINESS_TEMPLATES[_branch(label, READINESS_BRANCHES) * READINESS_FLAG_CASES + flags]
+
+
+def generate_body_comp_recommendation(
+    body_fat_mid: float,
+    muscle_mass_category: str,
+    bmi: float,
+    bmi_interpretation: str
+) -> str:
+    """
+    Generate natural language recommendation for body composition.
+    
+    Returns:
+        Natural language recommendation string
+    """
+    bucket = _body_fat_bucket(body_fat_mid)
+    return BODY_COMP_TEMPLATES[bucket * MUSCLE_CASES + _branch(muscle_mass_category, MUSCLE_BRANCHES)]
+
+
+def generate_strength_recommendation(
+    one_rm_mid: float,
+    confidence: float,
+    form_quality: str,
+    weight_lifted: float
+) -> str:
+    """
+    Generate natural language recommendation for 1RM estimation.
+    
+    Returns:
+        Natural language recommendation string
+    """
+    prefix = STRENGTH_PREFIXES[_confidence_bucket(confidence) * FORM_CASES + _branch(form_quality, FORM_BRANCHES)]
+    return prefix + _strength_loads(one_rm_mid)
+
+
+def generate_nutrition_recommendation(
+    calories_mid: float,
+    protein_mid: float,
+    goal: str,
+    adherence: float
+) -> str:
+    """
+    Generate natural language recommendation for nutrition.
+    
+    Returns:
+        Natural language recommendation string
+    """
+    branch = _branch(goal, GOAL_BRANCHES)
+    key = branch * ADHERENCE_CASES + _adherence_bucket(adherence)
+    if branch == 0:
+        return NUTRITION_CUT_PARTS[key, 0] + str(round(protein_mid)) + NUTRITION_CUT_PARTS[key, 1]
+    return NUTRITION_TEMPLATES[key]
+
+
+def generate_readiness_recommendations(labels, sleep, energy, soreness, stress) -> np.ndarray:
+    """
+    Render readiness recommendations for a batch.
+    
+    Args:
+        labels: Intensity labels, shape (N,)
+        sleep, energy, soreness, stress: Input values, shape (N,)
+    
+    Returns:
+        Object array of recommendation strings, shape (N,)
+    """
+    flags = _readiness_flags(*(np.asarray(v, dtype=float) for v in (sleep, energy, soreness, stress)))
+    return READINESS_TEMPLATES[encode_categories(labels, READINESS_BRANCHES) * READINESS_FLAG_CASES + flags]
+
+
+def generate_body_comp_recommendations(body_fat_mid, muscle_mass_category) -> np.ndarray:
+    """
+    Render body composition recommendations for a batch.
+    
+    Args:
+        body_fat_mid: Mid body fat estimates, shape (N,)
+        muscle_mass_category: Muscle mass categories, shape (N,)
+    
+    Returns:
+        Object array of recommendation strings, shape (N,)
+    """
+    buckets = _body_fat_bucket(np.asarray(body_fat_mid, dtype=float))
+    return BODY_COMP_TEMPLATES[buckets * MUSCLE_CASES + encode_categories(muscle_mass_category, MUSCLE_BRANCHES)]
+
+
+def generate_strength_recommendations(one_rm_mid, confidence, form_quality) -> np.ndarray:
+    """
+    Render 1RM recommendations for a batch.
+    
+    The sentences come from the compiled table; the kg values are
+    formatted once per distinct 1RM in the batch.
+    
+    Args:
+        one_rm_mid: Mid 1RM estimates, shape (N,)
+        confidence: Estimate confidence, shape (N,)
+        form_quality: Form quality values, shape (N,)
+    
+    Returns:
+        Object array of recommendation strings, shape (N,)
+    """
+    one_rm_mid = np.asarray(one_rm_mid, dtype=float)
+    keys = (
+        _confidence_bucket(np.asarray(confidence, dtype=float)) * FORM_CASES
+        + encode_categories(form_quality, FORM_BRANCHES)
+    )
+    return STRENGTH_PREFIXES[keys] + _distinct(one_rm_mid, _strength_loads)
+
+
+def generate_nutrition_recommendations(protein_mid, goal, adherence) -> np.ndarray:
+    """
+    Render nutrition recommendations for a batch.
+    
+    Only "cut" rows carry a number (protein grams, formatted once per
+    distinct value); all other rows are taken from the compiled table as is.
+    
+    Args:
+        protein_mid: Mid protein targets, shape (N,)
+        goal: Goals, shape (N,)
+        adherence: Diet adherence values, shape (N,)
+    
+    Returns:
+        Object array of recommendation strings, shape (N,)
+    """
+    branches = encode_categories(goal, GOAL_BRANCHES)
+    keys = branches * ADHERENCE_CASES + _adherence_bucket(np.asarray(adherence, dtype=float))
+    rendered = NUTRITION_TEMPLATES[keys]
+    cut = np.flatnonzero(branches == 0)
+    if cut.size:
+        parts = NUTRITION_CUT_PARTS[keys[cut]]
+        protein = _distinct(np.asarray(protein_mid, dtype=float)[cut], lambda grams: str(round(grams)))
+        rendered[cut] = parts[:, 0] + (protein + parts[:, 1])
+    return rendered
@@ -0,0 +1,149 @@
+"""Fast response encoding with JSON/msgpack content negotiation."""
+import json
+from typing import Any, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.metrics import stage
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+# Batch columns as raw little-endian buffers (numbers) or coded categories
+COLUMNAR_MSGPACK = "application/vnd.fuzzy.columnar+msgpack"
+
+MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _default(obj: Any) -> Any:
+    """Convert NumPy values the encoders do not handle natively."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode to JSON bytes, passing NumPy arrays straight to orjson."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def loads_json(data: bytes) -> Any:
+    """Decode JSON bytes; raises ValueError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    """Encode to msgpack bytes with the same structure as the JSON form."""
+    return msgpack.packb(content, default=_default)
+
+
+def _columnar(value: Any) -> Any:
+    """Replace arrays with typed buffers or category codes, recursively."""
+    if isinstance(value, dict):
+        return {key: _columnar(item) for key, item in value.items()}
+    if not isinstance(value, np.ndarray):
+        return value
+    if value.dtype.kind in "biuf":
+        data = np.ascontiguousarray(value, dtype=value.dtype.newbyteorder("<"))
+        return {"dtype": data.dtype.str, "shape": list(data.shape), "data": data.tobytes()}
+    categories, codes = np.unique(value.astype(str), return_inverse=True)
+    codes = codes.astype(np.uint8 if len(categories) <= 256 else np.uint32).reshape(value.shape)
+    return {
+        "categories": categories.tolist(),
+        "dtype": codes.dtype.str,
+        "shape": list(codes.shape),
+        "codes": codes.tobytes(),
+    }
+
+
+def pack_columnar(content: dict) -> bytes:
+    """
+    Encode a dict of batch columns as compact columnar msgpack.
+    
+    Numeric arrays become {"dtype", "shape", "data"} with data the raw
+    little-endian buffer (np.frombuffer(data, dtype).reshape(shape) decodes
+    it); string arrays become {"categories", "dtype", "shape", "codes"}.
+    """
+    return msgpack.packb(_columnar(content), default=_default)
+
+
+def negotiate(accept: Optional[str], columnar: bool = False) -> str:
+    """
+    Pick a media type from an Accept header.
+    
+    Honors q-values; msgpack types are only chosen when msgpack is
+    installed and the columnar type only on batch endpoints. Anything else
+    falls back to JSON.
+    
+    Args:
+        accept: Raw Accept header, or None
+        columnar: Whether the endpoint supports the columnar form
+    
+    Returns:
+        JSON, MSGPACK or COLUMNAR_MSGPACK
+    """
+    if not accept or msgpack is None:
+        return JSON
+    offers = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offers.append((-quality, position, media_type.lower()))
+    for negative_quality, _, media_type in sorted(offers):
+        if negative_quality >= 0:
+            break
+        if media_type == COLUMNAR_MSGPACK and columnar:
+            return COLUMNAR_MSGPACK
+        if media_type in MSGPACK_ALIASES:
+            return MSGPACK
+        if media_type in (JSON, "application/*", "*/*"):
+            return JSON
+    return JSON
+
+
+def render(request: Request, content: Any, columnar: bool = False) -> Response:
+    """
+    Encode a response body for the media type the client accepts.
+    
+    Args:
+        request: Incoming request (for its Accept header)
+        content: Plain dicts, lists, scalars and NumPy arrays
+        columnar: Allow the columnar msgpack form (batch endpoints)
+    
+    Returns:
+        Response with the encoded body and matching Content-Type
+    """
+    media_type = negotiate(request.headers.get("accept"), columnar)
+    with stage("serialization"):
+        if media_type == COLUMNAR_MSGPACK:
+            body = pack_columnar(content)
+        elif media_type == MSGPACK:
+            body = dumps_msgpack(content)
+        else:
+            body = dumps_json(content)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
@@ -0,0 +1,427 @@
+"""Engine and recommendation pipelines shared by the API routes."""
+import hashlib
+from functools import lru_cache, wraps
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.cache import EngineCache
+from app.config import settings
+from app.executor import BACKENDS, EngineExecutor
+from app.metrics import MetricsRegistry, stage
+from app.profiles import ProfileStore
+from app.storage.history import SCHEMAS as HISTORY_SCHEMAS, HistoryWriter
+from app.trends import TrendTracker
+from app.profiling import profiling
+from app.models.schemas import (
+    ReadinessInput, ReadinessOutput,
+    BodyCompInput, BodyCompOutput,
+    StrengthInput, StrengthOutput,
+    StrengthSessionInput, StrengthSessionOutput,
+    NutritionInput, NutritionOutput,
+)
+from app.fuzzy_engine import body_comp, nutrition, readiness, strength
+from app.fuzzy_engine.readiness import calculate_readiness, calculate_readiness_batch
+from app.fuzzy_engine.forecast import forecast_readiness
+from app.fuzzy_engine.lut import ReadinessLUT
+from app.fuzzy_engine.system import DEFUZZIFICATION_METHODS
+from app.fuzzy_engine.body_comp import estimate_body_composition
+from app.fuzzy_engine.strength import estimate_one_rep_max, estimate_session_one_rep_max
+from app.fuzzy_engine.nutrition import calculate_nutrition
+from app.recommendations.generator import (
+    generate_readiness_recommendation,
+    generate_body_comp_recommendation,
+    generate_strength_recommendation,
+    generate_nutrition_recommendation,
+    generate_readiness_recommendations,
+    generate_body_comp_recommendations,
+    generate_strength_recommendations,
+    generate_nutrition_recommendations,
+)
+
+
+# Bump when engine or recommendation code changes its output
+ENGINE_VERSION = "1"
+
+
+@lru_cache(maxsize=1)
+def engine_version() -> str:
+    """
+    Version of everything that shapes a response: ENGINE_VERSION, the
+    engines' rule and parameter tables, and output-affecting settings.
+    """
+    source = repr((
+        ENGINE_VERSION,
+        readiness.INPUT_MF, readiness.INTENSITY_MF, readiness.READINESS_RULES,
+        body_comp.BMI_MF, body_comp.ACTIVITY_MULTIPLIERS, body_comp.BUILD_ADJUSTMENTS,
+        strength.FORM_ADJUSTMENTS, strength.FUZZY_REP_TERMS,
+        nutrition.ACTIVITY_MULTIPLIERS, nutrition.GOAL_ADJUSTMENTS, nutrition.METABOLISM_VALUES,
+        settings.readiness_defuzzification, settings.readiness_lut, settings.readiness_lut_step,
+        settings.cache_quantize,
+    ))
+    return f"{ENGINE_VERSION}-{hashlib.sha1(source.encode()).hexdigest()[:12]}"
+
+
+# Checked at import so a bad setting fails at startup rather than per request
+if settings.readiness_defuzzification not in DEFUZZIFICATION_METHODS:
+    raise ValueError(
+        f"readiness_defuzzification must be one of {DEFUZZIFICATION_METHODS}, "
+        f"got {settings.readiness_defuzzification!r}"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_readiness_lut() -> ReadinessLUT:
+    """Build (or load from the cache directory) the readiness lookup table."""
+    return ReadinessLUT(
+        step=settings.readiness_lut_step,
+        defuzzification=settings.readiness_defuzzification,
+        cache_dir=settings.readiness_lut_dir,
+        error_samples=settings.readiness_lut_error_samples,
+    )
+
+
+def readiness_lut() -> ReadinessLUT | None:
+    """The readiness lookup table if LUT mode is enabled, else None."""
+    return get_readiness_lut() if settings.readiness_lut else None
+
+
+def readiness_batch(sleep, energy, soreness, stress) -> dict:
+    """
+    Batch readiness, from the lookup table when LUT mode is on.
+    
+    Module-level so the process backend can pickle it; worker processes
+    build or load their own table.
+    """
+    return calculate_readiness_batch(
+        sleep, energy, soreness, stress,
+        defuzzification=settings.readiness_defuzzification,
+        lut=readiness_lut(),
+    )
+
+
+def readiness_forecast(history, days: int, scenarios: int, damping: float, seed=None) -> dict:
+    """Readiness forecast, from the lookup table when LUT mode is on."""
+    with stage("engine"):
+        return forecast_readiness(
+            history, days, scenarios, damping, seed,
+            defuzzification=settings.readiness_defuzzification,
+            lut=readiness_lut(),
+        )
+
+
+def readiness_batch_recommendations(columns: dict, result: dict):
+    """Readiness recommendations for a batch result."""
+    return generate_readiness_recommendations(
+        result["label"], columns["sleep"], columns["energy"], columns["soreness"], columns["stress"]
+    )
+
+
+def body_comp_batch_recommendations(columns: dict, result: dict):
+    """Body composition recommendations for a batch result."""
+    return generate_body_comp_recommendations(result["body_fat_mid"], result["muscle_mass_category"])
+
+
+def strength_batch_recommendations(columns: dict, result: dict):
+    """1RM recommendations for a batch result."""
+    return generate_strength_recommendations(result["one_rm_mid"], result["confidence"], columns["form_quality"])
+
+
+def nutrition_batch_recommendations(columns: dict, result: dict):
+    """Nutrition recommendations for a batch result."""
+    return generate_nutrition_recommendations(result["protein_mid"], columns["goal"], columns["adherence"])
+
+
+def run_batch(function, recommend=None, **columns) -> dict:
+    """
+    Run a batch engine and, optionally, its batch recommendation renderer.
+    
+    Args:
+        function: Batch engine function taking the columns as keywords
+        recommend: One of the *_batch_recommendations functions, or None
+        **columns: Input columns
+    
+    Returns:
+        The engine's result dict, with a "recommendation" column when
+        recommend is given
+    """
+    with stage("engine"):
+        result = function(**columns)
+    if recommend is not None:
+        with stage("recommendation"):
+            result["recommendation"] = recommend(columns, result)
+    return result
+
+
+# Engine calls run inline, on a thread pool or on a process pool by size
+executor = EngineExecutor(
+    small_backend=settings.executor_small_backend,
+    large_backend=settings.executor_large_backend,
+    threshold=settings.executor_threshold,
+    max_workers=settings.executor_max_workers,
+    max_pending=settings.executor_max_pending,
+)
+
+
+# Per-engine result caches for the engines enabled in settings
+ENGINE_CACHES = {
+    name: EngineCache(
+        maxsize=settings.cache_maxsize,
+        ttl=settings.cache_ttl,
+        quantize=settings.cache_quantize.get(name),
+    )
+    for name in settings.cache_engines
+}
+
+
+# Write-behind user profiles; started and stopped by the app lifespan
+profile_store = ProfileStore(
+    settings.profiles_db,
+    batch_size=settings.profiles_batch_size,
+    flush_interval=settings.profiles_flush_interval,
+    max_pending=settings.profiles_max_pending,
+) if settings.profiles_db else None
+
+
+# Check-in history (write-behind) and the readiness trends derived from it;
+# the lifespan opens the store and rebuilds the trends from it
+history_writer = HistoryWriter(
+    settings.history_dir,
+    segment_days=settings.history_segment_days,
+    batch_size=settings.history_batch_size,
+    flush_interval=settings.history_flush_interval,
+) if settings.history_dir else None
+
+trend_tracker = TrendTracker()
+
+
+def record_checkin(user_id: str, section: str, inputs: dict, result: dict) -> None:
+    """Add today's (UTC) check-in to a user's history and, for readiness, their trend."""
+    day = int(np.datetime64("today", "D").astype(np.int64))
+    if history_writer is not None and section in HISTORY_SCHEMAS:
+        history_writer.record(section, user_id, day, {**inputs, **result})
+    if section == "readiness":
+        trend_tracker.update(user_id, day, (result["intensity"], inputs["soreness"], inputs["stress"]))
+
+
+def cached_engine(name: str):
+    """
+    Memoize a pipeline (numbers and recommendation) in ENGINE_CACHES[name].
+    
+    Pipelines run unchanged when the engine's cache is disabled or the
+    request is being profiled. With quantization, the pipeline sees the
+    quantized inputs, validated again; if quantizing pushed a value out of
+    the schema's bounds, it sees the exact inputs instead.
+    """
+    def decorator(compute):
+        @wraps(compute)
+        def wrapper(data):
+            cache = ENGINE_CACHES.get(name)
+            if cache is None or profiling.get():
+                return compute(data)
+            model = type(data)
+            
+            def compute_quantized(inputs):
+                try:
+                    return compute(model.model_validate(inputs))
+                except ValidationError:
+                    return compute(data)
+            
+            return cache.get_or_compute(data.model_dump(), compute_quantized)
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> dict:
+    """Stats of every enabled engine cache."""
+    return {name: cache.stats() for name, cache in ENGINE_CACHES.items()}
+
+
+def register_metrics(registry: MetricsRegistry) -> None:
+    """Expose cache and executor statistics on a metrics registry at scrape time."""
+    registry.describe("fuzzy_cache_entries", "gauge", "Cached results per engine.")
+    registry.describe("fuzzy_cache_hits_total", "counter", "Engine cache hits.")
+    registry.describe("fuzzy_cache_misses_total", "counter", "Engine cache misses.")
+    registry.describe("fuzzy_cache_evictions_total", "counter", "Engine cache LRU evictions.")
+    registry.describe("fuzzy_cache_expirations_total", "counter", "Engine cache TTL expirations.")
+    registry.describe("fuzzy_executor_pending_calls", "gauge", "Queued plus running calls per backend.")
+    registry.describe("fuzzy_executor_max_pending", "gauge", "Pending calls a pool accepts before rejecting.")
+    registry.describe("fuzzy_executor_calls_total", "counter", "Completed engine calls per backend.")
+    registry.describe("fuzzy_executor_rejected_total", "counter", "Engine calls rejected with 503 per backend.")
+    
+    def samples():
+        for name, stats in cache_stats().items():
+            labels = (("engine", name),)
+            yield "fuzzy_cache_entries", labels, stats["size"]
+            for counter in ("hits", "misses", "evictions", "expirations"):
+                yield f"fuzzy_cache_{counter}_total", labels, stats[counter]
+        stats = executor.stats()
+        yield "fuzzy_executor_max_pending", (), stats["max_pending"]
+        for backend in BACKENDS:
+            labels = (("backend", backend),)
+            yield "fuzzy_executor_pending_calls", labels, stats["backends"][backend]["pending"]
+            yield "fuzzy_executor_calls_total", labels, stats["backends"][backend]["calls"]
+            yield "fuzzy_executor_rejected_total", labels, stats["backends"][backend]["rejected"]
+    
+    registry.register_collector(samples)
+
+
+@cached_engine("readiness")
+def compute_readiness(data: ReadinessInput) -> ReadinessOutput:
+    """Run the readiness engine and recommendation generator."""
+    with stage("engine"):
+        result = calculate_readiness(
+            sleep=data.sleep,
+            energy=data.energy,
+            soreness=data.soreness,
+            stress=data.stress,
+            defuzzification=settings.readiness_defuzzification,
+            lut=readiness_lut(),
+        )
+    
+    with stage("recommendation"):
+        recommendation = generate_readiness_recommendation(
+            intensity=result["intensity"],
+            label=result["label"],
+            inputs={
+                "sleep": data.sleep,
+                "energy": data.energy,
+                "soreness": data.soreness,
+                "stress": data.stress,
+            },
+        )
+    
+    return ReadinessOutput(
+        intensity=result["intensity"],
+        label=result["label"],
+        confidence=result["confidence"],
+        recommendation=recommendation,
+        input_memberships=result["input_memberships"],
+    )
+
+
+@cached_engine("body_composition")
+def compute_body_composition(data: BodyCompInput) -> BodyCompOutput:
+    """Run the body composition engine and recommendation generator."""
+    with stage("engine"):
+        result = estimate_body_composition(
+            weight=data.weight,
+            height=data.height,
+            waist=data.waist,
+            activity_level=data.activity_level,
+            build_type=data.build_type,
+        )
+    
+    with stage("recommendation"):
+        recommendation = generate_body_comp_recommendation(
+            body_fat_mid=result["body_fat_mid"],
+            muscle_mass_category=result["muscle_mass_category"],
+            bmi=result["bmi"],
+            bmi_interpretation=result["bmi_interpretation"],
+        )
+    
+    return BodyCompOutput(
+        body_fat_low=result["body_fat_low"],
+        body_fat_mid=result["body_fat_mid"],
+        body_fat_high=result["body_fat_high"],
+        muscle_mass_category=result["muscle_mass_category"],
+        bmi=result["bmi"],
+        bmi_interpretation=result["bmi_interpretation"],
+        recommendation=recommendation,
+    )
+
+
+@cached_engine("strength")
+def compute_strength(data: StrengthInput) -> StrengthOutput:
+    """Run the 1RM engine and recommendation generator."""
+    with stage("engine"):
+        result = estimate_one_rep_max(
+            weight_lifted=data.weight_lifted,
+            reps=data.reps,
+            rpe=data.rpe,
+            form_quality=data.form_quality,
+        )
+    
+    with stage("recommendation"):
+        recommendation = generate_strength_recommendation(
+            one_rm_mid=result["one_rm_mid"],
+            confidence=result["confidence"],
+            form_quality=data.form_quality,
+            weight_lifted=data.weight_lifted,
+        )
+    
+    return StrengthOutput(
+        one_rm_low=result["one_rm_low"],
+        one_rm_mid=result["one_rm_mid"],
+        one_rm_high=result["one_rm_high"],
+        confidence=result["confidence"],
+        recommendation=recommendation,
+    )
+
+
+def compute_strength_session(data: StrengthSessionInput) -> StrengthSessionOutput:
+    """Fuse a session's sets into one 1RM range, with a recommendation for its top set."""
+    with stage("engine"):
+        result = estimate_session_one_rep_max(
+            weight_lifted=data.weight_lifted,
+            reps=data.reps,
+            rpe=data.rpe,
+            form_quality=data.form_quality,
+        )
+    
+    top_set = result["top_set"]
+    with stage("recommendation"):
+        recommendation = generate_strength_recommendation(
+            one_rm_mid=result["one_rm_mid"],
+            confidence=result["confidence"],
+            form_quality=data.form_quality[top_set],
+            weight_lifted=data.weight_lifted[top_set],
+        )
+    
+    return StrengthSessionOutput(**result, recommendation=recommendation)
+
+
+@cached_engine("nutrition")
+def compute_nutrition(data: NutritionInput) -> NutritionOutput:
+    """Run the nutrition engine and recommendation generator."""
+    with stage("engine"):
+        result = calculate_nutrition(
+            weight=data.weight,
+            goal=data.goal,
+            activity_level=data.activity_level,
+            metabolism=data.metabolism,
+            adherence=data.adherence,
+        )
+    
+    with stage("recommendation"):
+        recommendation = generate_nutrition_recommendation(
+            calories_mid=result["calories_mid"],
+            protein_mid=result["protein_mid"],
+            goal=data.goal,
+            adherence=data.adherence,
+        )
+    
+    return NutritionOutput(
+        calories_low=result["calories_low"],
+        calories_mid=result["calories_mid"],
+        calories_high=result["calories_high"],
+        protein_low=result["protein_low"],
+        protein_mid=result["protein_mid"],
+        protein_high=result["protein_high"],
+        carbs_low=result["carbs_low"],
+        carbs_mid=result["carbs_mid"],
+        carbs_high=result["carbs_high"],
+        fat_low=result["fat_low"],
+        fat_mid=result["fat_mid"],
+        fat_high=result["fat_high"],
+        recommendation=recommendation,
+    )
+
+
+# Dashboard sections: name -> (input model, pipeline)
+DASHBOARD_SECTIONS = {
+    "readiness": (ReadinessInput, compute_readiness),
+    "body_composition": (BodyCompInput, compute_body_composition),
+    "strength": (StrengthInput, compute_strength),
+    "nutrition": (NutritionInput, compute_nutrition),
+}
@@ -0,0 +1,607 @@
+"""
+Append-only, memory-mapped columnar store for daily check-in history.
+
+Records of each kind (readiness, body_composition, nutrition) are split
+into time segments of segment_days days. A segment is a directory with
+one raw little-endian file per field plus the user and day columns, so a
+column is read with np.memmap and never parsed. Each segment keeps a
+per-user offset index (rows grouped by user, with per-user offsets into
+that grouping), so a range query for one user touches only that user's
+rows in the segments the range overlaps.
+
+Layout:
+    <root>/meta.json                      segment length
+    <root>/users.txt                      user id of each user code
+    <root>/<kind>/<YYYY-MM-DD>/<field>.col
+    <root>/<kind>/<YYYY-MM-DD>/index.order.npy, index.offsets.npy
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+
+from app.fuzzy_engine.body_comp import ACTIVITY_LEVELS, BUILD_TYPES, MUSCLE_MASS_CATEGORIES
+from app.fuzzy_engine.nutrition import GOALS, METABOLISM_TYPES
+from app.fuzzy_engine.readiness import INTENSITY_LABELS
+from app.fuzzy_engine.utils import encode_categories
+
+
+logger = logging.getLogger(__name__)
+
+# Field -> NumPy dtype, or a tuple of categories stored as uint8 codes
+SCHEMAS = {
+    "readiness": {
+        "sleep": "<f4",
+        "energy": "<f4",
+        "soreness": "<f4",
+        "stress": "<f4",
+        "intensity": "<f4",
+        "label": INTENSITY_LABELS,
+        "confidence": "<f4",
+    },
+    "body_composition": {
+        "weight": "<f4",
+        "height": "<f4",
+        "waist": "<f4",
+        "activity_level": ACTIVITY_LEVELS,
+        "build_type": BUILD_TYPES,
+        "body_fat_low": "<f4",
+        "body_fat_mid": "<f4",
+        "body_fat_high": "<f4",
+        "bmi": "<f4",
+        "muscle_mass_category": MUSCLE_MASS_CATEGORIES,
+    },
+    "nutrition": {
+        "weight": "<f4",
+        "goal": GOALS,
+        "activity_level": ACTIVITY_LEVELS,
+        "metabolism": METABOLISM_TYPES,
+        "adherence": "<f4",
+        **{
+            f"{macro}_{level}": "<i4"
+            for macro in ("calories", "protein", "carbs", "fat")
+            for level in ("low", "mid", "high")
+        },
+    },
+}
+
+# Columns every kind has; "day" is written last and bounds the row count
+USER_DTYPE = np.dtype("<u4")
+DAY_DTYPE = np.dtype("<i4")
+
+DEFAULT_SEGMENT_DAYS = 32
+
+# Unindexed rows a segment tolerates (scanned linearly) before reindexing
+DEFAULT_INDEX_TAIL = 4096
+
+
+def to_days(days) -> np.ndarray:
+    """
+    Convert dates to int32 days since 1970-01-01.
+    
+    Args:
+        days: Day numbers, datetime64 values, datetime.date objects or
+            ISO date strings, shape (N,)
+    
+    Returns:
+        int32 array of shape (N,)
+    """
+    values = np.asarray(days)
+    if values.dtype.kind in "iu":
+        return values.astype(DAY_DTYPE)
+    return values.astype("datetime64[D]").astype(np.int64).astype(DAY_DTYPE)
+
+
+def _field_dtype(spec) -> np.dtype:
+    return np.dtype(np.uint8) if isinstance(spec, tuple) else np.dtype(spec)
+
+
+class _Segment:
+    """One kind's columns for one time segment, with its per-user index."""
+    
+    def __init__(self, path: str, schema: dict):
+        self.path = path
+        self.dtypes = {
+            **{field: _field_dtype(spec) for field, spec in schema.items()},
+            "user": USER_DTYPE,
+            "day": DAY_DTYPE,
+        }
+        self._maps = {}
+        self._order = None
+        self._offsets = None
+        self._indexed = 0
+    
+    def file(self, field: str) -> str:
+        return os.path.join(self.path, f"{field}.col")
+    
+    def rows(self) -> int:
+        """Complete rows; the day column is appended last."""
+        try:
+            return os.path.getsize(self.file("day")) // DAY_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+    
+    def column(self, field: str, rows: int) -> np.ndarray:
+        """Read-only memory map of the first rows values of a column."""
+        if rows == 0:
+            return np.empty(0, dtype=self.dtypes[field])
+        cached = self._maps.get(field)
+        if cached is None or len(cached) < rows:
+            # A plain ndarray view skips np.memmap's per-slice overhead
+            memmap = np.memmap(self.file(field), dtype=self.dtypes[field], mode="r")
+            cached = self._maps[field] = memmap.view(np.ndarray)
+        return cached[:rows]
+    
+    def append(self, columns: dict) -> None:
+        """Append equal-length encoded columns, trimming any torn write first."""
+        os.makedirs(self.path, exist_ok=True)
+        rows = self.rows()
+        for field in (*(f for f in self.dtypes if f not in ("user", "day")), "user", "day"):
+            path = self.file(field)
+            expected = rows * self.dtypes[field].itemsize
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                os.truncate(path, expected)
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(columns[field], dtype=self.dtypes[field]).tobytes())
+    
+    def _load_index(self, rows: int) -> None:
+        order_path = os.path.join(self.path, "index.order.npy")
+        if self._order is None and os.path.exists(order_path):
+            try:
+                order = np.load(order_path, mmap_mode="r")
+                offsets = np.load(os.path.join(self.path, "index.offsets.npy"), mmap_mode="r")
+            except (OSError, ValueError):
+                order = offsets = None
+            # The two files are replaced one after the other; offsets[-1] is the
+            # row count the offsets were built for, so a crash in between shows
+            # up as a mismatch with the order file and the index is rebuilt
+            if order is None or len(offsets) == 0 or offsets[-1] != len(order) or len(order) > rows:
+                if rows:
+                    self._build_index(rows)
+            else:
+                self._order, self._offsets, self._indexed = order, offsets, len(order)
+    
+    def _build_index(self, rows: int) -> None:
+        """Group rows by user (stable) and store per-user offsets."""
+        users = np.asarray(self.column("user", rows))
+        order = np.argsort(users, kind="stable").astype(np.uint32)
+        offsets = np.zeros(int(users.max()) + 2, dtype=np.int64)
+        np.cumsum(np.bincount(users), out=offsets[1:])
+        for name, array in (("offsets", offsets), ("order", order)):
+            path = os.path.join(self.path, f"index.{name}.npy")
+            np.save(path + ".tmp.npy", array)
+            os.replace(path + ".tmp.npy", path)
+        self._order, self._offsets, self._indexed = order, offsets, rows
+    
+    def user_rows(self, user: int, rows: int, index_tail: int) -> np.ndarray:
+        """Row numbers of one user, in append order."""
+        self._load_index(rows)
+        if rows - self._indexed > max(index_tail, self._indexed // 4):
+            self._build_index(rows)
+        indexed = np.empty(0, dtype=np.int64)
+        if self._offsets is not None and user + 1 < len(self._offsets):
+            indexed = np.asarray(self._order[self._offsets[user]:self._offsets[user + 1]], dtype=np.int64)
+        tail = np.flatnonzero(self.column("user", rows)[self._indexed:] == user) + self._indexed
+        return np.concatenate([indexed, tail])
+
+
+class HistoryStore:
+    """
+    Columnar, append-only check-in history on memory-mapped files.
+    
+    Appends and index rebuilds are serialized by a lock; queries read
+    memory maps and may run concurrently with appends, seeing the rows
+    complete when they started.
+    
+    Args:
+        root: Store directory, created if missing
+        segment_days: Days per time segment; fixed when the store is created
+        index_tail: Unindexed rows per segment before its index is rebuilt
+    """
+    
+    def __init__(self, root: str, segment_days: int = DEFAULT_SEGMENT_DAYS, index_tail: int = DEFAULT_INDEX_TAIL):
+        os.makedirs(root, exist_ok=True)
+        meta_path = os.path.join(root, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                stored = json.load(f)["segment_days"]
+            if stored != segment_days:
+                raise ValueError(f"store at {root} uses segment_days={stored}, got {segment_days}")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"segment_days": segment_days}, f)
+        self.root = root
+        self.segment_days = segment_days
+        self.index_tail = index_tail
+        self._lock = threading.Lock()
+        self._segments = {}
+        self._numbers = {}
+        self._users_path = os.path.join(root, "users.txt")
+        self.users = []
+        if os.path.exists(self._users_path):
+            with open(self._users_path, encoding="utf-8") as f:
+                # split("\n") rather than splitlines(), which also breaks on \x85, \u2028, ...
+                self.users = f.read().split("\n")[:-1]
+        self._user_codes = {user_id: code for code, user_id in enumerate(self.users)}
+    
+    def user_code(self, user_id: str) -> Optional[int]:
+        """Integer code of a user id, or None if it has no history."""
+        return self._user_codes.get(user_id)
+    
+    def _register_users(self, user_ids) -> np.ndarray:
+        """Codes of user ids, adding unseen ids to users.txt (lock held)."""
+        unique, inverse = np.unique(np.asarray(user_ids, dtype=str), return_inverse=True)
+        new = [user_id for user_id in unique.tolist() if user_id not in self._user_codes]
+        if new:
+            if any(not user_id or not user_id.isprintable() for user_id in new):
+                raise ValueError("user ids must be non-empty and free of control characters")
+            with open(self._users_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{user_id}\n" for user_id in new))
+            for user_id in new:
+                self._user_codes[user_id] = len(self.users)
+                self.users.append(user_id)
+        codes = np.array([self._user_codes[user_id] for user_id in unique.tolist()], dtype=USER_DTYPE)
+        return codes[inverse.reshape(-1)]
+    
+    def _segment(self, kind: str, number: int) -> _Segment:
+        key = (kind, number)
+        segment = self._segments.get(key)
+        if segment is None:
+            start = np.datetime64(number * self.segment_days, "D")
+            segment = _Segment(os.path.join(self.root, kind, str(start)), SCHEMAS[kind])
+            self._segments[key] = segment
+        return segment
+    
+    def segment_numbers(self, kind: str) -> list[int]:
+        """Numbers of the segments of a kind, oldest first."""
+        numbers = self._numbers.get(kind)
+        if numbers is None:
+            directory = os.path.join(self.root, kind)
+            names = os.listdir(directory) if os.path.isdir(directory) else []
+            numbers = self._numbers[kind] = sorted(
+                int(np.datetime64(name, "D").astype(np.int64)) // self.segment_days for name in names
+            )
+        return numbers
+    
+    def append(self, kind: str, user_ids, days, columns: dict) -> int:
+        """
+        Append records in bulk.
+        
+        columns may be an engine's batch output merged with its inputs,
+        e.g. {**inputs, **calculate_readiness_batch(**inputs)}; keys that
+        are not fields of the kind (memberships, recommendation) are ignored.
+        
+        Args:
+            kind: "readiness", "body_composition" or "nutrition"
+            user_ids: User id strings, shape (N,)
+            days: Record dates (see to_days), shape (N,)
+            columns: {field: values of shape (N,)} covering every field of the kind
+        
+        Returns:
+            Number of rows appended
+        """
+        schema = SCHEMAS[kind]
+        missing = [field for field in schema if field not in columns]
+        if missing:
+            raise ValueError(f"missing {kind} fields: {missing}")
+        days = to_days(days)
+        n = len(days)
+        encoded = {}
+        for field, spec in schema.items():
+            values = columns[field]
+            if isinstance(spec, tuple):
+                values = encode_categories(values, spec)
+                if (values == len(spec)).any():
+                    raise ValueError(f"unknown {field} values; expected one of {spec}")
+            # Converted up front so a bad value fails before anything is written
+            values = np.asarray(values, dtype=_field_dtype(spec)).reshape(-1)
+            if len(values) != n:
+                raise ValueError(f"{field} has {len(values)} rows, expected {n}")
+            encoded[field] = values
+        if len(user_ids) != n:
+            raise ValueError(f"user_ids has {len(user_ids)} rows, expected {n}")
+        if n == 0:
+            return 0
+        
+        numbers = days // self.segment_days
+        order = np.argsort(numbers, kind="stable")
+        bounds = np.flatnonzero(np.diff(numbers[order])) + 1
+        with self._lock:
+            encoded["user"] = self._register_users(user_ids)
+            encoded["day"] = days
+            for rows in np.split(order, bounds):
+                number = int(numbers[rows[0]])
+                self._segment(kind, number).append({field: values[rows] for field, values in encoded.items()})
+                known = self.segment_numbers(kind)
+                if number not in known:
+                    # Replaced rather than mutated, so concurrent queries keep a stable list
+                    self._numbers[kind] = sorted([*known, number])
+        return n
+    
+    def query(
+        self,
+        kind: str,
+        user_id: str,
+        start=None,
+        end=None,
+        fields: Optional[list[str]] = None,
+        decode: bool = True,
+    ) -> dict:
+        """
+        One user's records in a date range, sorted by day.
+        
+        When a day was appended more than once, the last record wins.
+        
+        Args:
+            kind: Record kind
+            user_id: User id
+            start: First day (inclusive), or None for the beginning
+            end: Last day (inclusive), or None for the end
+            fields: Fields to return; None returns all
+            decode: Return categories as strings rather than uint8 codes
+        
+        Returns:
+            {"day": datetime64[D] array, field: array, ...}
+        """
+        schema = SCHEMAS[kind]
+        fields = list(schema) if fields is None else list(fields)
+        unknown = [field for field in fields if field not in schema]
+        if unknown:
+            raise ValueError(f"unknown {kind} fields: {unknown}")
+        start = None if start is None else int(to_days([start])[0])
+        end = None if end is None else int(to_days([end])[0])
+        
+        parts = {field: [] for field in ("day", *fields)}
+        user = self.user_code(user_id)
+        if user is not None:
+            for number in self.segment_numbers(kind):
+                if start is not None and (number + 1) * self.segment_days <= start:
+                    continue
+                if end is not None and number * self.segment_days > end:
+                    break
+                segment = self._segment(kind, number)
+                rows = segment.rows()
+                with self._lock:
+                    user_rows = segment.user_rows(user, rows, self.index_tail)
+                day = segment.column("day", rows)[user_rows]
+                keep = np.ones(len(day), dtype=bool)
+                if start is not None:
+                    keep &= day >= start
+                if end is not None:
+                    keep &= day <= end
+                user_rows = user_rows[keep]
+                parts["day"].append(day[keep])
+                for field in fields:
+                    parts[field].append(segment.column(field, rows)[user_rows])
+        
+        dtypes = {"day": DAY_DTYPE, **{field: _field_dtype(schema[field]) for field in fields}}
+        result = {
+            field: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes[field])
+            for field, chunks in parts.items()
+        }
+        order = np.argsort(result["day"], kind="stable")
+        day = result["day"][order]
+        latest = order[np.append(day[1:] != day[:-1], True)] if len(day) else order
+        result = {field: values[latest] for field, values in result.items()}
+        result["day"] = result["day"].astype("datetime64[D]")
+        if decode:
+            for field in fields:
+                if isinstance(schema[field], tuple):
+                    result[field] = np.array(schema[field], dtype=object)[result[field]]
+        return result
+    
+    def last_days(self, kind: str, user_id: str, days: int, today=None, fields: Optional[list[str]] = None) -> dict:
+        """One user's records for the `days` days ending today (inclusive)."""
+        end = int(to_days([today if today is not None else np.datetime64("today", "D")])[0])
+        return self.query(kind, user_id, start=end - days + 1, end=end, fields=fields)
+    
+    def scan(self, kind: str, fields: Optional[list[str]] = None, start=None, end=None) -> Iterator[dict]:
+        """
+        Every user's records, one segment at a time, oldest segment first.
+        
+        Rows within a segment are in append order. Categories are uint8
+        codes. Meant for bulk recomputation over all users.
+        
+        Yields:
+            {"user": uint32 codes, "day": int32 days, field: array, ...}
+        """
+        fields = list(SCHEMAS[kind]) if fields is None else list(fields)
+        start = None if start is None else int(to_days([start])[0])
+        end = None if end is None else int(to_days([end])[0])
+        for number in self.segment_numbers(kind):
+            if start is not None and (number + 1) * self.segment_days <= start:
+                continue
+            if end is not None and number * self.segment_days > end:
+                break
+            segment = self._segment(kind, number)
+            rows = segment.rows()
+            if rows == 0:
+                continue
+            day = segment.column("day", rows)
+            keep = slice(None)
+            if start is not None or end is not None:
+                mask = np.ones(rows, dtype=bool)
+                if start is not None:
+                    mask &= day >= start
+                if end is not None:
+                    mask &= day <= end
+                keep = np.flatnonzero(mask)
+            yield {
+                field: segment.column(field, rows)[keep]
+                for field in ("user", "day", *fields)
+            }
+    
+    def stats(self) -> dict:
+        """Users plus segment and row counts per kind."""
+        kinds = {}
+        for kind in SCHEMAS:
+            numbers = self.segment_numbers(kind)
+            kinds[kind] = {
+                "segments": len(numbers),
+                "rows": sum(self._segment(kind, number).rows() for number in numbers),
+            }
+        return {"users": len(self.users), "segment_days": self.segment_days, "kinds": kinds}
+
+
+class HistoryWriter:
+    """
+    Write-behind single-record appends to a HistoryStore.
+    
+    Records are buffered on the event loop and appended with one bulk
+    append per kind on a dedicated thread, every flush_interval seconds or
+    as soon as batch_size records are buffered. The buffer keeps one record
+    per (kind, user, day), the latest, and a record equal to the one last
+    successfully written for that user today is skipped, so repeated identical
+    check-ins (e.g. dashboard reloads) do not grow the store. If a kind's
+    bulk append fails, its records are retried one by one so that only
+    the bad ones are lost.
+    
+    Args:
+        root: Store directory
+        segment_days: Days per time segment
+        batch_size: Buffered records that trigger an immediate flush
+        flush_interval: Seconds a record may wait for a batch to fill up
+    """
+    
+    def __init__(
+        self,
+        root: str,
+        segment_days: int = DEFAULT_SEGMENT_DAYS,
+        batch_size: int = 1024,
+        flush_interval: float = 1.0,
+    ):
+        self.root = root
+        self.segment_days = segment_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.store = None
+        self._buffer = {}
+        self._last = {}
+        self._last_day = None
+        self._pool = None
+        self._task = None
+        self._ready = None
+        self._full = None
+        self.written = dict.fromkeys(SCHEMAS, 0)
+        self.failed = dict.fromkeys(SCHEMAS, 0)
+        self.skipped = 0
+    
+    async def start(self) -> None:
+        """Open the store and start the writer task."""
+        self.store = HistoryStore(self.root, segment_days=self.segment_days)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        if self._buffer:
+            self._ready.set()
+        self._task = asyncio.create_task(self._run())
+    
+    async def close(self) -> None:
+        """Flush buffered records and stop the writer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._buffer:
+            await self._flush()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def record(self, kind: str, user_id: str, day: int, row: dict) -> None:
+        """Buffer one record; row holds (at least) every field of the kind."""
+        if self._last_day is None or day > self._last_day:
+            # Only today's last records are worth comparing against
+            self._last.clear()
+            self._last_day = day
+        values = tuple(row[field] for field in SCHEMAS[kind])
+        key = (kind, user_id, day)
+        if key not in self._buffer and self._last.get(key) == values:
+            self.skipped += 1
+            return
+        self._buffer[key] = values
+        if self._ready is not None:
+            self._ready.set()
+            if len(self._buffer) >= self.batch_size:
+                self._full.set()
+    
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+    
+    async def _flush(self) -> None:
+        records, self._buffer = self._buffer, {}
+        self._ready.clear()
+        self._full.clear()
+        written = await asyncio.get_running_loop().run_in_executor(self._pool, self._write, records)
+        # Only records that reached the store suppress later identical ones
+        self._last.update((key, values) for key, values in written.items() if key[2] == self._last_day)
+    
+    def _append(self, kind: str, records: list) -> None:
+        self.store.append(
+            kind,
+            [user_id for (_, user_id, _), _ in records],
+            [day for (_, _, day), _ in records],
+            {field: [values[i] for _, values in records] for i, field in enumerate(SCHEMAS[kind])},
+        )
+        self.written[kind] += len(records)
+    
+    def _write(self, records: dict) -> dict:
+        """Append buffered records with one bulk append per kind (writer thread); returns those written."""
+        written = {}
+        for kind in SCHEMAS:
+            rows = [(key, values) for key, values in records.items() if key[0] == kind]
+            if not rows:
+                continue
+            try:
+                self._append(kind, rows)
+                written.update(rows)
+            except Exception:
+                logger.exception("Bulk append of %d %s records failed; retrying one by one", len(rows), kind)
+                for row in rows:
+                    try:
+                        self._append(kind, [row])
+                        written.update([row])
+                    except Exception as exc:
+                        self.failed[kind] += 1
+                        logger.error("Dropped %s record of %r: %s", kind, row[0][1], exc)
+        return written
+    
+    def stats(self) -> dict:
+        """Buffered and skipped record counts, and written and failed counts per kind."""
+        return {
+            "pending": len(self._buffer),
+            "skipped": self.skipped,
+            "written": dict(self.written),
+            "failed": dict(self.failed),
+        }
+    
+    def register_metrics(self, registry) -> None:
+        """Expose the writer counters on a metrics registry at scrape time."""
+        registry.describe("fuzzy_history_pending_records", "gauge", "Check-ins waiting to be appended.")
+        registry.describe("fuzzy_history_written_total", "counter", "Check-ins appended to the history store.")
+        registry.describe("fuzzy_history_failed_total", "counter", "Check-ins lost to append errors.")
+        registry.describe("fuzzy_history_skipped_total", "counter", "Repeated same-day check-ins not appended.")
+        
+        def samples():
+            stats = self.stats()
+            yield "fuzzy_history_pending_records", (), stats["pending"]
+            yield "fuzzy_history_skipped_total", (), stats["skipped"]
+            for counter in ("written", "failed"):
+                for kind, value in stats[counter].items():
+                    yield f"fuzzy_history_{counter}_total", (("kind", kind),), value
+        
+        registry.register_collector(samples)
@@ -0,0 +1,275 @@
+"""Incremental CSV/NDJSON bulk scoring streamed back as NDJSON."""
+import asyncio
+import csv
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from app.executor import ExecutorBusyError
+from app.fuzzy_engine.nutrition import calculate_nutrition_batch
+from app.models.schemas import ReadinessBatchInput, NutritionBatchInput
+from app.serialization import dumps_json, loads_json
+from app.services import executor, readiness_batch
+
+
+# Streamable engines: name -> (batch input model, batch function,
+# output columns)
+STREAM_ENGINES = {
+    "readiness": (
+        ReadinessBatchInput,
+        readiness_batch,
+        ("intensity", "label", "confidence"),
+    ),
+    "nutrition": (
+        NutritionBatchInput,
+        calculate_nutrition_batch,
+        (
+            "calories_low", "calories_mid", "calories_high",
+            "protein_low", "protein_mid", "protein_high",
+            "carbs_low", "carbs_mid", "carbs_high",
+            "fat_low", "fat_mid", "fat_high",
+        ),
+    ),
+}
+
+# Upload content types -> input format
+STREAM_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+}
+
+NDJSON = "application/x-ndjson"
+
+# Pause between retries while the engine pool is saturated
+BUSY_RETRY_SECONDS = 0.05
+
+# Longest accepted input line; longer lines become error rows
+MAX_LINE_BYTES = 64 * 1024
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator is still reading the request.
+    
+    The stock response listens for disconnects by calling receive() in
+    parallel, which would swallow request body messages; here receive() is
+    left to the body iterator, which sees disconnects itself. Each chunk is
+    sent with an awaited send(), so a slow client pauses the iterator and,
+    in turn, the reading of the upload.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_line_blocks(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[bytes]]:
+    """
+    Split a byte stream into complete lines, one list per received chunk.
+    
+    Only the trailing partial line is carried between chunks, and of a
+    line longer than MAX_LINE_BYTES only its first MAX_LINE_BYTES + 1
+    bytes are kept (enough for the parsers to reject it), so memory is
+    bounded by the size of one chunk plus one line.
+    """
+    tail = b""
+    async for chunk in chunks:
+        if len(tail) > MAX_LINE_BYTES:
+            # Inside an oversized line: drop the rest of it
+            end = chunk.find(b"\n")
+            if end < 0:
+                continue
+            chunk = chunk[end:]
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()[:MAX_LINE_BYTES + 1]
+        if lines:
+            yield lines
+    if tail:
+        yield [tail]
+
+
+def _parse_csv(lines: list[bytes], header: list[str], columns: tuple) -> list:
+    """Parse CSV lines into {column: value} dicts or error strings."""
+    positions = [header.index(column) for column in columns]
+    records = []
+    for line in lines:
+        if len(line) > MAX_LINE_BYTES:
+            records.append(f"line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            records.append("invalid UTF-8")
+            continue
+        fields = next(csv.reader([text.rstrip("\r")]))
+        if len(fields) != len(header):
+            records.append(f"expected {len(header)} fields, got {len(fields)}")
+        else:
+            records.append({column: fields[p] for column, p in zip(columns, positions)})
+    return records
+
+
+def _parse_ndjson(lines: list[bytes], columns: tuple) -> list:
+    """Parse NDJSON lines into {column: value} dicts or error strings."""
+    records = []
+    for line in lines:
+        if len(line) > MAX_LINE_BYTES:
+            records.append(f"line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            obj = loads_json(line)
+        except ValueError:
+            records.append("invalid JSON")
+            continue
+        if not isinstance(obj, dict):
+            records.append("expected a JSON object")
+            continue
+        missing = [column for column in columns if column not in obj]
+        if missing:
+            records.append(f"missing fields: {', '.join(missing)}")
+        else:
+            records.append({column: obj[column] for column in columns})
+    return records
+
+
+async def read_csv_header(blocks: AsyncIterator[list[bytes]]) -> tuple[list[str], AsyncIterator[list[bytes]]]:
+    """
+    Read the CSV header line.
+    
+    Returns:
+        Tuple of (column names, blocks iterator positioned after the header)
+    """
+    async for block in blocks:
+        lines = [line for line in block if line.strip()]
+        if not lines:
+            continue
+        # An undecodable header fails the missing-columns check instead
+        header = next(csv.reader([lines[0].decode("utf-8", errors="replace").rstrip("\r")]))
+        header = [name.strip() for name in header]
+        
+        async def rest():
+            if lines[1:]:
+                yield lines[1:]
+            async for more in blocks:
+                yield more
+        
+        return header, rest()
+    return [], blocks
+
+
+class StreamScorer:
+    """
+    Score parsed records in fixed-size vectorized chunks.
+    
+    Args:
+        engine: Key of STREAM_ENGINES
+        chunk_rows: Rows evaluated per engine call
+    """
+    
+    def __init__(self, engine: str, chunk_rows: int):
+        self.batch_model, self.function, self.outputs = STREAM_ENGINES[engine]
+        self.columns = tuple(self.batch_model.model_fields)
+        self.chunk_rows = chunk_rows
+        self.next_row = 0
+        self._pending = []
+    
+    def add(self, records: list) -> bool:
+        """Queue parsed records; True once a full chunk is pending."""
+        self._pending.extend(records)
+        return len(self._pending) >= self.chunk_rows
+    
+    async def flush(self, final: bool = False) -> AsyncIterator[bytes]:
+        """Evaluate pending records in chunk_rows pieces and yield NDJSON."""
+        while len(self._pending) >= self.chunk_rows or (final and self._pending):
+            chunk = self._pending[:self.chunk_rows]
+            del self._pending[:self.chunk_rows]
+            yield await self._score(chunk)
+    
+    async def _score(self, records: list) -> bytes:
+        """Validate and evaluate one chunk; invalid rows become error lines."""
+        first_row = self.next_row
+        self.next_row += len(records)
+        lines = [None] * len(records)
+        valid = [i for i, record in enumerate(records) if isinstance(record, dict)]
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                lines[i] = {"row": first_row + i, "error": record}
+        
+        columns = {column: [records[i][column] for i in valid] for column in self.columns}
+        try:
+            data = self.batch_model.model_validate(columns)
+        except ValidationError:
+            # Find the bad rows one by one; the rest are still scored
+            kept = []
+            for i in valid:
+                try:
+                    self.batch_model.model_validate({column: [records[i][column]] for column in self.columns})
+                    kept.append(i)
+                except ValidationError as exc:
+                    error = exc.errors()[0]
+                    message = error["msg"].removeprefix("Value error, ").replace("[0]", "")
+                    if error["loc"]:
+                        message = f"{error['loc'][0]}: {message}"
+                    lines[i] = {"row": first_row + i, "error": message}
+            valid = kept
+            columns = {column: [records[i][column] for i in valid] for column in self.columns}
+            data = self.batch_model.model_validate(columns)
+        
+        if valid:
+            result = await self._run({column: getattr(data, column) for column in self.columns}, len(valid))
+            values = [
+                (result[name].astype(float) if result[name].dtype.kind in "iu" else result[name]).tolist()
+                for name in self.outputs
+            ]
+            for i, row_values in zip(valid, zip(*values)):
+                lines[i] = {"row": first_row + i, **dict(zip(self.outputs, row_values))}
+        return b"".join(dumps_json(line) + b"\n" for line in lines)
+    
+    async def _run(self, columns: dict, size: int) -> dict:
+        """Run the engine off the event loop, waiting while the pool is full."""
+        while True:
+            try:
+                return await executor.run(self.function, size=size, **columns)
+            except ExecutorBusyError:
+                await asyncio.sleep(BUSY_RETRY_SECONDS)
+
+
+async def score_stream(
+    scorer: StreamScorer,
+    fmt: str,
+    blocks: AsyncIterator[list[bytes]],
+    header: list[str] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Parse, score and encode an upload chunk by chunk.
+    
+    Args:
+        scorer: StreamScorer for the engine
+        fmt: "csv" or "ndjson"
+        blocks: Line blocks from iter_line_blocks (after the CSV header)
+        header: CSV column names
+    
+    Yields:
+        NDJSON bytes, one line per input row in input order
+    """
+    try:
+        async for block in blocks:
+            lines = [line for line in block if line.strip()]
+            if fmt == "csv":
+                records = _parse_csv(lines, header, scorer.columns)
+            else:
+                records = _parse_ndjson(lines, scorer.columns)
+            if scorer.add(records):
+                async for output in scorer.flush():
+                    yield output
+        async for output in scorer.flush(final=True):
+            yield output
+    except ClientDisconnect:
+        return
@@ -0,0 +1,252 @@
+"""
+Acute:chronic readiness trends.
+
+Per user, exponentially weighted acute (7-day) and chronic (28-day)
+averages of readiness intensity and of the soreness and stress inputs,
+and their acute:chronic ratio. The averages are over days, not
+check-ins: a check-in after a gap of g days decays the previous average
+by (1 - alpha) ** g, with alpha = 2 / (span + 1). That makes each update
+O(1). It also gives every past check-in a closed-form weight, so the
+state of all users can be rebuilt from history with a few bincounts.
+"""
+from typing import Optional
+
+import numpy as np
+
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Tracked values, in column order
+TREND_FIELDS = ("intensity", "soreness", "stress")
+
+
+def smoothing(span: int) -> float:
+    """EWMA smoothing factor for a span in days."""
+    return 2 / (span + 1)
+
+
+ALPHAS = {"acute": smoothing(ACUTE_DAYS), "chronic": smoothing(CHRONIC_DAYS)}
+
+
+def ewma_weights(first: np.ndarray, gaps: np.ndarray, age: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Weight of each check-in in its user's day-decayed EWMA.
+    
+    The first check-in seeds the average (weight 1 before decay); a later
+    one enters with 1 - (1 - alpha) ** gap. Both then decay by
+    (1 - alpha) ** age. A user's weights sum to 1.
+    
+    Args:
+        first: Whether the check-in is the user's first, shape (N,)
+        gaps: Days since the user's previous check-in, shape (N,)
+        age: Days from the check-in to the user's last check-in, shape (N,)
+        alpha: Smoothing factor
+    
+    Returns:
+        Weights of shape (N,)
+    """
+    keep = 1 - alpha
+    return np.where(first, 1.0, 1 - keep ** gaps) * keep ** age
+
+
+def compute_trend_state(users, days, values, n_users: int) -> dict:
+    """
+    Trend state of every user from their whole check-in history.
+    
+    Check-ins may come in any order; when a user has several on one day,
+    the last one given wins. The state also holds each user's averages
+    before their last check-in day ("base"), so that a further same-day
+    check-in can replace that day's values in O(1).
+    
+    Args:
+        users: User codes, shape (N,)
+        days: Check-in days as day numbers, shape (N,)
+        values: Tracked values in TREND_FIELDS order, shape (N, 3)
+        n_users: Number of user codes
+    
+    Returns:
+        {"day", "count", "base_day"}: per-user arrays of shape (n_users,);
+        {"acute", "chronic", "base_acute", "base_chronic"}: shape (n_users, 3)
+    """
+    users = np.asarray(users, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    values = np.asarray(values, dtype=float).reshape(len(users), len(TREND_FIELDS))
+    
+    # Group by user, then day; lexsort is stable, so the last duplicate wins
+    order = np.lexsort((days, users))
+    users, days, values = users[order], days[order], values[order]
+    last_of_day = np.ones(len(users), dtype=bool)
+    last_of_day[:-1] = (users[1:] != users[:-1]) | (days[1:] != days[:-1])
+    users, days, values = users[last_of_day], days[last_of_day], values[last_of_day]
+    
+    first = np.ones(len(users), dtype=bool)
+    first[1:] = users[1:] != users[:-1]
+    last = np.ones(len(users), dtype=bool)
+    last[:-1] = first[1:]
+    gaps = np.diff(days, prepend=0)
+    
+    count = np.bincount(users, minlength=n_users)
+    day = np.full(n_users, -1, dtype=np.int64)
+    day[users[last]] = days[last]
+    # Second-to-last check-in day, where there is one
+    base_day = np.full(n_users, -1, dtype=np.int64)
+    previous = np.flatnonzero(last & ~first) - 1
+    base_day[users[previous]] = days[previous]
+    
+    state = {"day": day, "count": count, "base_day": base_day}
+    for name, alpha in ALPHAS.items():
+        for prefix, until, rows in (("", day, slice(None)), ("base_", base_day, ~last)):
+            row_users = users[rows]
+            weights = ewma_weights(first[rows], gaps[rows], until[row_users] - days[rows], alpha)
+            state[prefix + name] = np.column_stack([
+                np.bincount(row_users, weights=weights * values[rows, k], minlength=n_users)
+                for k in range(len(TREND_FIELDS))
+            ])
+    return state
+
+
+class TrendTracker:
+    """
+    Per-user acute and chronic averages, updated in O(1) per check-in.
+    
+    State lives in NumPy arrays indexed by a per-user code and grows by
+    doubling. Updates and reads are meant for a single thread (the event
+    loop); rebuild replaces the state wholesale.
+    
+    Args:
+        capacity: Initial number of user slots
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.users = []
+        self._codes = {}
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int, state: Optional[dict] = None) -> None:
+        fresh = {
+            "day": np.full(capacity, -1, dtype=np.int64),
+            "count": np.zeros(capacity, dtype=np.int64),
+            "base_day": np.full(capacity, -1, dtype=np.int64),
+            **{
+                key: np.zeros((capacity, len(TREND_FIELDS)))
+                for key in ("acute", "chronic", "base_acute", "base_chronic")
+            },
+        }
+        if state is not None:
+            for key, values in state.items():
+                fresh[key][:len(values)] = values
+        self.state = fresh
+    
+    def _code(self, user_id: str) -> int:
+        code = self._codes.get(user_id)
+        if code is None:
+            code = self._codes[user_id] = len(self.users)
+            self.users.append(user_id)
+            if code >= len(self.state["day"]):
+                self._allocate(2 * len(self.state["day"]), self.state)
+        return code
+    
+    def update(self, user_id: str, day: int, values) -> bool:
+        """
+        Apply one check-in.
+        
+        A check-in on a later day decays the averages by the gap and
+        blends the values in; another check-in on the latest day replaces
+        that day's values. Check-ins older than the latest day are
+        ignored until the next rebuild.
+        
+        Args:
+            user_id: User id
+            day: Check-in day number
+            values: Tracked values in TREND_FIELDS order
+        
+        Returns:
+            Whether the state changed
+        """
+        code = self._code(user_id)
+        state = self.state
+        values = np.asarray(values, dtype=float)
+        last_day = state["day"][code]
+        count = state["count"][code]
+        if count and day < last_day:
+            return False
+        if count and day > last_day:
+            # The current averages become the base of the new day
+            for name in ALPHAS:
+                state["base_" + name][code] = state[name][code]
+            state["base_day"][code] = last_day
+            state["count"][code] = count = count + 1
+        elif not count:
+            state["count"][code] = count = 1
+        
+        base_day = state["base_day"][code]
+        for name, alpha in ALPHAS.items():
+            if count == 1:
+                state[name][code] = values
+            else:
+                decay = (1 - alpha) ** (day - base_day)
+                state[name][code] = decay * state["base_" + name][code] + (1 - decay) * values
+        state["day"][code] = day
+        return True
+    
+    def rebuild(self, users: list[str], user_codes, days, values) -> None:
+        """
+        Replace every user's state with one vectorized pass over history.
+        
+        Args:
+            users: User id of each code
+            user_codes: Check-in user codes, shape (N,)
+            days: Check-in day numbers, shape (N,)
+            values: Tracked values in TREND_FIELDS order, shape (N, 3)
+        """
+        state = compute_trend_state(user_codes, days, values, len(users))
+        self.users = list(users)
+        self._codes = {user_id: code for code, user_id in enumerate(self.users)}
+        self._allocate(max(1024, 2 * len(users)), state)
+    
+    def rebuild_from_history(self, store) -> int:
+        """
+        Rebuild from a HistoryStore's readiness records.
+        
+        Returns:
+            Number of check-ins read
+        """
+        chunks = list(store.scan("readiness", list(TREND_FIELDS)))
+        if not chunks:
+            self.rebuild(store.users, [], [], np.empty((0, len(TREND_FIELDS))))
+            return 0
+        self.rebuild(
+            store.users,
+            np.concatenate([chunk["user"] for chunk in chunks]),
+            np.concatenate([chunk["day"] for chunk in chunks]),
+            np.column_stack([np.concatenate([chunk[field] for chunk in chunks]) for field in TREND_FIELDS]),
+        )
+        return sum(len(chunk["day"]) for chunk in chunks)
+    
+    def get(self, user_id: str) -> Optional[dict]:
+        """
+        A user's trend, or None if they have no check-ins.
+        
+        Returns:
+            {"user_id", "day" (ISO date of the last check-in), "checkins",
+            "acute", "chronic", "ratio"}, each of the last three a
+            {field: value} dict; a ratio is None when the chronic
+            average is 0
+        """
+        code = self._codes.get(user_id)
+        if code is None or not self.state["count"][code]:
+            return None
+        acute = self.state["acute"][code].tolist()
+        chronic = self.state["chronic"][code].tolist()
+        return {
+            "user_id": user_id,
+            "day": str(np.datetime64(int(self.state["day"][code]), "D")),
+            "checkins": int(self.state["count"][code]),
+            "acute": {field: round(value, 3) for field, value in zip(TREND_FIELDS, acute)},
+            "chronic": {field: round(value, 3) for field, value in zip(TREND_FIELDS, chronic)},
+            "ratio": {
+                field: round(a / c, 3) if c > 1e-9 else None
+                for field, a, c in zip(TREND_FIELDS, acute, chronic)
+            },
+        }
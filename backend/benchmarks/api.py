@@ -0,0 +1,179 @@
+"""
+End-to-end API throughput and latency benchmarks.
+
+The same request mix runs through an in-process ASGI client (framework
+overhead without sockets) and through a local uvicorn server (the full
+HTTP stack). Request bodies are drawn from the seeded input distributions
+so that, like real traffic, most requests miss the result cache.
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks import inputs
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BATCH_ROWS = 1000
+
+
+def _dashboard(rng: np.random.Generator, n: int) -> list[dict]:
+    sections = zip(
+        inputs.readiness_inputs(rng, n),
+        inputs.body_comp_inputs(rng, n),
+        inputs.strength_inputs(rng, n),
+        inputs.nutrition_inputs(rng, n),
+    )
+    return [
+        {"readiness": r, "body_composition": b, "strength": s, "nutrition": m}
+        for r, b, s, m in sections
+    ]
+
+
+def _readiness_batch(rng: np.random.Generator, n: int) -> list[dict]:
+    return [inputs.columns(inputs.readiness_inputs(rng, BATCH_ROWS)) for _ in range(n)]
+
+
+# Name -> (path, body generator)
+API_BENCHMARKS: dict[str, tuple[str, Callable]] = {
+    "readiness": ("/api/readiness", inputs.readiness_inputs),
+    "body_composition": ("/api/body-composition", inputs.body_comp_inputs),
+    "one_rep_max": ("/api/one-rep-max", inputs.strength_inputs),
+    "nutrition": ("/api/nutrition", inputs.nutrition_inputs),
+    "dashboard": ("/api/dashboard", _dashboard),
+    "readiness_batch_1000": ("/api/readiness/batch", _readiness_batch),
+}
+
+
+async def drive(client: httpx.AsyncClient, path: str, bodies: list[bytes], concurrency: int) -> dict:
+    """
+    POST every body to path with a fixed number of concurrent workers.
+    
+    Returns:
+        Throughput, error count and latency percentiles (ms)
+    """
+    latencies = []
+    errors = 0
+    next_index = 0
+    headers = {"Content-Type": "application/json"}
+    
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < len(bodies):
+            body = bodies[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.post(path, content=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    
+    ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+async def _run_cases(
+    client: httpx.AsyncClient,
+    prefix: str,
+    names: Optional[list[str]],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    results = {}
+    for name in names or API_BENCHMARKS:
+        path, generator = API_BENCHMARKS[name]
+        rng = np.random.default_rng(seed)
+        warmup = [json.dumps(body).encode() for body in generator(rng, max(concurrency, 10))]
+        bodies = [json.dumps(body).encode() for body in generator(rng, requests)]
+        await drive(client, path, warmup, concurrency)
+        results[f"{prefix}.{name}"] = await drive(client, path, bodies, concurrency)
+    return results
+
+
+async def run_asgi(
+    names: Optional[list[str]] = None,
+    requests: int = 2000,
+    concurrency: int = 8,
+    seed: int = 0,
+) -> dict:
+    """Run the API benchmarks in-process through httpx's ASGI transport."""
+    from app.main import app
+    
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await _run_cases(client, "api_asgi", names, requests, concurrency, seed)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"uvicorn did not become ready within {timeout}s")
+
+
+async def run_uvicorn(
+    names: Optional[list[str]] = None,
+    requests: int = 2000,
+    concurrency: int = 8,
+    seed: int = 0,
+) -> dict:
+    """Run the API benchmarks against a local uvicorn server started for the run."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        await _wait_ready(base_url, process)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            return await _run_cases(client, "api_uvicorn", names, requests, concurrency, seed)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
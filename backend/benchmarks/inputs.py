@@ -0,0 +1,90 @@
+"""
+Seeded input distributions shared by the micro and API benchmarks.
+
+Every generator takes a numpy Generator and a count and returns a list of
+keyword-argument dicts, so the same seed always produces the same inputs.
+"""
+import numpy as np
+
+
+ACTIVITY_LEVELS = ("sedentary", "light", "moderate", "active", "very_active")
+BUILD_TYPES = ("ectomorph", "mesomorph", "endomorph")
+FORM_QUALITIES = ("poor", "fair", "good", "excellent")
+GOALS = ("cut", "maintain", "bulk")
+METABOLISMS = ("slow", "normal", "fast")
+
+# Rep strings as users type them: exact, ranges and fuzzy terms
+REP_STRINGS = (
+    "5", "8", "3", "10", "12", "1",
+    "5-7", "8-10", "3 to 5", "10-12",
+    "around 6", "about 8", "approximately 5", "roughly 10", "~4", "maybe 12",
+)
+
+
+def _pick(rng: np.random.Generator, options: tuple, n: int) -> list:
+    return [options[i] for i in rng.integers(0, len(options), n)]
+
+
+def readiness_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Check-ins with 0.5-step sliders, uniform over 0-10."""
+    values = np.round(rng.uniform(0, 10, (n, 4)) * 2) / 2
+    return [
+        {"sleep": float(a), "energy": float(b), "soreness": float(c), "stress": float(d)}
+        for a, b, c, d in values.tolist()
+    ]
+
+
+def body_comp_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Adults between 50-120 kg and 150-200 cm."""
+    weight = np.round(rng.uniform(50, 120, n), 1)
+    height = np.round(rng.uniform(150, 200, n), 1)
+    waist = np.round(rng.uniform(60, 115, n), 1)
+    activity = _pick(rng, ACTIVITY_LEVELS, n)
+    build = _pick(rng, BUILD_TYPES, n)
+    return [
+        {"weight": w, "height": h, "waist": wa, "activity_level": a, "build_type": b}
+        for w, h, wa, a, b in zip(weight.tolist(), height.tolist(), waist.tolist(), activity, build)
+    ]
+
+
+def strength_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Sets between 20-250 kg in 2.5 kg steps at RPE 6-10."""
+    weight = np.round(rng.uniform(20, 250, n) / 2.5) * 2.5
+    rpe = np.round(rng.uniform(6, 10, n) * 2) / 2
+    reps = _pick(rng, REP_STRINGS, n)
+    form = _pick(rng, FORM_QUALITIES, n)
+    return [
+        {"weight_lifted": w, "reps": r, "rpe": p, "form_quality": f}
+        for w, r, p, f in zip(weight.tolist(), reps, rpe.tolist(), form)
+    ]
+
+
+def nutrition_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Users between 45-130 kg with any goal and adherence."""
+    weight = np.round(rng.uniform(45, 130, n), 1)
+    adherence = np.round(rng.uniform(0, 1, n), 2)
+    goal = _pick(rng, GOALS, n)
+    activity = _pick(rng, ACTIVITY_LEVELS, n)
+    metabolism = _pick(rng, METABOLISMS, n)
+    return [
+        {"weight": w, "goal": g, "activity_level": a, "metabolism": m, "adherence": d}
+        for w, g, a, m, d in zip(weight.tolist(), goal, activity, metabolism, adherence.tolist())
+    ]
+
+
+def trimf_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Points over 0-10 against random triangles, including degenerate edges."""
+    x = rng.uniform(0, 10, n)
+    corners = np.sort(rng.uniform(0, 10, (n, 3)), axis=1)
+    corners[::7, 1] = corners[::7, 0]
+    return [{"x": v, "params": list(p)} for v, p in zip(x.tolist(), corners.tolist())]
+
+
+def reps_inputs(rng: np.random.Generator, n: int) -> list[dict]:
+    """Rep strings drawn from REP_STRINGS."""
+    return [{"reps_str": r} for r in _pick(rng, REP_STRINGS, n)]
+
+
+def columns(rows: list[dict]) -> dict:
+    """Turn row dicts into the column-wise payload of the batch endpoints."""
+    return {key: [row[key] for row in rows] for key in rows[0]}
@@ -0,0 +1,99 @@
+"""
+Microbenchmarks of the fuzzy engine functions.
+
+Each benchmark calls one function over a fixed set of seeded inputs and
+reports the time per call.
+"""
+import statistics
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from app.fuzzy_engine.body_comp import estimate_body_composition
+from app.fuzzy_engine.nutrition import calculate_nutrition
+from app.fuzzy_engine.readiness import calculate_readiness
+from app.fuzzy_engine.strength import estimate_one_rep_max, parse_fuzzy_reps
+from app.fuzzy_engine.utils import trimf
+from benchmarks import inputs
+
+
+# Name -> (function, input generator)
+MICRO_BENCHMARKS: dict[str, tuple[Callable, Callable]] = {
+    "trimf": (trimf, inputs.trimf_inputs),
+    "calculate_readiness": (calculate_readiness, inputs.readiness_inputs),
+    "estimate_body_composition": (estimate_body_composition, inputs.body_comp_inputs),
+    "estimate_one_rep_max": (estimate_one_rep_max, inputs.strength_inputs),
+    # As called by the engine (memoized per string) and the parse itself
+    "parse_fuzzy_reps": (parse_fuzzy_reps, inputs.reps_inputs),
+    "parse_fuzzy_reps_uncached": (parse_fuzzy_reps.__wrapped__, inputs.reps_inputs),
+    "calculate_nutrition": (calculate_nutrition, inputs.nutrition_inputs),
+}
+
+
+def time_calls(function: Callable, cases: list[dict], repeat: int, min_time: float) -> list[float]:
+    """
+    Time passes over all cases.
+    
+    Each sample runs enough passes to last at least min_time seconds.
+    
+    Returns:
+        Seconds per call, one value per repeat
+    """
+    def one_pass() -> None:
+        for kwargs in cases:
+            function(**kwargs)
+    
+    one_pass()  # warm-up
+    passes = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(passes):
+            one_pass()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        passes *= 2
+    
+    samples = [elapsed / (passes * len(cases))]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(passes):
+            one_pass()
+        samples.append((time.perf_counter() - start) / (passes * len(cases)))
+    return samples
+
+
+def run_micro(
+    names: Optional[list[str]] = None,
+    n_inputs: int = 256,
+    repeat: int = 7,
+    min_time: float = 0.05,
+    seed: int = 0,
+) -> dict:
+    """
+    Run the microbenchmarks.
+    
+    Args:
+        names: Subset of MICRO_BENCHMARKS; None runs all
+        n_inputs: Seeded inputs per benchmark
+        repeat: Timed samples per benchmark
+        min_time: Minimum seconds per sample
+        seed: Seed of the input distributions
+    
+    Returns:
+        {"micro.<name>": {"median_us", "min_us", "stdev_us", "calls_per_second"}}
+    """
+    results = {}
+    for name in names or MICRO_BENCHMARKS:
+        function, generator = MICRO_BENCHMARKS[name]
+        cases = generator(np.random.default_rng(seed), n_inputs)
+        samples = [seconds * 1e6 for seconds in time_calls(function, cases, repeat, min_time)]
+        median = statistics.median(samples)
+        results[f"micro.{name}"] = {
+            "median_us": round(median, 3),
+            "min_us": round(min(samples), 3),
+            "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+            "calls_per_second": round(1e6 / median),
+        }
+    return results
@@ -0,0 +1,161 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline baseline.json --threshold 0.15
+
+Results are written as JSON. With --baseline, every metric is compared
+against the stored run, and the exit status is 1 when any metric is worse
+by more than the threshold.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+from benchmarks.api import API_BENCHMARKS, run_asgi, run_uvicorn
+from benchmarks.micro import MICRO_BENCHMARKS, run_micro
+
+
+SUITES = ("micro", "api_asgi", "api_uvicorn")
+
+# Compared metrics and whether lower values are better
+COMPARED_METRICS = {
+    "median_us": True,
+    "p50_ms": True,
+    "p99_ms": True,
+    "requests_per_second": False,
+}
+
+DEFAULT_THRESHOLD = 0.15
+
+
+def environment() -> dict:
+    """Describe the machine and code a run was taken on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    Compare a run with a baseline run.
+    
+    Only benchmarks and metrics present in both are compared.
+    
+    Returns:
+        One entry per compared metric with the relative change (positive
+        means worse) and whether it exceeds the threshold
+    """
+    rows = []
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, lower_is_better in COMPARED_METRICS.items():
+            if metric not in metrics or not previous.get(metric):
+                continue
+            change = (metrics[metric] - previous[metric]) / previous[metric]
+            if not lower_is_better:
+                change = -change
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": previous[metric],
+                "current": metrics[metric],
+                "change": round(change, 4),
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def run(suites: list[str], names: list[str] | None, quick: bool, seed: int, concurrency: int) -> dict:
+    """Run the selected suites and collect their results."""
+    results = {}
+    requests = 300 if quick else 2000
+    if "micro" in suites:
+        micro_names = [name for name in names or MICRO_BENCHMARKS if name in MICRO_BENCHMARKS]
+        results.update(run_micro(micro_names, repeat=3 if quick else 7, seed=seed))
+    api_names = [name for name in names or API_BENCHMARKS if name in API_BENCHMARKS]
+    if "api_asgi" in suites and api_names:
+        results.update(asyncio.run(run_asgi(api_names, requests, concurrency, seed)))
+    if "api_uvicorn" in suites and api_names:
+        results.update(asyncio.run(run_uvicorn(api_names, requests, concurrency, seed)))
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument("--quick", action="store_true", help="Fewer samples and requests, for smoke runs")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the input distributions")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent API requests")
+    args = parser.parse_args(argv)
+    
+    unknown = set(args.only or ()) - set(MICRO_BENCHMARKS) - set(API_BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    
+    results = run(args.suite, args.only, args.quick, args.seed, args.concurrency)
+    report = {"environment": environment(), "results": results}
+    
+    for name, metrics in results.items():
+        summary = ", ".join(f"{key}={value}" for key, value in metrics.items())
+        print(f"{name}: {summary}")
+    
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare(results, baseline["results"], args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "metrics": comparison}
+        print(f"\nAgainst {args.baseline} (positive change is worse, threshold {args.threshold:.0%}):")
+        for row in comparison:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(
+                f"  {row['benchmark']} {row['metric']}: {row['baseline']} -> {row['current']} "
+                f"({row['change']:+.1%}) {flag}"
+            )
+        regressions = [row for row in comparison if row["regression"]]
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.threshold:.0%}", file=sys.stderr)
+            status = 1
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""The compiled FuzzySystem against the original scalar readiness engine."""
+import itertools
+
+import numpy as np
+import pytest
+
+from app.fuzzy_engine.readiness import READINESS_SYSTEM, calculate_readiness
+from app.fuzzy_engine.utils import trimf_centroid
+
+
+def baseline_trimf(x: float, params: list) -> float:
+    a, b, c = params
+    if x <= a or x >= c:
+        return 0.0
+    elif a < x <= b:
+        return (x - a) / (b - a) if b != a else 1.0
+    else:
+        return (c - x) / (c - b) if c != b else 1.0
+
+
+BASELINE_INPUT_MF = {"low": [0, 0, 4], "medium": [2, 5, 8], "high": [6, 10, 10]}
+BASELINE_SLEEP_MF = {"poor": [0, 0, 4], "fair": [2, 5, 8], "good": [6, 10, 10]}
+BASELINE_INTENSITY_MF = {
+    "rest": [0, 0, 25],
+    "light": [10, 30, 50],
+    "moderate": [35, 50, 65],
+    "hard": [50, 70, 90],
+    "beast": [75, 100, 100],
+}
+
+
+def baseline_readiness(sleep: float, energy: float, soreness: float, stress: float) -> dict:
+    """The readiness engine as it was before FuzzySystem, unrounded."""
+    sl = {k: baseline_trimf(sleep, v) for k, v in BASELINE_SLEEP_MF.items()}
+    en = {k: baseline_trimf(energy, v) for k, v in BASELINE_INPUT_MF.items()}
+    so = {k: baseline_trimf(soreness, v) for k, v in BASELINE_INPUT_MF.items()}
+    st = {k: baseline_trimf(stress, v) for k, v in BASELINE_INPUT_MF.items()}
+    rules = [
+        (min(sl["good"], en["high"], so["low"], st["low"]), "beast"),
+        (min(sl["good"], en["high"], so["low"], st["medium"]), "hard"),
+        (min(sl["good"], en["high"], so["medium"], st["low"]), "hard"),
+        (min(sl["good"], en["medium"], so["low"], st["low"]), "hard"),
+        (min(en["high"], so["low"]), "hard"),
+        (min(sl["fair"], en["medium"], so["medium"], st["medium"]), "moderate"),
+        (min(sl["good"], en["medium"], so["medium"], st["medium"]), "moderate"),
+        (min(sl["fair"], en["high"], so["medium"], st["medium"]), "moderate"),
+        (min(sl["good"], en["medium"], so["low"]), "moderate"),
+        (min(sl["fair"], en["low"], so["medium"], st["medium"]), "light"),
+        (min(sl["poor"], en["medium"], so["medium"], st["medium"]), "light"),
+        (min(sl["fair"], en["medium"], so["high"], st["medium"]), "light"),
+        (min(sl["good"], en["low"]), "light"),
+        (min(sl["fair"], so["high"]), "light"),
+        (min(sl["poor"], en["low"], so["high"], st["high"]), "rest"),
+        (min(sl["poor"], en["low"], so["medium"], st["high"]), "rest"),
+        (min(sl["poor"], en["low"], so["high"], st["medium"]), "rest"),
+        (min(sl["poor"], st["high"]), "rest"),
+        (min(so["high"], st["high"]), "rest"),
+    ]
+    strengths = dict.fromkeys(BASELINE_INTENSITY_MF, 0)
+    for strength, category in rules:
+        strengths[category] = max(strengths[category], strength)
+    
+    universe = np.arange(0, 101, 1)
+    aggregated = np.zeros_like(universe, dtype=float)
+    for category, strength in strengths.items():
+        if strength > 0:
+            for i, x in enumerate(universe):
+                aggregated[i] = max(aggregated[i], min(baseline_trimf(x, BASELINE_INTENSITY_MF[category]), strength))
+    if np.sum(aggregated) > 0:
+        intensity = np.sum(universe * aggregated) / np.sum(aggregated)
+    else:
+        intensity = max(0, min(100, 50 + ((sleep + energy) / 20 - (soreness + stress) / 20) * 50))
+    
+    labels = ["Rest", "Light", "Moderate", "Hard", "Beast"]
+    memberships = {"sleep": sl, "energy": en, "soreness": so, "stress": st}
+    confidence = min(1.0, sum(max(terms.values()) for terms in memberships.values()) / 4)
+    return {
+        "intensity": float(intensity),
+        "label": labels[min(int(intensity // 20), 4)],
+        "confidence": confidence,
+        "input_memberships": memberships,
+        "strengths": [strengths[category] for category in BASELINE_INTENSITY_MF],
+    }
+
+
+def seeded_grid() -> np.ndarray:
+    """Every combination of a coarse grid, plus seeded slider and off-grid points."""
+    rng = np.random.default_rng(2024)
+    coarse = np.array(list(itertools.product([0, 2.5, 5, 7.5, 10], repeat=4)), dtype=float)
+    sliders = np.round(rng.uniform(0, 10, (300, 4)) * 2) / 2
+    continuous = rng.uniform(0, 10, (300, 4))
+    return np.concatenate([coarse, sliders, continuous])
+
+
+GRID = seeded_grid()
+BASELINE = [baseline_readiness(*row) for row in GRID.tolist()]
+
+
+def test_strengths_match_baseline():
+    evaluation = READINESS_SYSTEM.evaluate(GRID)
+    expected = np.array([result["strengths"] for result in BASELINE])
+    np.testing.assert_allclose(evaluation["strengths"], expected, rtol=0, atol=1e-12)
+
+
+def test_grid_centroid_matches_baseline():
+    output = READINESS_SYSTEM.evaluate(GRID)["output"]
+    expected = np.array([result["intensity"] for result in BASELINE])
+    fired = ~np.isnan(output)
+    np.testing.assert_allclose(output[fired], expected[fired], rtol=0, atol=1e-9)
+
+
+def test_calculate_readiness_matches_baseline():
+    for row, expected in zip(GRID.tolist(), BASELINE):
+        result = calculate_readiness(*row)
+        assert result["intensity"] == round(expected["intensity"], 1), row
+        assert result["label"] == expected["label"], row
+        assert result["confidence"] == round(expected["confidence"], 2), row
+        for variable, terms in expected["input_memberships"].items():
+            assert result["input_memberships"][variable] == pytest.approx(terms, abs=1e-12), row
+
+
+def test_analytic_batch_matches_row_by_row():
+    strengths = READINESS_SYSTEM.evaluate(GRID)["strengths"]
+    output = READINESS_SYSTEM.defuzzify(strengths, "analytic")
+    for row, centroid in zip(strengths, output):
+        area, moment = trimf_centroid(READINESS_SYSTEM._output_params, row, READINESS_SYSTEM.output_range)
+        if area > 0:
+            assert centroid == pytest.approx(moment / area, abs=1e-9)
+        else:
+            assert np.isnan(centroid)
+
+
+def test_output_universe_cached_per_instance():
+    universe, matrix = READINESS_SYSTEM.output_universe(51)
+    assert READINESS_SYSTEM.output_universe(51)[0] is universe
+    assert len(universe) == 51 and matrix.shape == (len(READINESS_SYSTEM.output_terms), 51)
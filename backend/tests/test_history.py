@@ -0,0 +1,70 @@
+"""Recovery of the columnar check-in history from interrupted writes."""
+import asyncio
+import os
+import shutil
+
+import numpy as np
+
+from app.storage.history import HistoryStore, HistoryWriter
+
+
+def append_readiness(store: HistoryStore, user_ids: list, days: list) -> None:
+    n = len(user_ids)
+    columns = {
+        "sleep": np.full(n, 7.0),
+        "energy": np.full(n, 6.0),
+        "soreness": np.full(n, 3.0),
+        "stress": np.full(n, 4.0),
+        "intensity": np.arange(n, dtype=float),
+        "label": ["Moderate"] * n,
+        "confidence": np.full(n, 0.8),
+    }
+    store.append("readiness", user_ids, days, columns)
+
+
+def test_stale_order_file_is_rebuilt(tmp_path):
+    root = str(tmp_path / "history")
+    days = [f"2024-01-{day:02d}" for day in range(1, 10)]
+    store = HistoryStore(root, index_tail=0)
+    append_readiness(store, ["a"] * 3, days[:3])
+    assert len(store.query("readiness", "a")["day"]) == 3
+    segment = store._segment("readiness", store.segment_numbers("readiness")[0])
+    order_path = os.path.join(segment.path, "index.order.npy")
+    shutil.copy(order_path, str(tmp_path / "order.npy"))
+    
+    append_readiness(store, ["b", "a", "b", "a", "a", "a"], days[3:])
+    expected = store.query("readiness", "a")
+    assert len(expected["day"]) == 7
+    
+    # A crash between the two replaces leaves new offsets with the old order
+    shutil.copy(str(tmp_path / "order.npy"), order_path)
+    reopened = HistoryStore(root)
+    result = reopened.query("readiness", "a")
+    for field, values in expected.items():
+        np.testing.assert_array_equal(result[field], values)
+    assert len(np.load(order_path)) == 9
+
+
+def test_failed_record_is_not_skipped_when_repeated(tmp_path):
+    writer = HistoryWriter(str(tmp_path / "history"), flush_interval=3600)
+    row = {"sleep": 7.0, "energy": 6.0, "soreness": 3.0, "stress": 4.0, "intensity": 55.0, "label": "Moderate", "confidence": 0.8}
+    
+    async def check_in_twice():
+        await writer.start()
+        append = writer.store.append
+        
+        def full(*args):
+            raise OSError("disk full")
+        
+        writer.store.append = full
+        writer.record("readiness", "a", 19723, row)
+        await writer._flush()
+        writer.store.append = append
+        writer.record("readiness", "a", 19723, row)
+        await writer.close()
+    
+    asyncio.run(check_in_twice())
+    assert writer.stats()["failed"]["readiness"] == 1
+    assert writer.stats()["skipped"] == 0
+    assert writer.stats()["written"]["readiness"] == 1
+    assert len(writer.store.query("readiness", "a")["day"]) == 1
@@ -7,6 +7,34 @@ import NutritionCard from '../components/NutritionCard';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
+// Input keys used here -> section names used by the API
+const SECTIONS = {
+  readiness: 'readiness',
+  bodyComp: 'body_composition',
+  strength: 'strength',
+  nutrition: 'nutrition'
+};
+
+// Stable per-browser id under which the backend keeps the last results
+const getUserId = () => {
+  let userId = localStorage.getItem('fitnessUserId');
+  if (!userId) {
+    userId = window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem('fitnessUserId', userId);
+  }
+  return userId;
+};
+
+// True when every section of the profile was computed from these inputs
+const profileMatches = (profile, inputs) =>
+  Object.entries(SECTIONS).every(([key, section]) => {
+    const stored = profile.inputs?.[section];
+    return stored && profile.results?.[section] &&
+      Object.entries(inputs[key] || {}).every(([field, value]) => stored[field] === value);
+  });
+
 /**
  * Dashboard - Main dashboard combining all cards
  */
@@ -26,52 +54,72 @@ const Dashboard = () => {
     nutrition: { weight: 75, goal: 'maintain', activity_level: 'moderate', metabolism: 'normal', adherence: 0.7 }
   }), []);
 
+  const showResults = useCallback((results, inputs) => {
+    setReadinessData(results.readiness);
+    setBodyCompData(results.body_composition);
+    setStrengthData(results.strength);
+    setNutritionData(results.nutrition);
+    setGoal(inputs.nutrition?.goal || 'maintain');
+  }, []);
+
   const fetchAllData = useCallback(async (inputs) => {
     setLoading(true);
     setError(null);
 
     try {
-      const [readinessRes, bodyCompRes, strengthRes, nutritionRes] = await Promise.all([
-        axios.post(`${API_BASE}/api/readiness`, inputs.readiness),
-        axios.post(`${API_BASE}/api/body-composition`, inputs.bodyComp),
-        axios.post(`${API_BASE}/api/one-rep-max`, inputs.strength),
-        axios.post(`${API_BASE}/api/nutrition`, inputs.nutrition)
-      ]);
-
-      setReadinessData(readinessRes.data);
-      setBodyCompData(bodyCompRes.data);
-      setStrengthData(strengthRes.data);
-      setNutritionData(nutritionRes.data);
-      setGoal(inputs.nutrition?.goal || 'maintain');
+      // One round trip for all four cards; failed sections come back as null.
+      // X-User-Id has the backend store the results in this browser's profile.
+      const { data } = await axios.post(`${API_BASE}/api/dashboard`, {
+        readiness: inputs.readiness,
+        body_composition: inputs.bodyComp,
+        strength: inputs.strength,
+        nutrition: inputs.nutrition
+      }, { headers: { 'X-User-Id': getUserId() } });
+
+      if (Object.keys(data.errors || {}).length > 0) {
+        console.error('Dashboard section errors:', data.errors);
+      }
+
+      showResults(data, inputs);
     } catch (err) {
       console.error('Error fetching data:', err);
       setError('Failed to load data. Please make sure the backend is running.');
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [showResults]);
 
-  // Load saved data from localStorage on mount
+  // Load saved inputs from localStorage on mount (default demo data if none)
   useEffect(() => {
-    const loadSavedData = () => {
+    const loadSavedData = async () => {
+      let inputs = getDefaultInputs();
       try {
         const savedInputs = localStorage.getItem('fitnessInputs');
         if (savedInputs) {
-          const inputs = JSON.parse(savedInputs);
-          setGoal(inputs.nutrition?.goal || 'maintain');
-          fetchAllData(inputs);
-        } else {
-          // Use default demo data
-          fetchAllData(getDefaultInputs());
+          inputs = JSON.parse(savedInputs);
         }
       } catch (err) {
         console.error('Error loading saved data:', err);
-        fetchAllData(getDefaultInputs());
       }
+
+      try {
+        // Reuse the stored results while the inputs are unchanged
+        const { data: profile } = await axios.get(
+          `${API_BASE}/api/profile/${encodeURIComponent(getUserId())}`
+        );
+        if (profileMatches(profile, inputs)) {
+          showResults(profile.results, inputs);
+          setLoading(false);
+          return;
+        }
+      } catch (err) {
+        // No profile yet (404) or profiles disabled: compute below
+      }
+      fetchAllData(inputs);
     };
 
     loadSavedData();
-  }, [fetchAllData, getDefaultInputs]);
+  }, [fetchAllData, getDefaultInputs, showResults]);
 
   if (loading) {
     return (